@@ -0,0 +1,29 @@
+"""
+gunicorn settings for neutroNote.
+
+Usage: gunicorn -c gunicorn.conf.py neutronote.wsgi:app
+"""
+
+import os
+
+bind = os.environ.get("NEUTRONOTE_BIND", "127.0.0.1:8000")
+
+# A single worker process: the code-cell kernel (with the users' Mantid
+# workspaces) and the run-index caches live in the process, so extra
+# workers would each get their own kernel. Concurrency comes from
+# greenlets (or threads) inside that worker instead.
+workers = 1
+
+try:
+    import gevent  # noqa: F401
+
+    worker_class = "gevent"
+    worker_connections = 1000
+except ImportError:
+    worker_class = "gthread"
+    threads = 8
+
+# Long Mantid reductions run in the kernel, not the worker, but plot and
+# metadata requests can still take a while on a busy shared filesystem.
+timeout = 120
+graceful_timeout = 30
@@ -3,11 +3,17 @@ neutroNote – Flask application factory.
 """
 
 import os
+import re
+import threading
+from functools import lru_cache
 from pathlib import Path
 
+import markdown as md
 from dotenv import load_dotenv
-from flask import Flask
+from flask import Flask, redirect, url_for
+from markupsafe import Markup
 
+from . import jsonutil
 from .instruments import get_instrument, available_instruments, InstrumentConfig
 
 # Load .env file from the project root (parent of this package directory)
@@ -17,6 +23,10 @@ load_dotenv(_project_root / ".env")
 
 # Allowed image extensions
 ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "webp", "svg"}
+_ALLOWED_RE = re.compile(
+    r"\.(" + "|".join(sorted(ALLOWED_EXTENSIONS)) + r")$",
+    re.IGNORECASE,
+)
 
 # Default instrument (can be overridden via env var or CLI arg)
 DEFAULT_INSTRUMENT = "SNAP"
@@ -24,7 +34,43 @@ DEFAULT_INSTRUMENT = "SNAP"
 
 def allowed_file(filename):
     """Check if the file extension is allowed."""
-    return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
+    return allowed_extension(filename) is not None
+
+
+def allowed_extension(filename):
+    """Return the lower-cased extension if it is allowed, else None."""
+    if not filename:
+        return None
+    match = _ALLOWED_RE.search(filename)
+    return match.group(1).lower() if match else None
+
+
+# Leading bytes of each allowed image format (SVG is text, so it is matched
+# on its opening tag after any BOM/whitespace).
+IMAGE_SNIFF_BYTES = 256
+_SVG_STARTS = (b"<?xml", b"<svg", b"<!--", b"<!doctype svg")
+
+
+def sniff_image_extension(head):
+    """Return the canonical extension for an image's leading bytes, or None."""
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    text = head.lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+    if text.startswith(_SVG_STARTS):
+        return "svg"
+    return None
+
+
+def image_matches_extension(head, ext):
+    """Check that *head* (the first bytes of a file) really is an *ext* image."""
+    kind = sniff_image_extension(head)
+    return kind is not None and kind == ("jpg" if ext == "jpeg" else ext)
 
 
 def get_ipts_notebook_path(ipts: str, instrument: InstrumentConfig | None = None) -> str:
@@ -42,14 +88,40 @@ def get_ipts_notebook_path(ipts: str, instrument: InstrumentConfig | None = None
     return instrument.notebook_path(f"IPTS-{ipts}")
 
 
+# Markdown extensions used for text entries
+MARKDOWN_EXTENSIONS = ["fenced_code", "tables", "nl2br", "sane_lists"]
+
+# Markdown instances keep parser state, so each thread gets its own
+_md_local = threading.local()
+
+
+def _get_markdown_converter():
+    """Return this thread's Markdown instance, building it on first use."""
+    converter = getattr(_md_local, "converter", None)
+    if converter is None:
+        converter = _md_local.converter = md.Markdown(
+            extensions=MARKDOWN_EXTENSIONS, output_format="html"
+        )
+    return converter
+
+
+@lru_cache(maxsize=1024)
+def _render_markdown(text: str) -> str:
+    """Render Markdown to HTML, cached by body text.
+
+    Edited entries have a new body and so miss the cache naturally.
+    """
+    return _get_markdown_converter().reset().convert(text)
+
+
 def _migrate_db(app):
     """Run lightweight schema migrations for SQLite.
 
-    Adds new columns that may not exist in older databases.
+    Adds new columns and indexes that may not exist in older databases.
     Safe to call multiple times – skips columns that already exist.
+    Runs on the app's own engine, so in-memory test databases are
+    migrated too.
     """
-    import sqlite3
-
     from .models import db as _db
 
     uri = app.config["SQLALCHEMY_DATABASE_URI"]
@@ -57,27 +129,33 @@ def _migrate_db(app):
     if not uri.startswith("sqlite"):
         return
 
-    db_path = uri.replace("sqlite:///", "")
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        # Check existing columns in notebook_config
-        cursor.execute("PRAGMA table_info(notebook_config)")
-        existing = {row[1] for row in cursor.fetchall()}
-
-        if "experiment_start" not in existing:
-            cursor.execute("ALTER TABLE notebook_config ADD COLUMN experiment_start DATETIME")
-            app.logger.info("Migration: added notebook_config.experiment_start")
-        if "experiment_end" not in existing:
-            cursor.execute("ALTER TABLE notebook_config ADD COLUMN experiment_end DATETIME")
-            app.logger.info("Migration: added notebook_config.experiment_end")
-        if "reduced_data_path" not in existing:
-            cursor.execute("ALTER TABLE notebook_config ADD COLUMN reduced_data_path VARCHAR(500)")
-            app.logger.info("Migration: added notebook_config.reduced_data_path")
-
-        conn.commit()
-        conn.close()
+        with _db.engine.begin() as conn:
+            # Check existing columns in notebook_config
+            rows = conn.exec_driver_sql("PRAGMA table_info(notebook_config)").fetchall()
+            existing = {row[1] for row in rows}
+
+            if "experiment_start" not in existing:
+                conn.exec_driver_sql(
+                    "ALTER TABLE notebook_config ADD COLUMN experiment_start DATETIME"
+                )
+                app.logger.info("Migration: added notebook_config.experiment_start")
+            if "experiment_end" not in existing:
+                conn.exec_driver_sql(
+                    "ALTER TABLE notebook_config ADD COLUMN experiment_end DATETIME"
+                )
+                app.logger.info("Migration: added notebook_config.experiment_end")
+            if "reduced_data_path" not in existing:
+                conn.exec_driver_sql(
+                    "ALTER TABLE notebook_config ADD COLUMN reduced_data_path VARCHAR(500)"
+                )
+                app.logger.info("Migration: added notebook_config.reduced_data_path")
+
+            # Timeline is ordered by created_at on every page load
+            conn.exec_driver_sql(
+                "CREATE INDEX IF NOT EXISTS ix_entry_created_at ON entry (created_at)"
+            )
+            conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_entry_type ON entry (type)")
     except Exception as e:
         app.logger.warning("Migration check failed (non-fatal): %s", e)
 
@@ -186,6 +264,15 @@ def create_app(test_config=None, ipts=None, instrument_name=None):
         },
         UPLOAD_FOLDER=upload_folder,
         MAX_CONTENT_LENGTH=16 * 1024 * 1024,  # 16 MB max upload
+        # Let a fronting nginx/apache stream uploads via X-Sendfile
+        USE_X_SENDFILE=os.environ.get("USE_X_SENDFILE", "").lower() in ("1", "true", "yes"),
+        # nginx equivalent: internal location that aliases UPLOAD_FOLDER,
+        # e.g. "/_uploads/" (served via X-Accel-Redirect)
+        UPLOAD_ACCEL_REDIRECT=os.environ.get("NEUTRONOTE_UPLOAD_ACCEL_REDIRECT") or None,
+        # Seconds before a hung code cell kills the kernel (unset = no limit)
+        KERNEL_EXEC_TIMEOUT=float(os.environ["NEUTRONOTE_KERNEL_TIMEOUT"])
+        if os.environ.get("NEUTRONOTE_KERNEL_TIMEOUT")
+        else None,
     )
 
     if test_config:
@@ -199,6 +286,10 @@ def create_app(test_config=None, ipts=None, instrument_name=None):
     csrf = CSRFProtect(app)
     db.init_app(app)
 
+    # Serve API responses through orjson when available
+    if jsonutil.HAS_ORJSON:
+        app.json = jsonutil.ORJSONProvider(app)
+
     # Set SQLite pragmas for better multi-user support on shared filesystem
     def set_sqlite_pragma(dbapi_connection, connection_record):
         cursor = dbapi_connection.cursor()
@@ -208,6 +299,10 @@ def create_app(test_config=None, ipts=None, instrument_name=None):
         cursor.execute("PRAGMA synchronous=NORMAL")
         # Busy timeout in milliseconds
         cursor.execute("PRAGMA busy_timeout=30000")
+        # 64 MB page cache per connection (negative value = KiB)
+        cursor.execute("PRAGMA cache_size=-65536")
+        # Keep sort/temp tables off the shared filesystem
+        cursor.execute("PRAGMA temp_store=MEMORY")
         cursor.close()
 
     with app.app_context():
@@ -275,38 +370,24 @@ def create_app(test_config=None, ipts=None, instrument_name=None):
     app.register_blueprint(entries.bp)
 
     # ---- Template filters ----
-    import json
-
-    import markdown as md
-    from markupsafe import Markup
+    # Build the extension pipeline now so the first page render doesn't pay for it
+    _get_markdown_converter()
 
     @app.template_filter("markdown")
     def markdown_filter(text):
         """Convert Markdown text to HTML."""
         if not text:
             return ""
-        # Enable common extensions: fenced code blocks, tables, etc.
-        html = md.markdown(
-            text,
-            extensions=["fenced_code", "tables", "nl2br", "sane_lists"],
-        )
-        return Markup(html)
+        return Markup(_render_markdown(text))
 
     @app.template_filter("fromjson")
     def fromjson_filter(text):
         """Parse a JSON string into a Python object."""
-        if not text:
-            return {}
-        try:
-            return json.loads(text)
-        except (json.JSONDecodeError, TypeError):
-            return {"error": "Invalid JSON data"}
+        return jsonutil.loads_body(text)
 
     # Redirect root to entries
     @app.route("/")
     def index():
-        from flask import redirect, url_for
-
         return redirect(url_for("entries.index"))
 
     # Make IPTS and instrument available in templates
@@ -341,6 +422,22 @@ def _find_free_port(start=6100, end=6999):
     return None
 
 
+def _start_background_tasks(app):
+    """Warm the code kernel and keep reduced-run listings cached."""
+    from .services.data import start_run_index_prewarmer
+
+    _warm_kernel()
+    start_run_index_prewarmer(app)
+
+
+def _warm_kernel():
+    """Start the code-cell kernel now so its Python/Mantid start-up overlaps
+    server start-up instead of delaying the first code execution."""
+    from .services.kernel import get_kernel_manager
+
+    threading.Thread(target=get_kernel_manager, name="kernel-warmup", daemon=True).start()
+
+
 def main():
     """CLI entry-point for `neutronote` command."""
     import argparse
@@ -432,6 +529,7 @@ def main():
 
         # Create the Flask app
         app = create_app(ipts=ipts, instrument_name=instrument_name)
+        _start_background_tasks(app)
 
         # Set up file-based error logging so 500 errors are captured even
         # when the console output is suppressed in quiet mode.
@@ -533,6 +631,10 @@ def main():
             print(f"📓 neutroNote starting in development mode ({instrument_name})")
 
         app = create_app(ipts=ipts, instrument_name=instrument_name)
+        # Only the reloader's child serves requests; don't start a kernel
+        # or prewarm thread in the file-watching parent as well.
+        if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+            _start_background_tasks(app)
         print(f" * Running on {url}")
         # Bind to localhost only (users access from the same machine)
         app.run(host="127.0.0.1", debug=True, port=port)
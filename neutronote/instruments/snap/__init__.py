@@ -9,11 +9,27 @@ layouts without hard-coding SNAP-specific details.
 
 from __future__ import annotations
 
+from functools import cache
 from pathlib import Path
 
 from .. import InstrumentConfig, register_instrument
 
 
+@cache
+def _state_def():
+    """Return snapwrap's ``stateDef``, or None if snapwrap is unavailable.
+
+    Imported on first use rather than at module import (snapwrap pulls in
+    mantid), and remembered either way: a failed import is not cached by
+    Python, so retrying it would search ``sys.path`` on every call.
+    """
+    try:
+        from snapwrap.snapStateMgr import stateDef
+    except ImportError:
+        return None
+    return stateDef
+
+
 @register_instrument
 class SNAPConfig(InstrumentConfig):
     """Configuration for the SNAP instrument (BL3, SNS)."""
@@ -53,13 +69,14 @@ class SNAPConfig(InstrumentConfig):
 
     def get_state_id_for_run(self, run_number: int) -> str | None:
         """Use SNAPWrap's ``stateDef`` to look up the instrument state."""
+        state_def = _state_def()
+        if state_def is None:
+            return None
         try:
-            from snapwrap.snapStateMgr import stateDef
-
-            result = stateDef(run_number)
+            result = state_def(run_number)
             if result and len(result) > 0:
                 return result[0]
-        except (ImportError, Exception):
+        except Exception:
             pass
         return None
 
@@ -0,0 +1,100 @@
+"""
+JSON helpers – use orjson when it is installed, stdlib json otherwise.
+
+Entry bodies for header/code/data/pvlog entries are stored as JSON text and
+parsed on every timeline render, so the fast path matters for large notebooks.
+"""
+
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# Exceptions raised by ``loads`` on malformed input (orjson's error subclasses
+# json.JSONDecodeError, so catching that covers both backends).
+JSONDecodeError = json.JSONDecodeError
+
+if HAS_ORJSON:
+    _ORJSON_OPTS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def loads(text):
+    """Parse JSON from ``str`` or ``bytes``."""
+    if HAS_ORJSON:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def loads_body(text):
+    """Parse a JSON entry body for display.
+
+    Returns ``{}`` for an empty body and ``{"error": "Invalid JSON data"}``
+    if it cannot be parsed, so templates can always treat it as a mapping.
+    """
+    if not text:
+        return {}
+    try:
+        return loads(text)
+    except (JSONDecodeError, TypeError):
+        return {"error": "Invalid JSON data"}
+
+
+def _to_builtin(obj):
+    """Fallback for numpy arrays/scalars when orjson is not available."""
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj) -> str:
+    """Serialise *obj* to a JSON ``str`` (suitable for a Text column)."""
+    if HAS_ORJSON:
+        return orjson.dumps(obj, option=_ORJSON_OPTS).decode()
+    return json.dumps(obj, default=_to_builtin)
+
+
+def dumpb(obj) -> bytes:
+    """Serialise *obj* to UTF-8 JSON ``bytes`` (for sockets and raw bodies)."""
+    if HAS_ORJSON:
+        return orjson.dumps(obj, option=_ORJSON_OPTS)
+    return json.dumps(obj, default=_to_builtin).encode()
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson.
+
+    Datetimes, dataclasses and numpy arrays are encoded natively in C
+    (naive datetimes are stored as UTC, so they are tagged ``+00:00``).
+    Anything else falls back to Flask's default conversion (``date`` via
+    HTTP dates, UUIDs, ``__html__`` objects).
+    """
+
+    def _option(self, indent=None):
+        option = _ORJSON_OPTS | orjson.OPT_NAIVE_UTC
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        return self._dumpb(obj, kwargs.get("indent")).decode()
+
+    def _dumpb(self, obj, indent=None):
+        return orjson.dumps(obj, default=self.default, option=self._option(indent))
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """Build a JSON response from the encoded bytes (no str round trip)."""
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = self.compact is False or (self.compact is None and self._app.debug)
+        body = self._dumpb(obj, indent=pretty) + b"\n"
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -3,12 +3,29 @@ SQLAlchemy models for neutroNote.
 """
 
 import os
+import time
+from collections import namedtuple
 from datetime import datetime, timezone
+from enum import Enum
+from functools import cached_property
 
+from flask import current_app, g
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, select
+
+from . import jsonutil
 
 db = SQLAlchemy()
 
+# Display format for entry timestamps, e.g. "Mar 04, 2025 02:15 PM"
+TIMESTAMP_FORMAT = "%b %d, %Y %I:%M %p"
+
+# app.extensions key for the cached NotebookConfig snapshot
+_CONFIG_CACHE_KEY = "neutronote.notebook_config"
+# Other servers may share the notebook database, so cached config is only
+# trusted for a few seconds; local writes invalidate it immediately.
+CONFIG_CACHE_TTL = 5.0
+
 
 def get_current_user() -> str:
     """Get the current Linux username.
@@ -27,21 +44,75 @@ entry_tags = db.Table(
 )
 
 
-class Entry(db.Model):
+class EntryType(str, Enum):
+    """Kinds of timeline entry.
+
+    Members are ``str`` subclasses equal to the values stored in the
+    ``entry.type`` column, so they compare, serialise and bind exactly like
+    the plain strings used in templates, JSON bodies and existing notebooks.
+    """
+
+    TEXT = "text"
+    HEADER = "header"
+    IMAGE = "image"
+    DATA = "data"
+    CODE = "code"
+    PVLOG = "pvlog"
+
+    def __str__(self):
+        return self.value
+
+
+class EntryDisplayMixin:
+    """Display helpers shared by ``Entry`` and the read-only ``TimelineEntry``.
+
+    Display strings and the parsed body are computed once per instance;
+    created_at never changes and ``Entry.mark_edited()`` drops the cached
+    edit time and body.
+    """
+
+    @property
+    def is_edited(self):
+        """Return True if this entry has been edited after creation."""
+        return self.edited_at is not None
+
+    @cached_property
+    def timestamp_display(self):
+        """Return a human-friendly timestamp for creation time."""
+        return self.created_at.strftime(TIMESTAMP_FORMAT)
+
+    @cached_property
+    def edited_at_display(self):
+        """Return a human-friendly timestamp for edit time."""
+        if self.edited_at:
+            return self.edited_at.strftime(TIMESTAMP_FORMAT)
+        return None
+
+    @cached_property
+    def body_data(self):
+        """The JSON body (header, data, code, pvlog entries) parsed once.
+
+        Entry cards read it several times per render; see
+        ``jsonutil.loads_body`` for empty/malformed bodies.
+        """
+        return jsonutil.loads_body(self.body)
+
+
+class Entry(EntryDisplayMixin, db.Model):
     """A single notebook entry (text, header, image, data, or code)."""
 
     # Entry type constants
-    TYPE_TEXT = "text"
-    TYPE_HEADER = "header"
-    TYPE_IMAGE = "image"
-    TYPE_DATA = "data"
-    TYPE_CODE = "code"
-    TYPE_PVLOG = "pvlog"
+    TYPE_TEXT = EntryType.TEXT
+    TYPE_HEADER = EntryType.HEADER
+    TYPE_IMAGE = EntryType.IMAGE
+    TYPE_DATA = EntryType.DATA
+    TYPE_CODE = EntryType.CODE
+    TYPE_PVLOG = EntryType.PVLOG
 
-    TYPES = [TYPE_TEXT, TYPE_HEADER, TYPE_IMAGE, TYPE_DATA, TYPE_CODE, TYPE_PVLOG]
+    TYPES = list(EntryType)
 
     id = db.Column(db.Integer, primary_key=True)
-    type = db.Column(db.String(20), nullable=False, default=TYPE_TEXT)
+    type = db.Column(db.String(20), nullable=False, default=TYPE_TEXT, index=True)
     title = db.Column(db.String(200), nullable=True)
     body = db.Column(db.Text, nullable=False, default="")
 
@@ -50,39 +121,49 @@ class Entry(db.Model):
     edited_by = db.Column(db.String(100), nullable=True)  # Who last edited
 
     # Timestamps: created_at determines timeline position, edited_at tracks modifications
-    created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    created_at = db.Column(
+        db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc), index=True
+    )
     edited_at = db.Column(db.DateTime, nullable=True)  # None until first edit
 
     # Future: author_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
     # Future: edited_by_id for tracking who made edits
 
     # Relationships
-    tags = db.relationship("Tag", secondary=entry_tags, back_populates="entries", lazy="dynamic")
+    tags = db.relationship("Tag", secondary=entry_tags, back_populates="entries", lazy="selectin")
 
     def __repr__(self):
         return f"<Entry {self.id} [{self.type}] {self.created_at}>"
 
-    @property
-    def is_edited(self):
-        """Return True if this entry has been edited after creation."""
-        return self.edited_at is not None
-
-    @property
-    def timestamp_display(self):
-        """Return a human-friendly timestamp for creation time."""
-        return self.created_at.strftime("%b %d, %Y %I:%M %p")
-
-    @property
-    def edited_at_display(self):
-        """Return a human-friendly timestamp for edit time."""
-        if self.edited_at:
-            return self.edited_at.strftime("%b %d, %Y %I:%M %p")
-        return None
-
     def mark_edited(self):
         """Update the edited_at timestamp and record who made the edit."""
         self.edited_at = datetime.now(timezone.utc)
         self.edited_by = get_current_user()
+        self.__dict__.pop("edited_at_display", None)
+        self.__dict__.pop("body_data", None)
+
+
+# Tag as seen by the timeline: just what the tag pills render
+TimelineTag = namedtuple("TimelineTag", ["id", "name"])
+
+
+class TimelineEntry(EntryDisplayMixin):
+    """Read-only view of an entry row for rendering the timeline.
+
+    Built from a plain column projection, so it skips ORM instance
+    construction and identity-map bookkeeping. Offers the same attributes
+    and display properties the entry-card templates use.
+    """
+
+    COLUMNS = ("id", "type", "title", "body", "author", "edited_by", "created_at", "edited_at")
+
+    def __init__(self, row, tags=()):
+        for name in self.COLUMNS:
+            setattr(self, name, getattr(row, name))
+        self.tags = list(tags)
+
+    def __repr__(self):
+        return f"<TimelineEntry {self.id} [{self.type}] {self.created_at}>"
 
 
 class Tag(db.Model):
@@ -118,13 +199,50 @@ class NotebookConfig(db.Model):
     @classmethod
     def get_config(cls):
         """Get the singleton config, creating one if it doesn't exist."""
-        config = cls.query.first()
+        config = db.session.scalar(select(cls).limit(1))
         if config is None:
             config = cls()
             db.session.add(config)
             db.session.commit()
+            # Reload now so the instance stays usable once detached (the
+            # streamed timeline renders after the request session is closed)
+            db.session.refresh(config)
         return config
 
+    @classmethod
+    def get_cached(cls):
+        """Get a read-only snapshot of the config without hitting the database.
+
+        The snapshot is a transient (session-less) ``NotebookConfig`` with the
+        same columns and properties, so templates and read-only routes can use
+        it in place of ``get_config()``. Modify settings via ``get_config()``.
+        """
+        # Pin one snapshot per request so helpers called from a route see the
+        # same settings even if the TTL runs out part-way through.
+        snapshot = g.get("_nb_config")
+        if snapshot is not None:
+            return snapshot
+
+        cached = current_app.extensions.get(_CONFIG_CACHE_KEY)
+        now = time.monotonic()
+        if cached is not None and now - cached[0] < CONFIG_CACHE_TTL:
+            snapshot = cached[1]
+        else:
+            config = cls.get_config()
+            snapshot = cls(**{c.key: getattr(config, c.key) for c in cls.__table__.columns})
+            current_app.extensions[_CONFIG_CACHE_KEY] = (now, snapshot)
+        g._nb_config = snapshot
+        return snapshot
+
+    @staticmethod
+    def clear_cache():
+        """Drop the cached snapshot for the current app and request."""
+        try:
+            current_app.extensions.pop(_CONFIG_CACHE_KEY, None)
+            g.pop("_nb_config", None)
+        except RuntimeError:
+            pass  # No app context
+
     @property
     def is_configured(self):
         """Return True if IPTS has been set."""
@@ -153,3 +271,10 @@ class NotebookConfig(db.Model):
     def has_reduced_data_path(self):
         """Return True if a custom reduced data path has been set."""
         return self.reduced_data_path is not None and self.reduced_data_path.strip() != ""
+
+
+@event.listens_for(NotebookConfig, "after_insert")
+@event.listens_for(NotebookConfig, "after_update")
+@event.listens_for(NotebookConfig, "after_delete")
+def _invalidate_config_cache(mapper, connection, target):
+    NotebookConfig.clear_cache()
@@ -2,11 +2,19 @@
 Entries blueprint – handles the main split-view interface and entry CRUD.
 """
 
-import json
+import base64
+import binascii
+import hashlib
 import logging
+import mimetypes
 import os
-import shutil
-import uuid
+import secrets
+import threading
+import time
+from datetime import datetime, timezone
+from functools import wraps
+from io import BytesIO
+from pathlib import Path
 
 from flask import (
     Blueprint,
@@ -18,20 +26,50 @@ from flask import (
     render_template,
     request,
     send_from_directory,
+    stream_template,
+    stream_with_context,
     url_for,
 )
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import OperationalError
 from werkzeug.utils import secure_filename
 
-from ..app import allowed_file, ALLOWED_EXTENSIONS
-from ..models import Entry, NotebookConfig, Tag, db
-from ..services.metadata import get_run_metadata
+from .. import jsonutil
+from ..app import (
+    ALLOWED_EXTENSIONS,
+    IMAGE_SNIFF_BYTES,
+    allowed_extension,
+    image_matches_extension,
+)
+from ..models import (
+    Entry,
+    NotebookConfig,
+    Tag,
+    TimelineEntry,
+    TimelineTag,
+    db,
+    entry_tags,
+)
+from ..services.metadata import clear_nexus_lookup_cache, get_run_metadata
 from ..services.data import (
-    discover_state_ids,
-    discover_reduced_runs,
+    clear_run_index_cache,
+    get_run_index,
+    get_state_ids,
     get_run_metadata_lazy,
     get_run_metadata_quick,
+    get_run_metadata_quick_many,
+    load_reduced_data_for_plot,
 )
-from ..services.kernel import get_kernel_manager
+from ..services.kernel import KernelBusyError, get_kernel_manager
+from ..services.pvlog import PVLogService
+
+try:
+    from blake3 import blake3 as _upload_hasher
+
+    HAS_BLAKE3 = True
+except ImportError:
+    _upload_hasher = hashlib.blake2b
+    HAS_BLAKE3 = False
 
 logger = logging.getLogger(__name__)
 
@@ -45,9 +83,6 @@ def _safe_commit(max_retries=3):
     'database is locked' when multiple users write concurrently.  This
     helper retries a few times before giving up.
     """
-    import time
-    from sqlalchemy.exc import OperationalError
-
     for attempt in range(max_retries):
         try:
             db.session.commit()
@@ -62,41 +97,175 @@ def _safe_commit(max_retries=3):
                 raise
 
 
+# Responses to create requests carrying an Idempotency-Key header are kept
+# this long, so a retried or double-submitted request returns the first
+# result instead of writing a second entry.
+IDEMPOTENCY_TTL = 60  # seconds
+_IDEMPOTENCY_KEY = "neutronote.idempotency"
+_idempotency_lock = threading.Lock()
+_PENDING = object()
+
+
+def _idempotent(view):
+    """Replay the stored response for a repeated ``Idempotency-Key``.
+
+    Keys are scoped to the client address. A repeat that arrives while the
+    first request is still running gets ``409 Conflict``; failed requests
+    are not stored, so they can be retried with the same key.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get("Idempotency-Key", "").strip()
+        if not key:
+            return view(*args, **kwargs)
+
+        cache_key = (request.remote_addr, request.path, key)
+        now = time.monotonic()
+        with _idempotency_lock:
+            store = current_app.extensions.setdefault(_IDEMPOTENCY_KEY, {})
+            for k in [k for k, (expires, _) in store.items() if expires <= now]:
+                del store[k]
+            stored = store.get(cache_key)
+            if stored is None:
+                store[cache_key] = (now + IDEMPOTENCY_TTL, _PENDING)
+        if stored is not None:
+            if stored[1] is _PENDING:
+                return jsonify({"error": "Request already in progress"}), 409
+            body, status = stored[1]
+            return current_app.response_class(body, status=status, mimetype="application/json")
+
+        response = None
+        try:
+            response = current_app.make_response(view(*args, **kwargs))
+            return response
+        finally:
+            with _idempotency_lock:
+                if response is not None and response.status_code < 400:
+                    store[cache_key] = (
+                        time.monotonic() + IDEMPOTENCY_TTL,
+                        (response.get_data(), response.status_code),
+                    )
+                else:
+                    store.pop(cache_key, None)
+
+    return wrapper
+
+
+def _iter_timeline(entry_ids=None):
+    """Yield timeline entries oldest-first, fetched from the database in batches.
+
+    The query runs when the template first iterates, i.e. inside the
+    streamed response, so a long timeline is never held in memory as a
+    full list of rows or a full HTML string. Rows are plain column tuples
+    wrapped in ``TimelineEntry``; tags come from one extra query. If
+    *entry_ids* is given only those entries (and their tags) are loaded.
+    """
+    tag_stmt = (
+        select(entry_tags.c.entry_id, Tag.id, Tag.name)
+        .join(Tag, Tag.id == entry_tags.c.tag_id)
+        .order_by(Tag.id)
+    )
+    columns = [getattr(Entry, name) for name in TimelineEntry.COLUMNS]
+    stmt = select(*columns).order_by(Entry.created_at.asc()).execution_options(yield_per=200)
+    if entry_ids is not None:
+        tag_stmt = tag_stmt.where(entry_tags.c.entry_id.in_(entry_ids))
+        stmt = stmt.where(Entry.id.in_(entry_ids))
+
+    tags_by_entry = {}
+    for entry_id, tag_id, tag_name in db.session.execute(tag_stmt):
+        tags_by_entry.setdefault(entry_id, []).append(TimelineTag(tag_id, tag_name))
+
+    for row in db.session.execute(stmt):
+        yield TimelineEntry(row, tags_by_entry.get(row.id, ()))
+
+
 @bp.route("/")
 def index():
-    """Main split-view: entry creation on left, timeline on right."""
+    """Main split-view: entry creation on left, timeline on right.
+
+    ``?limit=N`` renders only the newest N entries, with a link back to
+    the full timeline when older ones exist.
+    """
     instrument = current_app.config["INSTRUMENT"]
     pv_aliases = instrument.pv_aliases()
 
-    config = NotebookConfig.get_config()
-    entries = Entry.query.order_by(Entry.created_at.asc()).all()
+    config = NotebookConfig.get_cached()
 
-    return render_template(
+    entry_ids = None
+    has_earlier = False
+    limit = request.args.get("limit", type=int)
+    if limit and limit > 0:
+        # One extra id tells us whether anything older was left out
+        entry_ids = db.session.scalars(
+            select(Entry.id).order_by(Entry.created_at.desc()).limit(limit + 1)
+        ).all()
+        has_earlier = len(entry_ids) > limit
+        entry_ids = entry_ids[:limit]
+
+    return stream_template(
         "entries/index.html",
-        entries=entries,
+        entries=_iter_timeline(entry_ids),
+        has_earlier=has_earlier,
         config=config,
         aliases=pv_aliases,
         pv_prefix=instrument.pv_prefix(),
     )
 
 
-def _attach_tags(entry, tag_names):
-    """Attach tags to an entry by name, creating new Tag rows as needed.
+def _get_or_create_tag(name):
+    """Return the Tag with this name (case-insensitive), adding it if new."""
+    tag = db.session.scalar(select(Tag).where(db.func.lower(Tag.name) == name.lower()).limit(1))
+    if not tag:
+        tag = Tag(name=name)
+        db.session.add(tag)
+    return tag
+
 
-    *tag_names* is an iterable of tag-name strings (possibly empty).
-    Must be called after the entry has been added to the session (so it has an id
-    after commit) or before commit – SQLAlchemy handles both.
+def _insert_entry(entry_type, title, body, tag_names=(), **columns):
+    """Insert a new entry with a single Core INSERT and commit it.
+
+    The create routes never use the Entry object afterwards, so this skips
+    building an ORM instance and running it through the unit of work, and
+    the post-commit reload that reading ``entry.id`` would trigger.
+    Column defaults (author, created_at) are still applied unless given in
+    *columns*. Returns the new entry id.
     """
-    for name in tag_names:
-        name = name.strip()
-        if not name:
-            continue
-        tag = Tag.query.filter(db.func.lower(Tag.name) == name.lower()).first()
-        if not tag:
-            tag = Tag(name=name)
-            db.session.add(tag)
-        if tag not in entry.tags.all():
-            entry.tags.append(tag)
+    row = dict(type=entry_type, title=title, body=body, **columns)
+    return _insert_entries([(row, tag_names)])[0]
+
+
+def _insert_entries(items):
+    """Insert ``(columns, tag_names)`` pairs in one transaction.
+
+    Entries go in as one executemany INSERT ... RETURNING and their tag
+    links as one more, so a batch costs a single commit (one fsync) however
+    many entries it holds. Every *columns* dict must have the same keys.
+    Returns the new entry ids in input order.
+    """
+    stmt = insert(Entry).returning(Entry.id, sort_by_parameter_order=True)
+    entry_ids = db.session.scalars(stmt, [columns for columns, _ in items]).all()
+
+    tag_ids = {}
+    links = set()
+    for entry_id, (_, tag_names) in zip(entry_ids, items):
+        for name in tag_names:
+            name = name.strip()
+            if not name:
+                continue
+            key = name.lower()
+            if key not in tag_ids:
+                tag = _get_or_create_tag(name)
+                db.session.flush()
+                tag_ids[key] = tag.id
+            links.add((entry_id, tag_ids[key]))
+    if links:
+        db.session.execute(
+            insert(entry_tags), [{"entry_id": e, "tag_id": t} for e, t in sorted(links)]
+        )
+
+    _safe_commit()
+    return entry_ids
 
 
 def _parse_form_tags():
@@ -123,10 +292,7 @@ def create_text():
     tag_names = _parse_form_tags()
 
     if body:
-        entry = Entry(type=Entry.TYPE_TEXT, title=title, body=body)
-        db.session.add(entry)
-        _attach_tags(entry, tag_names)
-        _safe_commit()
+        _insert_entry(Entry.TYPE_TEXT, title, body, tag_names)
 
     return redirect(url_for("entries.index"))
 
@@ -144,8 +310,6 @@ def setup_notebook():
     experiment_end_str = request.form.get("experiment_end", "").strip()
 
     # Parse optional experiment dates
-    from datetime import datetime, timezone
-
     experiment_start = None
     experiment_end = None
     if experiment_start_str:
@@ -188,19 +352,17 @@ def create_header():
             flash("Please enter a heading.", "error")
             return redirect(url_for("entries.index", tab="header"))
 
-        entry = Entry(
-            type=Entry.TYPE_HEADER,
-            title=section_title,
-            body=json.dumps({"header_kind": "section"}),
+        _insert_entry(
+            Entry.TYPE_HEADER,
+            section_title,
+            jsonutil.dumps({"header_kind": "section"}),
+            _parse_form_tags(),
         )
-        db.session.add(entry)
-        _attach_tags(entry, _parse_form_tags())
-        _safe_commit()
         return redirect(url_for("entries.index"))
 
     # ---- Run header: fetch metadata from NeXus file ----
     # IPTS is always available (required to start neutroNote).
-    config = NotebookConfig.get_config()
+    config = NotebookConfig.get_cached()
 
     run_number_str = request.form.get("run_number", "").strip()
 
@@ -225,19 +387,193 @@ def create_header():
     # Store the metadata as JSON in the body
     meta_dict = metadata.to_dict()
     meta_dict["header_kind"] = "run"
-    entry = Entry(
-        type=Entry.TYPE_HEADER,
-        title=f"Run {run_number}: {metadata.title}",
-        body=json.dumps(meta_dict),
+    _insert_entry(
+        Entry.TYPE_HEADER,
+        f"Run {run_number}: {metadata.title}",
+        jsonutil.dumps(meta_dict),
+        _parse_form_tags(),
     )
 
-    db.session.add(entry)
-    _attach_tags(entry, _parse_form_tags())
-    _safe_commit()
-
     return redirect(url_for("entries.index"))
 
 
+# Read size when streaming uploads to disk
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+
+def _upload_dir() -> Path:
+    """Return the current app's uploads folder as a resolved ``Path``.
+
+    The resolved path is kept in ``app.extensions`` and only recomputed if
+    ``UPLOAD_FOLDER`` is changed.
+    """
+    folder = current_app.config["UPLOAD_FOLDER"]
+    cached = current_app.extensions.get("neutronote.upload_dir")
+    if cached is None or cached[0] != folder:
+        cached = (folder, Path(folder).resolve())
+        current_app.extensions["neutronote.upload_dir"] = cached
+    return cached[1]
+
+
+def _disk_fd(stream):
+    """Return the OS file descriptor behind *stream* if its data is on disk."""
+    # SpooledTemporaryFile.fileno() would force an in-memory upload to disk
+    if not getattr(stream, "_rolled", True):
+        return None
+    try:
+        return stream.fileno()
+    except (AttributeError, OSError):
+        return None
+
+
+def _seekable(stream):
+    """True if *stream* can be read twice (rewound with ``seek``)."""
+    try:
+        return stream.seekable()
+    except (AttributeError, ValueError):
+        return False
+
+
+def _hash_fd(fd, offset, size):
+    """Hash *size* bytes of *fd* from *offset*, leaving the file position alone."""
+    hasher = _upload_hasher()
+    end = offset + size
+    while offset < end and (chunk := os.pread(fd, min(UPLOAD_CHUNK_SIZE, end - offset), offset)):
+        hasher.update(chunk)
+        offset += len(chunk)
+    return hasher.hexdigest()
+
+
+def _copy_fd_range(src_fd, dst_fd, offset, size):
+    """Copy *size* bytes of *src_fd* from *offset* to *dst_fd*; return the count.
+
+    Uses ``copy_file_range`` so the data stays in the kernel (or on the file
+    server), falling back to pread/write where that is unsupported.
+    """
+    start, end = offset, offset + size
+    if hasattr(os, "copy_file_range"):
+        try:
+            while offset < end and (n := os.copy_file_range(src_fd, dst_fd, end - offset, offset)):
+                offset += n
+        except OSError:
+            pass  # e.g. EXDEV/EOPNOTSUPP; carry on from where it stopped
+    while offset < end:
+        chunk = os.pread(src_fd, min(UPLOAD_CHUNK_SIZE, end - offset), offset)
+        if not chunk:
+            break
+        view = memoryview(chunk)
+        while view:
+            view = view[os.write(dst_fd, view):]
+        offset += len(chunk)
+    return offset - start
+
+
+def _save_upload(stream, ext, prefix="", size=None):
+    """Stream *stream* into the uploads folder, named by its content hash.
+
+    The data is written to a temporary file that is renamed to
+    ``<prefix><hash>.<ext>``; identical images therefore share one file.
+    Seekable streams are hashed before anything is written, so a duplicate
+    writes nothing at all, and a stream backed by a file on disk (a spooled
+    upload or a picked file) is copied with ``copy_file_range``. One-pass
+    streams (decoded data URLs) are hashed while they are written, and the
+    temporary file is discarded if the name already exists. When the exact
+    *size* is known the file is preallocated in one extent. Returns the
+    stored filename.
+    """
+    upload_dir = _upload_dir()
+    filename = None
+    src_fd = _disk_fd(stream)
+    if src_fd is not None:
+        offset = stream.tell()
+        size = os.fstat(src_fd).st_size - offset
+        filename = f"{prefix}{_hash_fd(src_fd, offset, size)[:32]}.{ext}"
+    elif _seekable(stream):
+        # In-memory upload: hashing it first is cheap and skips the write
+        # entirely for a duplicate
+        offset = stream.tell()
+        hasher = _upload_hasher()
+        while chunk := stream.read(UPLOAD_CHUNK_SIZE):
+            hasher.update(chunk)
+        stream.seek(offset)
+        filename = f"{prefix}{hasher.hexdigest()[:32]}.{ext}"
+    if filename is not None and (upload_dir / filename).exists():
+        return filename
+    tmp_path = upload_dir / f".upload-{secrets.token_hex(8)}.tmp"
+    # os.open (not tempfile) so the file mode follows the process umask,
+    # keeping uploads group-writable in the IPTS shared folder.
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        # Unbuffered: chunks are already large, so write them straight through
+        with os.fdopen(fd, "wb", buffering=0) as tmp:
+            if size and hasattr(os, "posix_fallocate"):
+                try:
+                    os.posix_fallocate(fd, 0, size)
+                except OSError:
+                    pass  # Not supported by every filesystem
+            if src_fd is not None:
+                written = _copy_fd_range(src_fd, fd, offset, size)
+            else:
+                hasher = _upload_hasher() if filename is None else None
+                written = 0
+                while chunk := stream.read(UPLOAD_CHUNK_SIZE):
+                    if hasher is not None:
+                        hasher.update(chunk)
+                    tmp.write(chunk)
+                    written += len(chunk)
+                if hasher is not None:
+                    filename = f"{prefix}{hasher.hexdigest()[:32]}.{ext}"
+            if size and written != size:
+                tmp.truncate(written)  # Drop any unused preallocation
+        dest = upload_dir / filename
+        if os.path.exists(dest):
+            os.unlink(tmp_path)
+        else:
+            os.replace(tmp_path, dest)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return filename
+
+
+class _Base64Reader:
+    """File-like reader that base64-decodes *stream* on the fly.
+
+    Any ``data:<mime>;base64,`` prefix is skipped. Encoded input is read in
+    ``UPLOAD_CHUNK_SIZE`` pieces and decoded in whole 4-character quanta,
+    carrying any remainder over to the next read, so only one chunk of the
+    image is ever held in memory. Raises ``binascii.Error`` on bad input.
+    """
+
+    _WHITESPACE = b" \t\r\n"
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._pending = b""
+        head = stream.read(64)
+        if head.startswith(b"data:"):
+            while (comma := head.find(b",")) < 0:
+                more = stream.read(64)
+                if not more or len(head) > 1024:
+                    raise binascii.Error("Malformed data URL header")
+                head += more
+            head = head[comma + 1 :]
+        self._pending = head.translate(None, self._WHITESPACE)
+
+    def read(self, size=-1):
+        while True:
+            chunk = self._stream.read(UPLOAD_CHUNK_SIZE)
+            data = self._pending + chunk.translate(None, self._WHITESPACE)
+            if not chunk:
+                self._pending = b""
+                return base64.b64decode(data, validate=True) if data else b""
+            cut = len(data) - len(data) % 4
+            self._pending = data[cut:]
+            if cut:
+                return base64.b64decode(data[:cut], validate=True)
+
+
 @bp.route("/create/image", methods=["POST"])
 def create_image():
     """Create a new image entry from an uploaded file."""
@@ -254,41 +590,70 @@ def create_image():
         flash("No image file selected.", "error")
         return redirect(url_for("entries.index", tab="image"))
 
-    if not allowed_file(file.filename):
+    ext = allowed_extension(file.filename)
+    if ext is None:
         flash("Invalid file type. Allowed: PNG, JPG, JPEG, GIF, WebP, SVG.", "error")
         return redirect(url_for("entries.index", tab="image"))
 
-    # Generate unique filename to avoid collisions
-    original_name = secure_filename(file.filename)
-    ext = original_name.rsplit(".", 1)[1].lower() if "." in original_name else "png"
-    unique_name = f"{uuid.uuid4().hex}.{ext}"
-
-    # Save the file
-    upload_folder = current_app.config["UPLOAD_FOLDER"]
-    file_path = os.path.join(upload_folder, unique_name)
-    file.save(file_path)
-
-    # Store filename in body, caption as title
-    entry = Entry(
-        type=Entry.TYPE_IMAGE,
-        title=caption,
-        body=unique_name,  # Store just the filename
-    )
+    # Check the content is really that kind of image before touching disk.
+    # Werkzeug spools uploads to a seekable file, so the size is known too.
+    if not image_matches_extension(file.stream.read(IMAGE_SNIFF_BYTES), ext):
+        flash("File content does not match its image type.", "error")
+        return redirect(url_for("entries.index", tab="image"))
+    size = file.stream.seek(0, os.SEEK_END)
+    file.stream.seek(0)
+    unique_name = _save_upload(file.stream, ext, size=size)
 
-    db.session.add(entry)
-    _attach_tags(entry, _parse_form_tags())
-    _safe_commit()
+    # Store filename in body (just the filename), caption as title
+    _insert_entry(Entry.TYPE_IMAGE, caption, unique_name, _parse_form_tags())
 
     return redirect(url_for("entries.index"))
 
 
+# One year – upload names are content hashes, so a name never changes meaning
+UPLOAD_CACHE_MAX_AGE = 365 * 24 * 3600
+
+
 @bp.route("/uploads/<filename>")
 def uploaded_file(filename):
-    """Serve uploaded images."""
+    """Serve uploaded images.
+
+    Upload names are content hashes, so browsers may cache them
+    indefinitely without revalidating. Behind a proxy the file body is
+    handed off via ``X-Sendfile`` (``USE_X_SENDFILE``) or nginx's
+    ``X-Accel-Redirect`` (``UPLOAD_ACCEL_REDIRECT``). Otherwise
+    ``send_from_directory`` returns a ``direct_passthrough`` response around
+    the server's ``wsgi.file_wrapper``, so the WSGI server can ``sendfile``
+    it and conditional requests are answered with 304.
+    """
     filename = secure_filename(filename)
     if not filename:
         abort(400)
-    return send_from_directory(current_app.config["UPLOAD_FOLDER"], filename)
+    accel_prefix = current_app.config.get("UPLOAD_ACCEL_REDIRECT")
+    if accel_prefix:
+        # nginx sends the file itself (and answers conditional requests)
+        if not (_upload_dir() / filename).is_file():
+            abort(404)
+        response = current_app.response_class(
+            mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        )
+        response.headers["X-Accel-Redirect"] = accel_prefix.rstrip("/") + "/" + filename
+        response.cache_control.max_age = UPLOAD_CACHE_MAX_AGE
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+    response = send_from_directory(
+        _upload_dir(),
+        filename,
+        conditional=True,
+        # The name is the content hash, so it is a strong ETag that (unlike
+        # Werkzeug's mtime-based default) survives the file being copied
+        etag=os.path.splitext(filename)[0],
+        max_age=UPLOAD_CACHE_MAX_AGE,
+    )
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
 
 
 # =============================================================================
@@ -495,6 +860,7 @@ def api_save_script():
 
 
 @bp.route("/api/pick-image", methods=["POST"])
+@_idempotent
 def api_pick_image():
     """Copy a server-side image into the uploads folder and create an entry.
 
@@ -521,30 +887,25 @@ def api_pick_image():
         return jsonify(error="File not found"), 404
 
     filename = os.path.basename(src)
-    if not allowed_file(filename):
+    ext = allowed_extension(filename)
+    if ext is None:
         return jsonify(error="Invalid file type"), 400
 
     # Check file size (16 MB limit)
-    if os.path.getsize(src) > current_app.config.get("MAX_CONTENT_LENGTH", 16 * 1024 * 1024):
+    size = os.path.getsize(src)
+    if size > current_app.config.get("MAX_CONTENT_LENGTH", 16 * 1024 * 1024):
         return jsonify(error="File too large (max 16 MB)"), 400
 
-    # Copy to uploads with unique name
-    ext = filename.rsplit(".", 1)[1].lower()
-    unique_name = f"{uuid.uuid4().hex}.{ext}"
-    dest = os.path.join(current_app.config["UPLOAD_FOLDER"], unique_name)
-    shutil.copy2(src, dest)
+    # Copy to uploads under a content-hash name
+    with open(src, "rb") as f:
+        if not image_matches_extension(f.read(IMAGE_SNIFF_BYTES), ext):
+            return jsonify(error="File content does not match its image type"), 415
+        f.seek(0)
+        unique_name = _save_upload(f, ext, size=size)
 
-    # Create the entry
-    entry = Entry(
-        type=Entry.TYPE_IMAGE,
-        title=caption,
-        body=unique_name,
-    )
-    db.session.add(entry)
-    _attach_tags(entry, _parse_json_tags(data))
-    _safe_commit()
+    entry_id = _insert_entry(Entry.TYPE_IMAGE, caption, unique_name, _parse_json_tags(data))
 
-    return jsonify(ok=True, entry_id=entry.id)
+    return jsonify(ok=True, entry_id=entry_id)
 
 
 # =============================================================================
@@ -563,10 +924,23 @@ def api_reset_timeline():
     if not current_app.debug:
         abort(404)
     try:
-        # Delete all entries
-        num_deleted = Entry.query.delete()
+        # Bulk-delete all entries (and their tag links, which SQLite does
+        # not cascade) without loading them into the session
+        db.session.execute(delete(entry_tags))
+        num_deleted = db.session.execute(
+            delete(Entry).execution_options(synchronize_session=False)
+        ).rowcount
         _safe_commit()
 
+        # Return the freed pages to the filesystem. VACUUM cannot run inside
+        # a transaction and needs the database to itself, so skip it if
+        # another session is busy.
+        try:
+            with db.engine.connect() as conn:
+                conn.execution_options(isolation_level="AUTOCOMMIT").exec_driver_sql("VACUUM")
+        except OperationalError as e:
+            logger.info("Skipping VACUUM after timeline reset: %s", e)
+
         return jsonify(
             {
                 "success": True,
@@ -584,43 +958,33 @@ def upload_snapshot():
     """
     API: Upload a plot snapshot PNG from Plotly.toImage().
 
-    Expects JSON body with:
-        - image_data: base64-encoded PNG data (data:image/png;base64,...)
+    Expects the PNG data URL (data:image/png;base64,...) as the raw request
+    body, which is decoded to disk in chunks. A JSON body with an
+    ``image_data`` key is still accepted.
 
     Returns:
         - filename: the saved filename to include in data entry
     """
-    import base64
-
-    data = request.get_json()
-    if not data or "image_data" not in data:
-        return jsonify({"error": "image_data required"}), 400
-
-    image_data = data["image_data"]
-
-    # Parse data URL: data:image/png;base64,iVBORw0KGgo...
-    if "," in image_data:
-        header, encoded = image_data.split(",", 1)
+    if request.is_json:
+        # Older clients post {"image_data": "data:image/png;base64,..."}
+        data = request.get_json()
+        if not data or "image_data" not in data:
+            return jsonify({"error": "image_data required"}), 400
+        stream = BytesIO(data["image_data"].encode("ascii", "replace"))
     else:
-        encoded = image_data
+        # Raw data URL body: decode straight from the request stream
+        stream = request.stream
 
     try:
-        image_bytes = base64.b64decode(encoded)
-    except Exception as e:
+        filename = _save_upload(_Base64Reader(stream), "png", prefix="snapshot_")
+    except (binascii.Error, ValueError) as e:
         return jsonify({"error": f"Invalid base64 data: {e}"}), 400
 
-    # Generate unique filename
-    filename = f"snapshot_{uuid.uuid4().hex}.png"
-    upload_folder = current_app.config["UPLOAD_FOLDER"]
-    file_path = os.path.join(upload_folder, filename)
-
-    with open(file_path, "wb") as f:
-        f.write(image_bytes)
-
     return jsonify({"success": True, "filename": filename})
 
 
 @bp.route("/api/save-plot-to-timeline", methods=["POST"])
+@_idempotent
 def save_plot_to_timeline():
     """
     API: Save a Plotly plot snapshot as an image entry on the timeline.
@@ -633,52 +997,46 @@ def save_plot_to_timeline():
         - success: True/False
         - entry_id: the new entry ID
     """
-    import base64
-
     data = request.get_json()
     if not data or "image_data" not in data:
         return jsonify({"error": "image_data required"}), 400
 
     title = data.get("title", "").strip() or "Workspace Plot"
 
-    image_data = data["image_data"]
-
-    # Parse data URL
-    if "," in image_data:
-        _header, encoded = image_data.split(",", 1)
-    else:
-        encoded = image_data
-
+    # Decode the data URL to disk in chunks; only its short header is
+    # searched for the comma, and the payload is never split or copied whole.
+    stream = BytesIO(data["image_data"].encode("ascii", "replace"))
     try:
-        image_bytes = base64.b64decode(encoded)
-    except Exception as e:
+        filename = _save_upload(_Base64Reader(stream), "png", prefix="wsplot_")
+    except (binascii.Error, ValueError) as e:
         return jsonify({"error": f"Invalid base64 data: {e}"}), 400
 
-    # Save image file
-    filename = f"wsplot_{uuid.uuid4().hex}.png"
-    upload_folder = current_app.config["UPLOAD_FOLDER"]
-    file_path = os.path.join(upload_folder, filename)
-    with open(file_path, "wb") as f:
-        f.write(image_bytes)
-
     # Create image entry
-    entry = Entry(
-        type=Entry.TYPE_IMAGE,
-        title=title,
-        body=filename,
-    )
-    db.session.add(entry)
-    _safe_commit()
+    created_at = datetime.now(timezone.utc)
+    entry_id = _insert_entry(Entry.TYPE_IMAGE, title, filename, created_at=created_at)
 
     return jsonify({
         "success": True,
-        "entry_id": entry.id,
+        "entry_id": entry_id,
         "filename": filename,
         "title": title,
-        "timestamp": entry.created_at.isoformat() if entry.created_at else None,
+        # Naive, as the value reads back from SQLite
+        "timestamp": created_at.replace(tzinfo=None).isoformat(),
     })
 
 
+@bp.errorhandler(KernelBusyError)
+def kernel_busy(e):
+    """Kernel queries give up quickly while a cell runs; tell the client so."""
+    return jsonify(
+        {
+            "success": False,
+            "busy": True,
+            "error": "Kernel is busy running a cell; try again when it finishes",
+        }
+    ), 409
+
+
 @bp.route("/api/execute", methods=["POST"])
 def execute_code():
     """
@@ -708,11 +1066,16 @@ def execute_code():
 
     # Execute in persistent kernel
     kernel = get_kernel_manager()
-    result = kernel.execute(code)
+    result = kernel.execute(code, timeout=current_app.config.get("KERNEL_EXEC_TIMEOUT"))
 
     if result.success:
         return jsonify(
-            {"success": True, "output": result.output, "execution_time": result.execution_time}
+            {
+                "success": True,
+                "output": result.output,
+                "execution_time": result.execution_time,
+                "truncated": result.truncated,
+            }
         )
     else:
         return jsonify(
@@ -720,24 +1083,28 @@ def execute_code():
                 "success": False,
                 "error": result.error or result.output,
                 "execution_time": result.execution_time,
+                "truncated": result.truncated,
             }
         )
 
 
 @bp.route("/api/kernel/status")
 def kernel_status():
-    """API: Get kernel status and memory info."""
+    """API: Get kernel status, memory info, variables and workspaces."""
     kernel = get_kernel_manager()
     status = kernel.get_status()
-    memory = kernel.get_memory_info()
-    variables = kernel.get_variables()
+    snapshot = kernel.get_dashboard_snapshot()
+    variables = snapshot["variables"]
+    workspaces = snapshot["workspaces"]
 
     return jsonify(
         {
             "status": status.to_dict(),
-            "memory": memory.to_dict(),
+            "memory": snapshot["memory"].to_dict(),
             "variables": variables,
             "variable_count": len(variables),
+            "workspaces": [ws.to_dict() for ws in workspaces],
+            "workspace_count": len(workspaces),
         }
     )
 
@@ -805,14 +1172,18 @@ def kernel_rename_workspace(name):
     return jsonify(result)
 
 
+def _kernel_json(payload):
+    """Send a raw kernel reply (JSON bytes) to the client as-is."""
+    if payload is None:
+        return jsonify({"success": False, "error": "No response from kernel"}), 500
+    return current_app.response_class(payload, mimetype="application/json")
+
+
 @bp.route("/api/kernel/workspaces/<name>/history")
 def kernel_workspace_history(name):
     """API: Get algorithm history for a workspace."""
     kernel = get_kernel_manager()
-    result = kernel.workspace_history(name)
-    if result is None:
-        return jsonify({"success": False, "error": "No response from kernel"}), 500
-    return jsonify(result)
+    return _kernel_json(kernel.workspace_history(name, raw=True))
 
 
 @bp.route("/api/kernel/workspaces/<name>/plot-spectrum")
@@ -829,20 +1200,14 @@ def kernel_plot_spectrum(name):
         return jsonify({"success": False, "error": "Invalid spectra parameter"}), 400
 
     kernel = get_kernel_manager()
-    result = kernel.plot_spectrum(name, spectra)
-    if result is None:
-        return jsonify({"success": False, "error": "No response from kernel"}), 500
-    return jsonify(result)
+    return _kernel_json(kernel.plot_spectrum(name, spectra, raw=True))
 
 
 @bp.route("/api/kernel/workspaces/<name>/plot-colorfill")
 def kernel_plot_colorfill(name):
     """API: Extract 2D data for colorfill plot."""
     kernel = get_kernel_manager()
-    result = kernel.plot_colorfill(name)
-    if result is None:
-        return jsonify({"success": False, "error": "No response from kernel"}), 500
-    return jsonify(result)
+    return _kernel_json(kernel.plot_colorfill(name, raw=True))
 
 
 @bp.route("/api/kernel/workspaces/<name>/data")
@@ -861,33 +1226,26 @@ def kernel_show_data(name):
     num_bins = request.args.get("num_bins", 50, type=int)
 
     kernel = get_kernel_manager()
-    result = kernel.show_data(
-        name, start_spec=start, num_spec=count,
-        start_bin=start_bin, num_bins=num_bins,
+    return _kernel_json(
+        kernel.show_data(
+            name, start_spec=start, num_spec=count,
+            start_bin=start_bin, num_bins=num_bins, raw=True,
+        )
     )
-    if result is None:
-        return jsonify({"success": False, "error": "No response from kernel"}), 500
-    return jsonify(result)
 
 
 @bp.route("/api/kernel/workspaces/<name>/logs")
 def kernel_show_logs(name):
     """API: Get sample logs from a workspace."""
     kernel = get_kernel_manager()
-    result = kernel.show_logs(name)
-    if result is None:
-        return jsonify({"success": False, "error": "No response from kernel"}), 500
-    return jsonify(result)
+    return _kernel_json(kernel.show_logs(name, raw=True))
 
 
 @bp.route("/api/kernel/workspaces/<name>/logs/<log_name>/series")
 def kernel_log_series(name, log_name):
     """API: Get time-series data for a specific sample log."""
     kernel = get_kernel_manager()
-    result = kernel.log_series(name, log_name)
-    if result is None:
-        return jsonify({"success": False, "error": "No response from kernel"}), 500
-    return jsonify(result)
+    return _kernel_json(kernel.log_series(name, log_name, raw=True))
 
 
 @bp.route("/api/kernel/workspaces/<name>/save", methods=["POST"])
@@ -896,7 +1254,7 @@ def kernel_save_workspace(name):
     data = request.get_json() or {}
     filename = data.get("filename", "").strip()
 
-    config = NotebookConfig.get_config()
+    config = NotebookConfig.get_cached()
     if not config.ipts:
         return jsonify({"success": False, "error": "No IPTS configured"}), 400
 
@@ -919,6 +1277,7 @@ def kernel_save_workspace(name):
 
 
 @bp.route("/api/create/code", methods=["POST"])
+@_idempotent
 def api_create_code():
     """
     API: Create a code entry in the timeline.
@@ -933,7 +1292,7 @@ def api_create_code():
         - entry_id: ID of created entry
     """
     data = request.get_json()
-    if not data or "code" not in data:
+    if not data or not str(data.get("code") or "").strip():
         return jsonify({"error": "code required"}), 400
 
     code = data["code"]
@@ -941,17 +1300,55 @@ def api_create_code():
     is_error = data.get("error", False)
 
     # Store code and output as JSON in body
-    body = json.dumps({"code": code, "output": output, "error": is_error})
+    body = jsonutil.dumps({"code": code, "output": output, "error": is_error})
+
+    entry_id = _insert_entry(Entry.TYPE_CODE, None, body, _parse_json_tags(data))
+
+    return jsonify({"success": True, "entry_id": entry_id})
 
-    entry = Entry(type=Entry.TYPE_CODE, title=None, body=body)
-    db.session.add(entry)
-    _attach_tags(entry, _parse_json_tags(data))
-    _safe_commit()
 
-    return jsonify({"success": True, "entry_id": entry.id})
+# Entry types a batch may create (image bodies must name a stored upload)
+BATCH_ENTRY_TYPES = frozenset(Entry.TYPES) - {Entry.TYPE_IMAGE}
+
+
+@bp.route("/api/create/batch", methods=["POST"])
+@_idempotent
+def api_create_batch():
+    """
+    API: Create several entries in one transaction.
+
+    Expects JSON body with:
+        - entries: list of {type, body, title?, tags?}; a non-string body
+          (e.g. header or pvlog data) is stored as JSON
+
+    Returns:
+        - success: True/False
+        - entry_ids: IDs of the created entries, in request order
+    """
+    data = request.get_json(silent=True)
+    items = data.get("entries") if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "entries required"}), 400
+
+    rows = []
+    for i, item in enumerate(items):
+        if not isinstance(item, dict) or item.get("type") not in BATCH_ENTRY_TYPES:
+            return jsonify({"error": f"entries[{i}]: invalid type"}), 400
+        body = item.get("body")
+        if not isinstance(body, str):
+            body = jsonutil.dumps(body) if body is not None else ""
+        if not body.strip():
+            return jsonify({"error": f"entries[{i}]: body required"}), 400
+        title = str(item.get("title") or "").strip() or None
+        rows.append(({"type": item["type"], "title": title, "body": body}, _parse_json_tags(item)))
+
+    entry_ids = _insert_entries(rows)
+
+    return jsonify({"success": True, "entry_ids": entry_ids})
 
 
 @bp.route("/api/create/data", methods=["POST"])
+@_idempotent
 def api_create_data():
     """
     API: Create a new data entry from the plot viewer.
@@ -996,7 +1393,7 @@ def api_create_data():
         return jsonify({"error": "run_number(s) required"}), 400
 
     # Get run metadata for default title
-    config = NotebookConfig.get_config()
+    config = NotebookConfig.get_cached()
     if not config.is_configured:
         return jsonify({"error": "Notebook IPTS not configured"}), 400
 
@@ -1032,21 +1429,15 @@ def api_create_data():
                 title += f"... ({len(run_numbers)} total)"
 
     # Create the entry
-    entry = Entry(
-        type=Entry.TYPE_DATA,
-        title=title,
-        body=json.dumps(entry_body),
+    entry_id = _insert_entry(
+        Entry.TYPE_DATA, title, jsonutil.dumps(entry_body), _parse_json_tags(data)
     )
 
-    db.session.add(entry)
-    _attach_tags(entry, _parse_json_tags(data))
-    _safe_commit()
-
     run_desc = str(run_numbers[0]) if len(run_numbers) == 1 else f"{len(run_numbers)} runs"
     return jsonify(
         {
             "success": True,
-            "entry_id": entry.id,
+            "entry_id": entry_id,
             "message": f"Data entry created for {run_desc}",
         }
     )
@@ -1055,21 +1446,21 @@ def api_create_data():
 @bp.route("/<int:entry_id>")
 def detail(entry_id):
     """View a single entry (for future use)."""
-    entry = Entry.query.get_or_404(entry_id)
+    entry = db.get_or_404(Entry, entry_id)
     return render_template("entries/detail.html", entry=entry)
 
 
 @bp.route("/<int:entry_id>/edit", methods=["GET", "POST"])
 def edit(entry_id):
     """Edit an existing entry."""
-    entry = Entry.query.get_or_404(entry_id)
+    entry = db.get_or_404(Entry, entry_id)
 
     # Don't allow editing of run header entries (they're generated from data).
     # Section headers ARE editable (header_kind == "section" in body JSON).
     if entry.type == Entry.TYPE_HEADER:
         try:
-            body_data = json.loads(entry.body) if entry.body else {}
-        except (json.JSONDecodeError, TypeError):
+            body_data = jsonutil.loads(entry.body) if entry.body else {}
+        except (jsonutil.JSONDecodeError, TypeError):
             body_data = {}
         if body_data.get("header_kind") != "section":
             return redirect(url_for("entries.index"))
@@ -1095,6 +1486,28 @@ def edit(entry_id):
 # =============================================================================
 
 
+def _fingerprint(*parts):
+    """Short stable hash of *parts*, used as an ETag value."""
+    return hashlib.blake2b("\n".join(map(str, parts)).encode(), digest_size=8).hexdigest()
+
+
+def _etag_json(etag, build_payload):
+    """Return ``304 Not Modified`` if the client already has *etag*.
+
+    Otherwise call *build_payload* and return it as JSON tagged with *etag*,
+    so polling clients skip both serialisation and transfer when nothing
+    on disk has changed.
+    """
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = jsonify(build_payload())
+    response.set_etag(etag)
+    # Let the browser keep the body but revalidate on every poll
+    response.cache_control.no_cache = True
+    return response
+
+
 @bp.route("/api/states")
 def api_get_states():
     """
@@ -1102,19 +1515,19 @@ def api_get_states():
 
     Returns JSON: {"states": ["abc123...", "def456..."], "ipts": "IPTS-12345"}
     """
-    config = NotebookConfig.get_config()
+    config = NotebookConfig.get_cached()
 
     if not config.is_configured:
         return jsonify({"error": "Notebook IPTS not configured", "states": []}), 400
 
-    state_ids = discover_state_ids(config.ipts)
-
-    return jsonify(
-        {
+    state_ids = list(get_state_ids(config.ipts))
+    return _etag_json(
+        _fingerprint(config.ipts, *state_ids),
+        lambda: {
             "ipts": config.ipts,
             "states": state_ids,
             "count": len(state_ids),
-        }
+        },
     )
 
 
@@ -1123,40 +1536,47 @@ def api_get_runs(state_id):
     """
     API: Get reduced runs for a specific state ID.
 
-    Returns JSON with run list, supports optional filtering.
+    Returns JSON with run list, supports optional filtering and paging.
     Query params:
-        - search: filter runs containing this substring
+        - search: run numbers starting with these digits (or, failing that,
+          containing them)
         - limit: max number of results (default: all)
+        - offset: number of matching runs to skip (default: 0)
+
+    ``count`` is the number of runs returned, ``total`` the number matching.
     """
-    config = NotebookConfig.get_config()
+    config = NotebookConfig.get_cached()
 
     if not config.is_configured:
         return jsonify({"error": "Notebook IPTS not configured", "runs": []}), 400
 
-    # Get all reduced runs for this state
-    runs = discover_reduced_runs(config.ipts, state_id, lite=True, latest_only=True)
+    # Get all reduced runs for this state (cached for a short TTL)
+    index = get_run_index(config.ipts, state_id)
 
-    # Optional filtering
+    # Optional filtering: bisection on the index's sorted run strings
+    # (non-numeric searches are ignored for now)
     search = request.args.get("search", "").strip()
-    if search:
-        try:
-            search_num = int(search)
-            runs = [r for r in runs if search in str(r.run_number)]
-        except ValueError:
-            pass  # Non-numeric search, ignore for now
+    runs = index.search(search) if search.isdigit() else index.runs
+    total = len(runs)
 
-    # Optional limit
+    # Optional paging, sliced straight from the cached sequence
+    offset = max(request.args.get("offset", 0, type=int), 0)
     limit = request.args.get("limit", type=int)
     if limit and limit > 0:
-        runs = runs[:limit]
+        runs = runs[offset : offset + limit]
+    elif offset:
+        runs = runs[offset:]
 
-    return jsonify(
-        {
+    return _etag_json(
+        _fingerprint(config.ipts, state_id, index.etag, search, limit, offset),
+        lambda: {
             "state_id": state_id,
             "ipts": config.ipts,
             "runs": [r.to_dict() for r in runs],
             "count": len(runs),
-        }
+            "total": total,
+            "offset": offset,
+        },
     )
 
 
@@ -1167,7 +1587,7 @@ def api_get_run_info(run_number):
 
     Looks up the run in all states to find reduction info.
     """
-    config = NotebookConfig.get_config()
+    config = NotebookConfig.get_cached()
 
     if not config.is_configured:
         return jsonify({"error": "Notebook IPTS not configured"}), 400
@@ -1177,13 +1597,25 @@ def api_get_run_info(run_number):
     if not state_id:
         return jsonify({"error": "state_id parameter required"}), 400
 
-    runs = discover_reduced_runs(config.ipts, state_id, lite=True, latest_only=True)
-    matching = [r for r in runs if r.run_number == run_number]
+    index = get_run_index(config.ipts, state_id)
+    run = index.get(run_number)
 
-    if not matching:
+    if run is None:
         return jsonify({"error": f"Run {run_number} not found in state {state_id}"}), 404
 
-    return jsonify(matching[0].to_dict())
+    return _etag_json(_fingerprint(config.ipts, state_id, index.etag), run.to_dict)
+
+
+@bp.route("/api/runs/refresh", methods=["POST"])
+def api_refresh_runs():
+    """
+    API: Drop cached run lists so the next request rescans the filesystem.
+
+    Call after new reductions have been written.
+    """
+    clear_run_index_cache()
+    clear_nexus_lookup_cache()
+    return jsonify({"success": True})
 
 
 @bp.route("/api/runs/<int:run_number>/metadata")
@@ -1198,7 +1630,7 @@ def api_get_run_metadata(run_number):
     Query params:
         - state_id: (optional) The state ID (not used, metadata from native file)
     """
-    config = NotebookConfig.get_config()
+    config = NotebookConfig.get_cached()
 
     if not config.is_configured:
         return jsonify({"error": "Notebook IPTS not configured"}), 400
@@ -1224,7 +1656,7 @@ def api_get_run_metadata_batch():
     Accepts JSON body with 'run_numbers' array.
     Returns metadata for all requested runs.
     """
-    config = NotebookConfig.get_config()
+    config = NotebookConfig.get_cached()
 
     if not config.is_configured:
         return jsonify({"error": "Notebook IPTS not configured"}), 400
@@ -1237,20 +1669,22 @@ def api_get_run_metadata_batch():
     if not isinstance(run_numbers, list):
         return jsonify({"error": "run_numbers must be an array"}), 400
 
-    results = {}
+    valid_runs = []
     for run_number in run_numbers[:50]:  # Limit to 50 runs per batch
         try:
-            run_num = int(run_number)
-            metadata = get_run_metadata_quick(config.ipts, run_num)
-            results[str(run_num)] = {
-                "run_number": run_num,
-                "title": metadata.get("title", ""),
-                "duration": metadata.get("duration", 0.0),
-                "start_time": metadata.get("start_time", ""),
-            }
+            valid_runs.append(int(run_number))
         except (ValueError, TypeError):
             continue
 
+    results = {}
+    for run_num, metadata in get_run_metadata_quick_many(config.ipts, valid_runs).items():
+        results[str(run_num)] = {
+            "run_number": run_num,
+            "title": metadata.get("title", ""),
+            "duration": metadata.get("duration", 0.0),
+            "start_time": metadata.get("start_time", ""),
+        }
+
     return jsonify({"metadata": results})
 
 
@@ -1270,9 +1704,7 @@ def api_get_plot_data(run_number):
             - "dsp_column": Per-column data
             - Or a numeric index (0, 1, 2...)
     """
-    from ..services.data import load_reduced_data_for_plot
-
-    config = NotebookConfig.get_config()
+    config = NotebookConfig.get_cached()
 
     if not config.is_configured:
         return jsonify({"error": "Notebook IPTS not configured"}), 400
@@ -1284,13 +1716,12 @@ def api_get_plot_data(run_number):
     workspace_param = request.args.get("workspace", "all").strip()
 
     # Find the reduced file for this run
-    runs = discover_reduced_runs(config.ipts, state_id, lite=True, latest_only=True)
-    matching = [r for r in runs if r.run_number == run_number]
+    run = get_run_index(config.ipts, state_id).get(run_number)
 
-    if not matching:
+    if run is None:
         return jsonify({"error": f"Run {run_number} not found in state {state_id}"}), 404
 
-    reduced_file = matching[0].reduced_file
+    reduced_file = run.reduced_file
 
     # Determine workspace selection
     workspace_index = None
@@ -1351,9 +1782,7 @@ def api_get_multi_plot_data():
         - state_id: (required) The state ID for the reduction
         - workspace: Which workspace to return (default: dsp_all)
     """
-    from ..services.data import load_reduced_data_for_plot
-
-    config = NotebookConfig.get_config()
+    config = NotebookConfig.get_cached()
 
     if not config.is_configured:
         return jsonify({"error": "Notebook IPTS not configured"}), 400
@@ -1369,16 +1798,7 @@ def api_get_multi_plot_data():
     workspace_param = request.args.get("workspace", "dsp_all").strip()
 
     # Find the reduced files for these runs
-    runs = discover_reduced_runs(config.ipts, state_id, lite=True, latest_only=True)
-    run_map = {r.run_number: r for r in runs}
-
-    # Collect plot data for each run
-    multi_data = {
-        "type": "multi",
-        "runs": [],
-        "state_id": state_id,
-        "workspace": workspace_param,
-    }
+    run_map = get_run_index(config.ipts, state_id).by_number
 
     # Determine workspace selection
     workspace_index = None
@@ -1388,15 +1808,12 @@ def api_get_multi_plot_data():
         except ValueError:
             workspace_index = workspace_param
 
-    for run_number in run_numbers:
+    def load_run(run_number):
         if run_number not in run_map:
-            multi_data["runs"].append(
-                {
-                    "run_number": run_number,
-                    "error": f"Run {run_number} not found in state {state_id}",
-                }
-            )
-            continue
+            return {
+                "run_number": run_number,
+                "error": f"Run {run_number} not found in state {state_id}",
+            }
 
         reduced_file = run_map[run_number].reduced_file
 
@@ -1407,17 +1824,28 @@ def api_get_multi_plot_data():
             )
             plot_data["run_number"] = run_number
             plot_data["reduced_file"] = str(reduced_file)
-            multi_data["runs"].append(plot_data)
+            return plot_data
 
         except Exception as e:
-            multi_data["runs"].append(
-                {
-                    "run_number": run_number,
-                    "error": str(e),
-                }
-            )
+            return {
+                "run_number": run_number,
+                "error": str(e),
+            }
 
-    return jsonify(multi_data)
+    def generate():
+        # Same document as before, written one run at a time so only the
+        # run being encoded is held in memory and the first bytes go out
+        # as soon as the first run is loaded.
+        dumps = current_app.json.dumps
+        header = dumps({"type": "multi", "state_id": state_id, "workspace": workspace_param})
+        yield header[:-1] + ', "runs": ['
+        for i, run_number in enumerate(run_numbers):
+            yield ("," if i else "") + dumps(load_run(run_number))
+        yield "]}\n"
+
+    return current_app.response_class(
+        stream_with_context(generate()), mimetype="application/json"
+    )
 
 
 # ---------- PV Log API endpoints ----------
@@ -1437,8 +1865,6 @@ def pvlog_search():
         return jsonify({"error": "No search pattern provided", "results": []})
 
     # Check if it's an alias first
-    from neutronote.services.pvlog import PVLogService
-
     if PVLogService.is_alias(pattern):
         aliases = PVLogService.list_aliases()
         alias_info = aliases[pattern.lower()]
@@ -1471,8 +1897,6 @@ def pvlog_query():
     if not pv_names:
         return jsonify({"error": "No PV names provided"})
 
-    from datetime import datetime
-
     try:
         start = datetime.fromisoformat(start_str) if start_str else None
         end = datetime.fromisoformat(end_str) if end_str else None
@@ -1481,7 +1905,7 @@ def pvlog_query():
 
     if not start or not end:
         # Fall back to notebook config dates
-        config = NotebookConfig.get_config()
+        config = NotebookConfig.get_cached()
         if config.has_dates:
             start = start or config.experiment_start
             end = end or config.experiment_end
@@ -1490,8 +1914,6 @@ def pvlog_query():
 
     max_points = request.args.get("max_points", 5000, type=int)
 
-    from neutronote.services.pvlog import PVLogService
-
     try:
         svc = PVLogService()
         traces = []
@@ -1512,8 +1934,6 @@ def pvlog_query():
 @bp.route("/api/pvlog/aliases", methods=["GET"])
 def pvlog_aliases():
     """Return the PV alias registry."""
-    from neutronote.services.pvlog import PVLogService
-
     return jsonify(PVLogService.list_aliases())
 
 
@@ -1545,24 +1965,20 @@ def pvlog_resolve():
     end_str = request.args.get("end", "")
     max_points = request.args.get("max_points", 5000, type=int)
 
-    from datetime import datetime as _dt
-
     try:
-        start = _dt.fromisoformat(start_str) if start_str else None
-        end = _dt.fromisoformat(end_str) if end_str else None
+        start = datetime.fromisoformat(start_str) if start_str else None
+        end = datetime.fromisoformat(end_str) if end_str else None
     except ValueError as e:
         return jsonify({"error": f"Invalid date format: {e}"})
 
     if not start or not end:
-        config = NotebookConfig.get_config()
+        config = NotebookConfig.get_cached()
         if config.has_dates:
             start = start or config.experiment_start
             end = end or config.experiment_end
         else:
             return jsonify({"error": "No time range and no experiment dates configured"})
 
-    from neutronote.services.pvlog import PVLogService
-
     try:
         svc = PVLogService()
 
@@ -1596,6 +2012,7 @@ def pvlog_resolve():
 
 
 @bp.route("/api/create/pvlog", methods=["POST"])
+@_idempotent
 def create_pvlog():
     """Save a PV Log entry to the timeline.
 
@@ -1609,16 +2026,11 @@ def create_pvlog():
     plot_data = data.get("data", {})
 
     # Store the full plot data as JSON in the entry body
-    entry = Entry(
-        type=Entry.TYPE_PVLOG,
-        title=title,
-        body=json.dumps(plot_data),
+    entry_id = _insert_entry(
+        Entry.TYPE_PVLOG, title, jsonutil.dumps(plot_data), _parse_json_tags(data)
     )
-    db.session.add(entry)
-    _attach_tags(entry, _parse_json_tags(data))
-    _safe_commit()
 
-    return jsonify({"success": True, "entry_id": entry.id})
+    return jsonify({"success": True, "entry_id": entry_id})
 
 
 # =========================================================================
@@ -1633,14 +2045,20 @@ def list_tags():
     Optional query param ``q`` filters by prefix (case-insensitive).
     """
     q = request.args.get("q", "").strip().lower()
-    query = Tag.query
+    # Counts come from one grouped query rather than a COUNT per tag
+    stmt = (
+        select(Tag.id, Tag.name, db.func.count(entry_tags.c.entry_id))
+        .outerjoin(entry_tags, entry_tags.c.tag_id == Tag.id)
+        .group_by(Tag.id)
+        .order_by(Tag.name)
+    )
     if q:
-        query = query.filter(Tag.name.ilike(f"{q}%"))
-    tags = query.order_by(Tag.name).all()
+        stmt = stmt.where(Tag.name.ilike(f"{q}%"))
 
-    result = []
-    for tag in tags:
-        result.append({"id": tag.id, "name": tag.name, "count": tag.entries.count()})
+    result = [
+        {"id": tag_id, "name": name, "count": count}
+        for tag_id, name, count in db.session.execute(stmt)
+    ]
     return jsonify(result)
 
 
@@ -1661,13 +2079,13 @@ def add_tag_to_entry(entry_id):
     name = data["name"].strip()
 
     # Find or create the tag (case-insensitive match)
-    tag = Tag.query.filter(Tag.name.ilike(name)).first()
+    tag = db.session.scalar(select(Tag).where(Tag.name.ilike(name)).limit(1))
     if tag is None:
         tag = Tag(name=name)
         db.session.add(tag)
 
     # Attach if not already linked
-    if tag not in entry.tags.all():
+    if tag not in entry.tags:
         entry.tags.append(tag)
 
     _safe_commit()
@@ -1685,7 +2103,7 @@ def remove_tag_from_entry(entry_id, tag_id):
     if tag is None:
         return jsonify({"error": "Tag not found"}), 404
 
-    if tag in entry.tags.all():
+    if tag in entry.tags:
         entry.tags.remove(tag)
 
     # If the tag is now orphaned (no entries), delete it
@@ -1705,7 +2123,7 @@ def remove_tag_from_entry(entry_id, tag_id):
 @bp.route("/api/export-pdf", methods=["POST"])
 def export_pdf():
     """Export the timeline as a PDF to the IPTS shared folder."""
-    config = NotebookConfig.get_config()
+    config = NotebookConfig.get_cached()
     if not config.ipts:
         return jsonify({"error": "No IPTS configured"}), 400
 
@@ -1716,7 +2134,7 @@ def export_pdf():
 
     upload_folder = current_app.config.get("UPLOAD_FOLDER", "")
 
-    entries = Entry.query.order_by(Entry.created_at.asc()).all()
+    entries = db.session.scalars(select(Entry).order_by(Entry.created_at.asc())).all()
     if not entries:
         return jsonify({"error": "No entries to export"}), 400
 
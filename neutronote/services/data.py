@@ -10,14 +10,23 @@ All instrument-specific path conventions are resolved via the active
 
 from __future__ import annotations
 
+import hashlib
+import os
 import re
+import threading
+import time
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
 import numpy as np
 
+from .. import jsonutil
+
 
 def _get_instrument():
     """Return the active InstrumentConfig.
@@ -40,7 +49,7 @@ def _get_instrument():
 # =============================================================================
 
 
-@dataclass
+@dataclass(slots=True)
 class ReducedRun:
     """Represents a single reduced run with its file paths and metadata."""
 
@@ -59,9 +68,20 @@ class ReducedRun:
     @property
     def timestamp_datetime(self) -> datetime | None:
         """Parse timestamp to datetime object."""
+        # Format: YYYY-MM-DDTHHMMSS -> 2025-05-08T162147. Sliced by hand:
+        # the fixed layout makes strptime's format parsing pure overhead.
+        ts = self.timestamp
+        if len(ts) != 17:
+            return None
         try:
-            # Format: YYYY-MM-DDTHHMMSS -> 2025-05-08T162147
-            return datetime.strptime(self.timestamp, "%Y-%m-%dT%H%M%S")
+            return datetime(
+                int(ts[:4]),
+                int(ts[5:7]),
+                int(ts[8:10]),
+                int(ts[11:13]),
+                int(ts[13:15]),
+                int(ts[15:17]),
+            )
         except ValueError:
             return None
 
@@ -93,10 +113,14 @@ class ReducedRun:
         ts = self.start_time
         if isinstance(ts, bytes):
             ts = ts.decode("utf-8")
+        # "YYYY-MM-DDTHH:MM:SS..." -> "YYYY-MM-DD HH:MM" by slicing; only
+        # strings that do not look like that get parsed (and validated)
+        if len(ts) >= 19 and ts[4] == "-" and ts[10] == "T" and ts[13] == ":":
+            return f"{ts[:10]} {ts[11:16]}"
         try:
-            # Parse ISO format and reformat
-            dt_str = ts[:19]  # "YYYY-MM-DDTHH:MM:SS"
-            dt = datetime.strptime(dt_str, "%Y-%m-%dT%H:%M:%S")
+            if len(ts) < 19:
+                return ts
+            dt = datetime.fromisoformat(ts[:19])
             return dt.strftime("%Y-%m-%d %H:%M")
         except (ValueError, IndexError):
             return ts
@@ -119,7 +143,7 @@ class ReducedRun:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class StateInfo:
     """Information about an instrument state and its reduced runs."""
 
@@ -173,20 +197,36 @@ def get_metadata_from_reduced_file(reduced_file: Path) -> dict[str, Any]:
     dict
         Contains 'title', 'duration', 'start_time' keys.
     """
-    if not HAS_H5PY or not reduced_file.exists():
+    if not HAS_H5PY:
+        return {"title": "", "duration": 0.0, "start_time": ""}
+    try:
+        st = os.stat(reduced_file)
+    except OSError:
         return {"title": "", "duration": 0.0, "start_time": ""}
+    # Copy so callers may add keys without touching the cached entry
+    return dict(_cached_reduced_metadata(str(reduced_file), st.st_mtime_ns, st.st_size))
+
+
+@lru_cache(maxsize=4096)
+def _cached_reduced_metadata(path: str, mtime_ns: int, size: int) -> dict[str, Any]:
+    """Read the metadata logs of one reduced file.
 
+    Keyed on (path, mtime, size), so a file rewritten in place by a new
+    reduction is read again while unchanged files never reopen HDF5.
+    """
     try:
-        with h5py.File(reduced_file, "r") as f:
+        with h5py.File(path, "r") as f:
+            # Resolve the workspace and logs groups once; every value below
+            # is then a one-level lookup instead of a walk from the root.
+            ws = f.get("mantid_workspace_1")
+            logs = ws.get("logs") if ws is not None else None
 
             def read_log_value(log_name, default=None):
                 """Read a value from mantid_workspace_1/logs/<name>/value."""
+                if logs is None:
+                    return default
                 try:
-                    path = f"mantid_workspace_1/logs/{log_name}/value"
-                    ds = f.get(path)
-                    if ds is None:
-                        return default
-                    raw = ds[()]
+                    raw = logs[log_name]["value"][()]
                     if hasattr(raw, "__len__") and len(raw) > 0:
                         v = raw[0] if raw.ndim == 1 else raw
                     else:
@@ -196,23 +236,20 @@ def get_metadata_from_reduced_file(reduced_file: Path) -> dict[str, Any]:
                     if hasattr(v, "item"):
                         return v.item()
                     return v
-                except Exception:
+                except (KeyError, ValueError, TypeError):
                     return default
 
             # Also check the title dataset directly
             def read_title():
                 try:
-                    ds = f.get("mantid_workspace_1/title")
-                    if ds is not None:
-                        val = ds[()]
-                        if hasattr(val, "__len__") and len(val) > 0:
-                            val = val[0]
-                        if isinstance(val, bytes):
-                            return val.decode("utf-8")
-                        return str(val)
-                except Exception:
-                    pass
-                return read_log_value("run_title", "")
+                    val = ws["title"][()]
+                    if hasattr(val, "__len__") and len(val) > 0:
+                        val = val[0]
+                    if isinstance(val, bytes):
+                        return val.decode("utf-8")
+                    return str(val)
+                except (KeyError, TypeError, ValueError):
+                    return read_log_value("run_title", "")
 
             return {
                 "title": read_title() or "",
@@ -223,7 +260,7 @@ def get_metadata_from_reduced_file(reduced_file: Path) -> dict[str, Any]:
         return {"title": "", "duration": 0.0, "start_time": ""}
 
 
-def get_run_metadata_quick(ipts: str, run_number: int) -> dict[str, Any]:
+def get_run_metadata_quick(ipts: str, run_number: int, instrument=None) -> dict[str, Any]:
     """
     Quickly fetch basic metadata (title, duration, start_time) for a run.
 
@@ -235,6 +272,9 @@ def get_run_metadata_quick(ipts: str, run_number: int) -> dict[str, Any]:
         The IPTS identifier.
     run_number : int
         The run number.
+    instrument : InstrumentConfig, optional
+        Instrument to resolve the file path with; defaults to the active
+        one. Pass it explicitly when calling outside the app context.
 
     Returns
     -------
@@ -245,14 +285,28 @@ def get_run_metadata_quick(ipts: str, run_number: int) -> dict[str, Any]:
         return {"title": "", "duration": 0.0, "start_time": ""}
 
     # Try native file first (has complete metadata)
-    instrument = _get_instrument()
+    if instrument is None:
+        instrument = _get_instrument()
     native_path = instrument.data_root / ipts / "nexus" / instrument.nexus_filename(run_number)
 
-    if not native_path.exists():
+    try:
+        st = os.stat(native_path)
+    except OSError:
+        # Not written yet (or unreadable): not cached, so it is found later
         return {"title": "", "duration": 0.0, "start_time": ""}
+    # Copy so callers may add keys without touching the cached entry
+    return dict(_cached_nexus_metadata(str(native_path), st.st_mtime_ns, st.st_size))
+
+
+@lru_cache(maxsize=8192)
+def _cached_nexus_metadata(path: str, mtime_ns: int, size: int) -> dict[str, Any]:
+    """Read title/duration/start_time from a native NeXus file.
 
+    Keyed on (path, mtime, size) like the reduced-file cache, so a NeXus
+    file still being written is read again once it changes.
+    """
     try:
-        with h5py.File(native_path, "r") as f:
+        with h5py.File(path, "r") as f:
 
             def read_value(key, default=None):
                 try:
@@ -281,6 +335,52 @@ def get_run_metadata_quick(ipts: str, run_number: int) -> dict[str, Any]:
         return {"title": "", "duration": 0.0, "start_time": ""}
 
 
+# Shared by batch metadata requests. Much of each lookup is filesystem
+# latency (stat/open on GPFS), which overlaps well across threads. Created
+# on first use, so processes that never batch don't start it.
+_metadata_pool: ThreadPoolExecutor | None = None
+_metadata_pool_lock = threading.Lock()
+
+
+def _get_metadata_pool() -> ThreadPoolExecutor:
+    """Get the shared metadata worker pool, creating it on first use."""
+    global _metadata_pool
+    pool = _metadata_pool
+    if pool is None:
+        with _metadata_pool_lock:
+            if _metadata_pool is None:
+                _metadata_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="nexus-meta")
+            pool = _metadata_pool
+    return pool
+
+
+def get_run_metadata_quick_many(ipts: str, run_numbers: list[int]) -> dict[int, dict[str, Any]]:
+    """
+    Fetch quick metadata for several runs concurrently.
+
+    Parameters
+    ----------
+    ipts : str
+        The IPTS identifier.
+    run_numbers : list of int
+        The run numbers.
+
+    Returns
+    -------
+    dict
+        Maps each run number to its ``get_run_metadata_quick`` result,
+        in the order given.
+    """
+    # Worker threads have no app context, so resolve the instrument here
+    instrument = _get_instrument()
+    pool = _get_metadata_pool()
+    futures = {
+        run_number: pool.submit(get_run_metadata_quick, ipts, run_number, instrument)
+        for run_number in run_numbers
+    }
+    return {run_number: future.result() for run_number, future in futures.items()}
+
+
 # =============================================================================
 # Reduced data discovery functions
 # =============================================================================
@@ -310,7 +410,7 @@ def get_reduced_data_root(ipts: str) -> Path | None:
         from ..models import NotebookConfig
 
         with current_app.app_context():
-            config = NotebookConfig.get_config()
+            config = NotebookConfig.get_cached()
             if config.has_reduced_data_path:
                 return Path(config.reduced_data_path)
     except (RuntimeError, ImportError):
@@ -357,43 +457,37 @@ def discover_state_ids(ipts: str) -> list[str]:
     # First, check if there are data files directly in the root
     # This indicates a flat structure (e.g., REF_L stores REFL_*.txt in root)
     instrument = _get_instrument()
-    extensions = instrument.reduced_file_extensions()
-    has_root_data_files = False
+    extensions = tuple(instrument.reduced_file_extensions())
 
-    for ext in extensions:
-        pattern = f"*{ext}"
-        if any(reduced_root.glob(pattern)):
-            has_root_data_files = True
-            break
+    # One scandir pass: DirEntry.is_dir() uses the d_type from the listing,
+    # so no per-entry stat. Subdirectories are state folders (SNAP's
+    # 16-character hashes, or any name for other instruments).
+    state_ids = []
+    has_root_data_files = False
+    with os.scandir(reduced_root) as it:
+        for entry in it:
+            if entry.name.endswith(extensions) and not entry.name.startswith("."):
+                has_root_data_files = True
+                break
+            if entry.is_dir():
+                state_ids.append(entry.name)
 
     # If data files exist in root, it's a flat structure (even if subdirs exist)
     if has_root_data_files:
         return ["_flat"]
 
-    # State IDs are 16-character hex strings (SNAP convention)
-    state_pattern = re.compile(r"^[a-f0-9]{16}$", re.IGNORECASE)
-
-    state_ids = []
-    has_subdirs = False
-
-    for item in reduced_root.iterdir():
-        if item.is_dir():
-            has_subdirs = True
-            # Check if it's a SNAP-style state hash or just a regular subdirectory
-            if state_pattern.match(item.name):
-                state_ids.append(item.name)
-            else:
-                # For non-SNAP instruments, include any subdirectory
-                state_ids.append(item.name)
-
     # If no subdirectories found, indicate flat structure with "_flat"
     # This allows instruments that store reduced data directly in the root
-    if not has_subdirs:
+    if not state_ids:
         return ["_flat"]
 
     return sorted(state_ids)
 
 
+# Timestamp folders inside each run folder: YYYY-MM-DDTHHMMSS
+_TIMESTAMP_DIR_RE = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{6}$")
+
+
 def _discover_reduced_runs_flat(
     reduced_root: Path,
     ipts: str,
@@ -429,30 +523,38 @@ def _discover_reduced_runs_flat(
 
     # Get instrument-specific file extensions (e.g., .nxs, .txt)
     instrument = _get_instrument()
-    extensions = instrument.reduced_file_extensions()
-
-    # Look for files with specified extensions in the root
-    for ext in extensions:
-        # Use glob pattern like "*.nxs" or "*.txt"
-        pattern = f"*{ext}"
-        for data_file in reduced_root.glob(pattern):
+    extensions = tuple(instrument.reduced_file_extensions())
+
+    # Look for files with specified extensions in the root (one listing,
+    # files are only stat'ed when a run number appears more than once)
+    mtimes: dict[int, float] = {}
+    with os.scandir(reduced_root) as it:
+        for entry in it:
+            name = entry.name
+            if name.startswith(".") or not name.endswith(extensions):
+                continue
             # Try to extract run number from filename
-            run_number = instrument.run_number_from_filename(data_file.name)
-
-            if run_number is not None:
-                # Use run number as key to handle duplicates
-                # (keep newest if multiple files for same run)
-                if run_number not in runs or (
-                    data_file.stat().st_mtime > runs[run_number].reduced_file.stat().st_mtime
-                ):
-                    runs[run_number] = ReducedRun(
-                        run_number=run_number,
-                        state_id="_flat",  # No state concept for flat structures
-                        timestamp="",  # No timestamp in flat structures
-                        reduced_file=data_file,
-                        record_file=None,
-                        pixelmask_file=None,
-                    )
+            run_number = instrument.run_number_from_filename(name)
+            if run_number is None:
+                continue
+
+            # Use run number as key to handle duplicates
+            # (keep newest if multiple files for same run)
+            if run_number in runs:
+                mtime = entry.stat().st_mtime
+                if run_number not in mtimes:
+                    mtimes[run_number] = runs[run_number].reduced_file.stat().st_mtime
+                if mtime <= mtimes[run_number]:
+                    continue
+                mtimes[run_number] = mtime
+            runs[run_number] = ReducedRun(
+                run_number=run_number,
+                state_id="_flat",  # No state concept for flat structures
+                timestamp="",  # No timestamp in flat structures
+                reduced_file=Path(entry.path),
+                record_file=None,
+                pixelmask_file=None,
+            )
 
     return sorted(runs.values(), key=lambda r: r.run_number)
 
@@ -462,6 +564,7 @@ def discover_reduced_runs(
     state_id: str,
     lite: bool = True,
     latest_only: bool = True,
+    with_metadata: bool = False,
 ) -> list[ReducedRun]:
     """
     Discover reduced runs for a given state ID.
@@ -481,6 +584,10 @@ def discover_reduced_runs(
     latest_only : bool
         If True (default), return only the latest reduction for each run number.
         If False, return all timestamped reductions.
+    with_metadata : bool
+        If True, also read title/duration/start_time from every reduced file
+        (concurrently, after the walk). By default metadata is left for
+        get_run_metadata_lazy().
 
     Returns
     -------
@@ -493,7 +600,8 @@ def discover_reduced_runs(
 
     # Handle flat structure (state_id == "_flat")
     if state_id == "_flat":
-        return _discover_reduced_runs_flat(reduced_root, ipts, lite=lite, latest_only=latest_only)
+        runs = _discover_reduced_runs_flat(reduced_root, ipts, lite=lite, latest_only=latest_only)
+        return _fill_run_metadata(runs) if with_metadata else runs
 
     # Handle SNAP-style structured layout
     mode = "lite" if lite else "native"
@@ -508,44 +616,43 @@ def discover_reduced_runs(
     # Collect all reductions, keyed by run number
     runs_by_number: dict[int, list[ReducedRun]] = {}
 
-    # Pattern for timestamp folders: YYYY-MM-DDTHHMMSS
-    timestamp_pattern = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{6}$")
-
-    for run_dir in state_root.iterdir():
-        if not run_dir.is_dir():
-            continue
+    with os.scandir(state_root) as it:
+        run_dirs = [(e.name, e.path) for e in it if e.is_dir()]
 
+    for run_name, run_path in run_dirs:
         # Run folder should be numeric
         try:
-            run_number = int(run_dir.name)
+            run_number = int(run_name)
         except ValueError:
             continue
 
         # Look for timestamp folders inside the run folder
-        for ts_dir in run_dir.iterdir():
-            if not ts_dir.is_dir():
-                continue
-            if not timestamp_pattern.match(ts_dir.name):
-                continue
-
-            timestamp = ts_dir.name
+        with os.scandir(run_path) as it:
+            ts_dirs = [
+                (e.name, e.path) for e in it if e.is_dir() and _TIMESTAMP_DIR_RE.match(e.name)
+            ]
+
+        for timestamp, ts_path in ts_dirs:
+            # One listing answers every "does this file exist" question below
+            with os.scandir(ts_path) as it:
+                names = [e.name for e in it]
+            present = set(names)
+            ts_dir = Path(ts_path)
 
             # Look for the reduced file: reduced_<run.zfill(6)>_<timestamp>.nxs
-            reduced_pattern = f"reduced_{run_number:06d}_{timestamp}.nxs"
-            reduced_file = ts_dir / reduced_pattern
-
-            if not reduced_file.exists():
-                # Try glob in case naming varies slightly
-                reduced_files = list(ts_dir.glob("reduced_*.nxs"))
-                if reduced_files:
-                    reduced_file = reduced_files[0]
-                else:
+            reduced_name = f"reduced_{run_number:06d}_{timestamp}.nxs"
+            if reduced_name not in present:
+                # Accept a slightly different name in case naming varies
+                # (lowest name wins, so the pick does not depend on listing order)
+                reduced_name = min(
+                    (n for n in names if n.startswith("reduced_") and n.endswith(".nxs")),
+                    default=None,
+                )
+                if reduced_name is None:
                     continue  # No reduced file found
 
             # Optional files
-            record_file = ts_dir / "ReductionRecord.json"
-            pixelmask_pattern = f"pixelmask_{run_number:06d}_{timestamp}.h5"
-            pixelmask_file = ts_dir / pixelmask_pattern
+            pixelmask_name = f"pixelmask_{run_number:06d}_{timestamp}.h5"
 
             # NOTE: We no longer load metadata here for performance!
             # Metadata is loaded lazily via get_run_metadata_lazy()
@@ -554,9 +661,11 @@ def discover_reduced_runs(
                 run_number=run_number,
                 state_id=state_id,
                 timestamp=timestamp,
-                reduced_file=reduced_file,
-                record_file=record_file if record_file.exists() else None,
-                pixelmask_file=pixelmask_file if pixelmask_file.exists() else None,
+                reduced_file=ts_dir / reduced_name,
+                record_file=(
+                    ts_dir / "ReductionRecord.json" if "ReductionRecord.json" in present else None
+                ),
+                pixelmask_file=ts_dir / pixelmask_name if pixelmask_name in present else None,
                 # Metadata fields left at defaults - loaded lazily
             )
 
@@ -577,7 +686,236 @@ def discover_reduced_runs(
         else:
             result.extend(sorted(reductions, key=lambda r: r.timestamp))
 
-    return result
+    return _fill_run_metadata(result) if with_metadata else result
+
+
+def _fill_run_metadata(runs: list[ReducedRun]) -> list[ReducedRun]:
+    """Read each run's reduced-file metadata on the worker pool, in place."""
+    metas = _get_metadata_pool().map(get_metadata_from_reduced_file, [r.reduced_file for r in runs])
+    for run, meta in zip(runs, metas):
+        run.title = meta["title"]
+        run.duration = meta["duration"]
+        run.start_time = meta["start_time"]
+    return runs
+
+
+# =============================================================================
+# Cached run index (used by the polling API routes)
+# =============================================================================
+
+# How long a directory scan is reused before the filesystem is walked again
+RUN_INDEX_TTL = 30  # seconds
+
+
+@dataclass(frozen=True, slots=True)
+class RunIndex:
+    """Reduced runs for one state, with a lookup table by run number."""
+
+    runs: tuple[ReducedRun, ...]
+    by_number: dict[int, ReducedRun]
+    # str(run_number) sorted lexicographically, with the matching runs, for search
+    run_strings: tuple[str, ...] = ()
+    runs_by_string: tuple[ReducedRun, ...] = ()
+    # Fingerprint of the scanned runs, for HTTP ETags
+    etag: str = ""
+
+    @classmethod
+    def from_runs(cls, runs) -> RunIndex:
+        """Build an index from a sequence of runs sorted by run number."""
+        runs = tuple(runs)
+        by_string = sorted(((str(r.run_number), r) for r in runs), key=lambda pair: pair[0])
+        fingerprint = "\n".join(f"{r.run_number}:{r.timestamp}:{r.reduced_file}" for r in runs)
+        return cls(
+            runs=runs,
+            by_number={r.run_number: r for r in runs},
+            run_strings=tuple(s for s, _ in by_string),
+            runs_by_string=tuple(r for _, r in by_string),
+            etag=hashlib.blake2b(fingerprint.encode(), digest_size=8).hexdigest(),
+        )
+
+    def get(self, run_number: int) -> ReducedRun | None:
+        """Return the run with this number, or None."""
+        return self.by_number.get(run_number)
+
+    def search(self, text: str) -> list[ReducedRun]:
+        """
+        Return runs whose number matches *text*, sorted by run number.
+
+        Numbers starting with *text* are found by bisection on the sorted
+        strings (the usual case when typing a run number). If nothing starts
+        with *text*, falls back to a substring match anywhere in the number.
+        """
+        keys = self.run_strings
+        i = bisect_left(keys, text)
+        matches = []
+        while i < len(keys) and keys[i].startswith(text):
+            matches.append(self.runs_by_string[i])
+            i += 1
+        if not matches:
+            matches = [run for s, run in zip(keys, self.runs_by_string) if text in s]
+        return sorted(matches, key=lambda r: r.run_number)
+
+
+def _dir_mtime_ns(path) -> int:
+    """Modification time of a directory in ns, or 0 if it does not exist.
+
+    Adding or removing an entry updates a directory's mtime, so this is a
+    cheap change marker for the listings cached below.
+    """
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return 0
+
+
+@lru_cache(maxsize=64)
+def _cached_state_ids(
+    reduced_root: str, instrument_name: str, ipts: str, mtime_ns: int, bucket: int
+) -> tuple[str, ...]:
+    return tuple(discover_state_ids(ipts))
+
+
+def get_state_ids(ipts: str) -> tuple[str, ...]:
+    """
+    Return the state IDs for an IPTS, reusing the last scan when possible.
+
+    The cached listing is reused while the reduced-data root's mtime is
+    unchanged, for at most ``RUN_INDEX_TTL`` seconds.
+
+    Parameters
+    ----------
+    ipts : str
+        The IPTS identifier (e.g., "IPTS-12345").
+
+    Returns
+    -------
+    tuple[str, ...]
+        As for ``discover_state_ids``.
+    """
+    reduced_root = get_reduced_data_root(ipts)
+    bucket = int(time.monotonic() // RUN_INDEX_TTL)
+    return _cached_state_ids(
+        str(reduced_root), _get_instrument().name, ipts, _dir_mtime_ns(reduced_root), bucket
+    )
+
+
+@lru_cache(maxsize=64)
+def _cached_run_index(
+    reduced_root: str,
+    ipts: str,
+    state_id: str,
+    lite: bool,
+    latest_only: bool,
+    mtimes: tuple[int, ...],
+    bucket: int,
+) -> RunIndex:
+    return RunIndex.from_runs(
+        discover_reduced_runs(ipts, state_id, lite=lite, latest_only=latest_only)
+    )
+
+
+def get_run_index(
+    ipts: str,
+    state_id: str,
+    lite: bool = True,
+    latest_only: bool = True,
+) -> RunIndex:
+    """
+    Return the reduced runs for a state, reusing recent directory scans.
+
+    Results are keyed on the resolved reduced-data root, so changing the
+    configured path takes effect immediately, and on the mtime of the
+    directories holding the run folders, so newly reduced runs appear on
+    the next call. Re-reductions of an existing run only touch that run's
+    folder; they are picked up within ``RUN_INDEX_TTL`` seconds, or at once
+    after ``clear_run_index_cache()``.
+
+    Parameters
+    ----------
+    ipts : str
+        The IPTS identifier (e.g., "IPTS-12345").
+    state_id : str
+        The state ID, as for ``discover_reduced_runs``.
+    lite : bool
+        If True (default), look in the 'lite' subfolder.
+    latest_only : bool
+        If True (default), keep only the latest reduction per run.
+
+    Returns
+    -------
+    RunIndex
+        The runs (sorted by run number) and a dict keyed by run number.
+    """
+    reduced_root = get_reduced_data_root(ipts)
+    if reduced_root is None:
+        mtimes = ()
+    elif state_id == "_flat":
+        mtimes = (_dir_mtime_ns(reduced_root),)
+    else:
+        state_root = reduced_root / state_id
+        mode_root = state_root / ("lite" if lite else "native")
+        mtimes = (_dir_mtime_ns(state_root), _dir_mtime_ns(mode_root))
+    bucket = int(time.monotonic() // RUN_INDEX_TTL)
+    return _cached_run_index(str(reduced_root), ipts, state_id, lite, latest_only, mtimes, bucket)
+
+
+def clear_run_index_cache() -> None:
+    """Drop all cached state listings, run indexes and run metadata.
+
+    Called after new reductions land (the run list's refresh button).
+    """
+    _cached_state_ids.cache_clear()
+    _cached_run_index.cache_clear()
+    _cached_reduced_metadata.cache_clear()
+    _cached_nexus_metadata.cache_clear()
+    _STATE_ID_CACHE.clear()
+
+
+def prewarm_run_indexes(app) -> None:
+    """Populate the state and run-index caches for the notebook's IPTS."""
+    from ..models import NotebookConfig
+
+    # Fresh app context each pass so the config snapshot is not pinned
+    with app.app_context():
+        config = NotebookConfig.get_cached()
+        if not config.is_configured:
+            return
+        for state_id in get_state_ids(config.ipts):
+            get_run_index(config.ipts, state_id)
+
+
+def start_run_index_prewarmer(app, interval: float = RUN_INDEX_TTL / 2) -> threading.Event:
+    """
+    Keep the run-index caches warm from a background thread.
+
+    Every *interval* seconds the state IDs and run lists for the configured
+    IPTS are rescanned, so the polling API routes normally find a cached
+    scan instead of walking the filesystem themselves.
+
+    Parameters
+    ----------
+    app : Flask
+        The application whose notebook config and reduced-data paths to use.
+    interval : float
+        Seconds between refreshes (default: half of ``RUN_INDEX_TTL``).
+
+    Returns
+    -------
+    threading.Event
+        Set it to stop the thread.
+    """
+    stop = threading.Event()
+
+    def _run():
+        while not stop.is_set():
+            try:
+                prewarm_run_indexes(app)
+            except Exception as exc:
+                app.logger.warning("Run index prewarm failed: %s", exc)
+            stop.wait(interval)
+
+    threading.Thread(target=_run, name="run-index-prewarm", daemon=True).start()
+    return stop
 
 
 def get_run_metadata_lazy(reduced_file: Path | str) -> dict[str, Any]:
@@ -615,16 +953,53 @@ def discover_all_reduced_data(ipts: str, lite: bool = True) -> list[StateInfo]:
     -------
     list[StateInfo]
         List of StateInfo objects, one per state ID found.
+
+    Notes
+    -----
+    Goes through the same mtime-keyed caches as the run-list API
+    (``get_state_ids`` / ``get_run_index``), so a repeat call only stats
+    the state folders; states that changed are rescanned.
     """
-    state_ids = discover_state_ids(ipts)
-    states = []
+    state_ids = get_state_ids(ipts)
+
+    def runs_for(state_id):
+        return list(get_run_index(ipts, state_id, lite=lite, latest_only=True).runs)
+
+    if len(state_ids) <= 1:
+        scans = [runs_for(sid) for sid in state_ids]
+    else:
+        # States are independent directory trees, so scan them concurrently.
+        # Each worker gets its own app context for the notebook config and
+        # instrument lookups.
+        try:
+            from flask import current_app
+
+            app = current_app._get_current_object()
+        except RuntimeError:
+            app = None
+
+        def scan(state_id):
+            if app is None:
+                return runs_for(state_id)
+            with app.app_context():
+                return runs_for(state_id)
+
+        with ThreadPoolExecutor(
+            max_workers=min(8, len(state_ids)), thread_name_prefix="state-scan"
+        ) as pool:
+            scans = list(pool.map(scan, state_ids))
 
-    for state_id in state_ids:
-        runs = discover_reduced_runs(ipts, state_id, lite=lite, latest_only=True)
-        if runs:  # Only include states with actual reduced data
-            states.append(StateInfo(state_id=state_id, reduced_runs=runs))
+    # Only include states with actual reduced data (state_ids is sorted)
+    return [
+        StateInfo(state_id=state_id, reduced_runs=runs)
+        for state_id, runs in zip(state_ids, scans)
+        if runs
+    ]
 
-    return states
+
+# (instrument name, run number) -> state ID, filled by get_state_id_for_run
+STATE_ID_CACHE_SIZE = 8192
+_STATE_ID_CACHE: dict[tuple[str, int], str] = {}
 
 
 def get_state_id_for_run(run_number: int) -> str | None:
@@ -642,7 +1017,17 @@ def get_state_id_for_run(run_number: int) -> str | None:
         The state ID string, or None if it cannot be determined.
     """
     instrument = _get_instrument()
-    return instrument.get_state_id_for_run(run_number)
+    key = (instrument.name, run_number)
+    state_id = _STATE_ID_CACHE.get(key)
+    if state_id is None:
+        state_id = instrument.get_state_id_for_run(run_number)
+        # A run's state never changes once known; None may just mean the
+        # run is not available yet, so only real answers are kept.
+        if state_id is not None:
+            if len(_STATE_ID_CACHE) >= STATE_ID_CACHE_SIZE:
+                _STATE_ID_CACHE.clear()
+            _STATE_ID_CACHE[key] = state_id
+    return state_id
 
 
 # =============================================================================
@@ -656,6 +1041,12 @@ def nexus_path(ipts: str, run_number: int, lite: bool = True) -> Path:
     return instrument.nexus_path(ipts, run_number, lite=lite)
 
 
+# Constant x-axis and noise-free signal for the synthetic stub below
+_STUB_X = np.linspace(0.5, 10, 500, dtype=np.float32)
+_STUB_Y_CLEAN = (np.sin(2 * np.pi * _STUB_X) * np.exp(-0.1 * _STUB_X)).astype(np.float32)
+_rng = np.random.default_rng()
+
+
 def get_reduced_data(
     ipts: str,
     run_number: int,
@@ -693,15 +1084,20 @@ def get_reduced_data(
         ws = Rebin(ws, Params="0.5,0.01,10")
         x = ws.readX(0)
         y = ws.readY(0)
-        return {"x": x.tolist(), "y": y.tolist(), ...}
+        return {"x": x, "y": y, ...}
     """
     # --- STUB: generate synthetic data for development ---
-    x = np.linspace(0.5, 10, 500)
-    y = np.sin(2 * np.pi * x) * np.exp(-0.1 * x) + np.random.normal(0, 0.05, x.shape)
+    # Arrays are returned as-is; jsonutil/ORJSONProvider serialise numpy
+    # directly, so there is no per-element Python float conversion here.
+    x = _STUB_X
+    # Draw the noise in float32 and scale/offset in place (no float64 temporaries)
+    y = _rng.standard_normal(x.shape, dtype=np.float32)
+    y *= 0.05
+    y += _STUB_Y_CLEAN
 
     return {
-        "x": x.tolist(),
-        "y": y.tolist(),
+        "x": x,
+        "y": y,
         "labels": {
             "x": "d-spacing (Å)",
             "y": "Intensity (arb. units)",
@@ -729,16 +1125,25 @@ except ImportError:
     WorkspaceGroup = None  # type: ignore
 
 
-def _sanitize_array_for_json(arr: list) -> list:
+def _sanitize_array_for_json(arr) -> np.ndarray | list:
     """
-    Replace NaN and Inf values with None for valid JSON serialization.
+    Prepare a numeric array for the JSON response, with NaN/Inf as null.
 
     Python's json.dumps converts NaN/Inf to JavaScript literals (NaN, Infinity)
     which are NOT valid JSON and cause JSON.parse() to fail in browsers.
+    orjson serialises numpy arrays directly and writes NaN/Inf as null, so
+    when it is available the array is just copied (detaching it from the
+    workspace's memory) instead of being converted to a list of floats.
     """
+    if jsonutil.HAS_ORJSON:
+        return np.array(arr)
+
     import math
 
-    return [None if (isinstance(v, float) and (math.isnan(v) or math.isinf(v))) else v for v in arr]
+    return [
+        None if (isinstance(v, float) and (math.isnan(v) or math.isinf(v))) else v
+        for v in np.asarray(arr).tolist()
+    ]
 
 
 def load_reduced_workspace(reduced_file: Path | str, workspace_name: str | None = None):
@@ -810,12 +1215,12 @@ def _extract_single_workspace_data(ws) -> dict[str, Any]:
         result = {
             "type": "1d",
             "name": ws.name(),
-            "x": _sanitize_array_for_json(x.tolist()),
-            "y": _sanitize_array_for_json(y.tolist()),
+            "x": _sanitize_array_for_json(x),
+            "y": _sanitize_array_for_json(y),
             "labels": {"x": x_label, "y": y_label},
         }
         if e is not None and e.size > 0:
-            result["errors"] = _sanitize_array_for_json(e.tolist())
+            result["errors"] = _sanitize_array_for_json(e)
         return result
 
     else:
@@ -832,10 +1237,10 @@ def _extract_single_workspace_data(ws) -> dict[str, Any]:
             if len(x) == len(y) + 1:
                 x = (x[:-1] + x[1:]) / 2
 
-            all_x.append(_sanitize_array_for_json(x.tolist()))
-            all_y.append(_sanitize_array_for_json(y.tolist()))
+            all_x.append(_sanitize_array_for_json(x))
+            all_y.append(_sanitize_array_for_json(y))
             if e.size > 0:
-                all_e.append(_sanitize_array_for_json(e.tolist()))
+                all_e.append(_sanitize_array_for_json(e))
 
         result = {
             "type": "2d",
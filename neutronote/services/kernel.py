@@ -5,20 +5,41 @@ Provides a shared kernel that maintains state across code executions,
 allowing users to load workspaces and work with them collaboratively.
 """
 
-import json
 import os
-import queue
+import selectors
+import socket
+import struct
 import subprocess
 import sys
 import threading
 import time
-from dataclasses import dataclass, field
+from dataclasses import dataclass
+from pathlib import Path
 from typing import Optional
 
 import psutil
 
+from .. import jsonutil
 
-@dataclass
+# Kernel messages are JSON payloads preceded by a 4-byte big-endian length.
+_FRAME_HEADER = struct.Struct(">I")
+
+# get_memory_info() reuses its last reading for this long
+MEMORY_INFO_TTL = 1.0  # seconds
+
+# How long read-only queries (listings, plots, tables, logs) wait for a reply
+QUERY_TIMEOUT = 60.0  # seconds
+
+# How long a command waits for the kernel to finish the previous one (e.g. a
+# running cell) before giving up with KernelBusyError
+BUSY_WAIT = 1.0  # seconds
+
+
+class KernelBusyError(RuntimeError):
+    """The kernel is occupied (usually running a cell) and cannot answer now."""
+
+
+@dataclass(slots=True)
 class ExecutionResult:
     """Result of executing code in the kernel."""
 
@@ -26,9 +47,10 @@ class ExecutionResult:
     output: str
     error: Optional[str] = None
     execution_time: float = 0.0
+    truncated: bool = False  # Output exceeded the kernel's capture limit
 
 
-@dataclass
+@dataclass(slots=True)
 class KernelStatus:
     """Current status of the kernel."""
 
@@ -48,7 +70,7 @@ class KernelStatus:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class MemoryInfo:
     """Memory usage information."""
 
@@ -57,6 +79,8 @@ class MemoryInfo:
     system_percent: float
     mantid_used_gb: float = 0.0
     mantid_percent: float = 0.0  # Percent of system total
+    kernel_rss_gb: float = 0.0  # Resident memory of the kernel process
+    kernel_cpu_percent: float = 0.0  # Since the previous reading
     warning: bool = False  # True if usage > 85%
     critical: bool = False  # True if usage > 95%
 
@@ -67,12 +91,14 @@ class MemoryInfo:
             "system_percent": round(self.system_percent, 1),
             "mantid_used_gb": round(self.mantid_used_gb, 2),
             "mantid_percent": round(self.mantid_percent, 1),
+            "kernel_rss_gb": round(self.kernel_rss_gb, 2),
+            "kernel_cpu_percent": round(self.kernel_cpu_percent, 1),
             "warning": self.warning,
             "critical": self.critical,
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class WorkspaceInfo:
     """Information about a Mantid workspace."""
 
@@ -115,33 +141,35 @@ class KernelManager:
     Manages a persistent Python kernel process.
 
     The kernel runs as a subprocess and maintains state across executions.
-    Communication happens via stdin/stdout with JSON messages.
-    """
-
-    # Singleton instance
-    _instance: Optional["KernelManager"] = None
-    _lock = threading.Lock()
+    Communication happens over a UNIX socket pair with length-prefixed
+    JSON messages; the kernel's stdout/stderr are discarded.
 
-    def __new__(cls):
-        """Ensure only one KernelManager exists (singleton)."""
-        if cls._instance is None:
-            with cls._lock:
-                if cls._instance is None:
-                    cls._instance = super().__new__(cls)
-                    cls._instance._initialized = False
-        return cls._instance
+    The app shares one instance, obtained with ``get_kernel_manager()``.
+    """
 
     def __init__(self):
-        if self._initialized:
-            return
-
-        self._initialized = True
         self._process: Optional[subprocess.Popen] = None
+        # Kept across polls so cpu_percent() has a previous sample to diff
+        self._kernel_psutil: Optional[psutil.Process] = None
+        self._sock: Optional[socket.socket] = None
+        self._selector: Optional[selectors.BaseSelector] = None
         self._state = "dead"
         self._start_time: Optional[float] = None
         self._executions_count = 0
         self._last_execution_time: Optional[float] = None
-        self._exec_lock = threading.Lock()
+        # Serialises all traffic on the kernel socket (re-entrant so execute()
+        # can hold it across _send_command).
+        self._exec_lock = threading.RLock()
+        # (time.monotonic() when taken, reading) from the last get_memory_info()
+        self._mem_cache: Optional[tuple[float, MemoryInfo]] = None
+        # Last (variables, memory) replies for the status panel
+        self._dashboard_replies: tuple[dict, dict] = ({}, {})
+        # (kernel state generation, workspaces) from the last listing; the
+        # kernel skips resending an unchanged list
+        self._workspaces: tuple[Optional[int], list[WorkspaceInfo]] = (None, [])
+        # Replies to timed-out queries that are still on their way; they are
+        # read and dropped before the next command's reply
+        self._stale_replies = 0
 
         # Start the kernel
         self.start()
@@ -153,773 +181,61 @@ class KernelManager:
 
         self._state = "starting"
 
-        # The kernel runner script
-        kernel_script = self._get_kernel_script()
+        # Import the worker as a module (not a -c script) so its bytecode is
+        # cached; make sure the package is importable in the child.
+        env = dict(os.environ)
+        package_parent = str(Path(__file__).resolve().parents[2])
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [package_parent, env.get("PYTHONPATH")]))
 
+        self._close_socket()
+        parent_sock, child_sock = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
         try:
             self._process = subprocess.Popen(
-                [sys.executable, "-c", kernel_script],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,  # Line buffered
+                [
+                    sys.executable,
+                    "-c",
+                    "import sys; from neutronote.services.kernel_worker import serve; "
+                    "serve(int(sys.argv[1]))",
+                    str(child_sock.fileno()),
+                ],
+                env=env,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                pass_fds=(child_sock.fileno(),),
             )
-            self._start_time = time.time()
-            self._state = "idle"
-            self._executions_count = 0
-            print(f"[KernelManager] Kernel started with PID {self._process.pid}")
-            return True
         except Exception as e:
             print(f"[KernelManager] Failed to start kernel: {e}")
+            parent_sock.close()
             self._state = "dead"
             return False
+        finally:
+            child_sock.close()
 
-    def _get_kernel_script(self) -> str:
-        """Return the Python code that runs in the kernel subprocess."""
-        return '''
-import sys
-import json
-import io
-import math
-import traceback
-from contextlib import contextmanager
-
-# Try to import mantid - it's optional but desired
-try:
-    from mantid.simpleapi import *
-    from mantid.api import AnalysisDataService as ADS
-    MANTID_AVAILABLE = True
-except ImportError:
-    MANTID_AVAILABLE = False
-    ADS = None
-
-# --- Helpers for safe IPC over the stdin/stdout pipe ---
-
-# File descriptor for the *real* stdout so we can always write JSON
-# responses even when sys.stdout is temporarily redirected.
-_real_stdout = sys.stdout
-
-@contextmanager
-def _suppress_stdout():
-    """Redirect sys.stdout and sys.stderr to a black-hole while
-    calling mantid functions that may emit log messages.  This
-    prevents stray text from corrupting the JSON pipe."""
-    sink = io.StringIO()
-    old_out, old_err = sys.stdout, sys.stderr
-    sys.stdout = sink
-    sys.stderr = sink
-    try:
-        yield
-    finally:
-        sys.stdout = old_out
-        sys.stderr = old_err
-
-def _safe_float(v):
-    """Convert NaN / Inf to None so json.dumps produces valid JSON."""
-    if isinstance(v, float) and not math.isfinite(v):
-        return None
-    return v
-
-def _sanitise(obj):
-    """Recursively walk a dict/list and replace non-finite floats
-    with None so that the JSON is valid for browser JSON.parse.
-    Also convert numpy scalar types to native Python types."""
-    if isinstance(obj, dict):
-        return {k: _sanitise(v) for k, v in obj.items()}
-    if isinstance(obj, list):
-        return [_sanitise(v) for v in obj]
-    if isinstance(obj, float):
-        return _safe_float(obj)
-    # Handle numpy scalar types that json.dumps can't serialise
-    try:
-        import numpy as _np
-        if isinstance(obj, (_np.integer,)):
-            return int(obj)
-        if isinstance(obj, (_np.floating,)):
-            v = float(obj)
-            return v if math.isfinite(v) else None
-        if isinstance(obj, (_np.bool_,)):
-            return bool(obj)
-        if isinstance(obj, _np.ndarray):
-            return _sanitise(obj.tolist())
-    except ImportError:
-        pass
-    return obj
-
-def _respond(obj):
-    """Serialise *obj* as a single JSON line on the real stdout.
-    Non-finite floats are replaced with null."""
-    _real_stdout.write(json.dumps(_sanitise(obj)) + '\\n')
-    _real_stdout.flush()
-
-# Global namespace for user code
-_user_namespace = {'__name__': '__main__'}
-
-# Pre-populate _user_namespace with mantid star-imports so that
-# when a user runs ``from mantid.simpleapi import *`` in a code cell
-# the resulting names are already in the baseline and get filtered
-# out of the variables pane.
-if MANTID_AVAILABLE:
-    try:
-        exec('from mantid.simpleapi import *', _user_namespace)
-    except Exception:
-        pass
-
-# Snapshot of namespace keys *after* the mantid star-import so all
-# algorithm wrappers and constants are excluded from the variables pane.
-_baseline_keys = set(_user_namespace.keys())
-
-def get_workspace_info():
-    """Get info about all workspaces in ADS.
-    
-    Returns a list of dicts with fields matching what Mantid Workbench
-    shows when a workspace node is expanded in the workspace tree.
-    """
-    if not MANTID_AVAILABLE or ADS is None:
-        return []
-    
-    workspaces = []
-    try:
-        for name in ADS.getObjectNames():
-            try:
-                ws = ADS.retrieve(name)
-                info = {
-                    'name': name,
-                    'type': type(ws).__name__,
-                    'num_spectra': 0,
-                    'num_bins': 0,
-                    'memory_mb': 0.0,
-                    'x_unit': '',
-                    'x_unit_label': '',
-                    'y_unit': '',
-                    'distribution': False,
-                    'histogram': False,
-                    'common_bins': True,
-                    'instrument': '',
-                    'run_number': '',
-                    'title': '',
-                }
-                
-                # Dimensions
-                if hasattr(ws, 'getNumberHistograms'):
-                    info['num_spectra'] = ws.getNumberHistograms()
-                if hasattr(ws, 'blocksize'):
-                    try:
-                        info['num_bins'] = ws.blocksize()
-                    except Exception:
-                        info['num_bins'] = 0
-                if hasattr(ws, 'getMemorySize'):
-                    info['memory_mb'] = ws.getMemorySize() / (1024 * 1024)
-                
-                # Axis units
-                try:
-                    ax0 = ws.getAxis(0)
-                    info['x_unit'] = ax0.getUnit().caption()
-                    info['x_unit_label'] = ax0.getUnit().label()
-                except Exception:
-                    pass
-                try:
-                    info['y_unit'] = ws.YUnitLabel() if hasattr(ws, 'YUnitLabel') else ''
-                except Exception:
-                    pass
-                
-                # Distribution / histogram / common bins flags
-                try:
-                    info['distribution'] = ws.isDistribution()
-                except Exception:
-                    pass
-                try:
-                    if hasattr(ws, 'isHistogramData') and info['num_spectra'] > 0:
-                        info['histogram'] = ws.isHistogramData()
-                except Exception:
-                    pass
-                try:
-                    if hasattr(ws, 'isCommonBins'):
-                        info['common_bins'] = ws.isCommonBins()
-                except Exception:
-                    pass
-                
-                # Run metadata
-                try:
-                    run = ws.getRun()
-                    if run.hasProperty('run_number'):
-                        info['run_number'] = str(run.getProperty('run_number').value)
-                except Exception:
-                    pass
-                try:
-                    info['title'] = ws.getTitle()
-                except Exception:
-                    pass
-                try:
-                    inst = ws.getInstrument()
-                    if inst:
-                        info['instrument'] = inst.getName()
-                except Exception:
-                    pass
-                
-                workspaces.append(info)
-            except Exception:
-                pass
-    except Exception:
-        pass
-    
-    return workspaces
-
-def get_mantid_memory_mb():
-    """Get total memory used by Mantid workspaces."""
-    if not MANTID_AVAILABLE or ADS is None:
-        return 0.0
-    
-    total = 0.0
-    try:
-        for name in ADS.getObjectNames():
-            try:
-                ws = ADS.retrieve(name)
-                if hasattr(ws, 'getMemorySize'):
-                    total += ws.getMemorySize() / (1024 * 1024)
-            except Exception:
-                pass
-    except Exception:
-        pass
-    
-    return total
-
-def get_namespace_vars():
-    """Get list of user-defined variables in the namespace.
-    
-    Filters out:
-      - private names (starting with _)
-      - names that were in the namespace before any user code ran
-      - callable objects originating from mantid (algorithm wrappers
-        injected by ``from mantid.simpleapi import *``)
-      - modules
-    """
-    import types as _types
-    vars_list = []
-    for name, val in _user_namespace.items():
-        if name.startswith('_'):
-            continue
-        if name in _baseline_keys:
-            continue
-        # Skip modules
-        if isinstance(val, _types.ModuleType):
-            continue
-        # Skip mantid algorithm wrappers (callable + mantid module origin)
-        if callable(val):
-            mod = getattr(val, '__module__', '') or ''
-            if 'mantid' in mod:
-                continue
-        vars_list.append({
-            'name': name,
-            'type': type(val).__name__,
-        })
-    return vars_list
-
-def execute_code(code):
-    """Execute code and return result."""
-    stdout_capture = io.StringIO()
-    old_stdout = sys.stdout
-    old_stderr = sys.stderr
-    
-    try:
-        sys.stdout = stdout_capture
-        sys.stderr = stdout_capture
-        
-        exec(compile(code, '<neutronote>', 'exec'), _user_namespace)
-        
-        return {
-            'success': True,
-            'output': stdout_capture.getvalue(),
-            'error': None,
-        }
-    except Exception as e:
-        return {
-            'success': False,
-            'output': stdout_capture.getvalue(),
-            'error': traceback.format_exc(),
-        }
-    finally:
-        sys.stdout = old_stdout
-        sys.stderr = old_stderr
-
-# -----------------------------------------------------------------
-# Workspace interactivity helpers
-# -----------------------------------------------------------------
-
-def rename_workspace(old_name, new_name):
-    """Rename a workspace in the ADS."""
-    if not MANTID_AVAILABLE or ADS is None:
-        return {'success': False, 'error': 'Mantid not available'}
-    if not ADS.doesExist(old_name):
-        return {'success': False, 'error': f'Workspace "{old_name}" not found'}
-    try:
-        RenameWorkspace(InputWorkspace=old_name, OutputWorkspace=new_name)
-        return {'success': True, 'old_name': old_name, 'new_name': new_name}
-    except Exception as e:
-        return {'success': False, 'error': str(e)}
-
-def get_algorithm_history(ws_name):
-    """Get the algorithm history of a workspace."""
-    if not MANTID_AVAILABLE or ADS is None:
-        return {'success': False, 'error': 'Mantid not available'}
-    if not ADS.doesExist(ws_name):
-        return {'success': False, 'error': f'Workspace "{ws_name}" not found'}
-    try:
-        ws = ADS.retrieve(ws_name)
-        history = ws.getHistory()
-        items = []
-        for i in range(history.size()):
-            alg_hist = history.getAlgorithmHistory(i)
-            props = []
-            for prop in alg_hist.getProperties():
-                if not prop.isDefault():
-                    props.append({'name': prop.name(), 'value': prop.value()})
-            items.append({
-                'name': alg_hist.name(),
-                'version': alg_hist.version(),
-                'execution_date': str(alg_hist.executionDate()),
-                'duration': alg_hist.executionDuration(),
-                'properties': props,
-            })
-        return {'success': True, 'name': ws_name, 'history': items}
-    except Exception as e:
-        return {'success': False, 'error': str(e)}
-
-def extract_spectrum_data(ws_name, spectra, max_points=5000):
-    """Extract X/Y/E data for given spectrum indices.
-    
-    spectra: list of int spectrum indices.
-    Returns dict with traces list [{x, y, e, spectrum_index, label}].
-    """
-    if not MANTID_AVAILABLE or ADS is None:
-        return {'success': False, 'error': 'Mantid not available'}
-    if not ADS.doesExist(ws_name):
-        return {'success': False, 'error': f'Workspace "{ws_name}" not found'}
-    try:
-        ws = ADS.retrieve(ws_name)
-        n_hist = ws.getNumberHistograms()
-        n_bins = ws.blocksize()
-        
-        # Axis labels
-        x_unit = ws.getAxis(0).getUnit().caption()
-        x_unit_label = ws.getAxis(0).getUnit().label()
-        y_unit = ws.YUnitLabel() if hasattr(ws, 'YUnitLabel') else 'Counts'
-        
-        traces = []
-        for si in spectra:
-            if si < 0 or si >= n_hist:
-                continue
-            x = ws.readX(si)
-            y = ws.readY(si)
-            e = ws.readE(si)
-            
-            # Bin-centre X for histograms
-            if len(x) == len(y) + 1:
-                x = [(x[j] + x[j+1]) / 2.0 for j in range(len(y))]
-            else:
-                x = list(x)
-            y = list(y)
-            e = list(e)
-            
-            # Downsample if too large
-            step = max(1, len(y) // max_points)
-            if step > 1:
-                x = x[::step]
-                y = y[::step]
-                e = e[::step]
-            
-            # Filter NaN/Inf
-            clean_x, clean_y, clean_e = [], [], []
-            for xi, yi, ei in zip(x, y, e):
-                if math.isfinite(yi):
-                    clean_x.append(xi)
-                    clean_y.append(yi)
-                    clean_e.append(ei)
-            
-            traces.append({
-                'x': clean_x,
-                'y': clean_y,
-                'e': clean_e,
-                'spectrum_index': si,
-                'label': f'Spectrum {si}',
-            })
-        
-        return {
-            'success': True,
-            'name': ws_name,
-            'traces': traces,
-            'x_label': f'{x_unit} ({x_unit_label})' if x_unit_label else x_unit,
-            'y_label': y_unit,
-            'num_spectra': n_hist,
-            'num_bins': n_bins,
-        }
-    except Exception as e:
-        return {'success': False, 'error': str(e)}
-
-def extract_colorfill_data(ws_name, max_spectra=500, max_bins=2000):
-    """Extract 2D array for colorfill plot.
-    
-    Returns dict with z (2D array), x (common bin centres), y (spectrum indices),
-    axis labels, and data_min/data_max for autoscaling.
-
-    Out-of-range values (e.g. d-spacings that don't exist for a given
-    pixel) are represented as NaN so Plotly renders them as gaps (white).
+        self._sock = parent_sock
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(parent_sock, selectors.EVENT_READ)
+        try:
+            self._kernel_psutil = psutil.Process(self._process.pid)
+        except psutil.Error:
+            self._kernel_psutil = None
+        self._start_time = time.time()
+        self._state = "idle"
+        self._executions_count = 0
+        # A new kernel counts generations from zero again
+        self._workspaces = (None, [])
+        print(f"[KernelManager] Kernel started with PID {self._process.pid}")
+        return True
 
-    If the workspace has non-uniform X axes (e.g. after ConvertUnits to
-    dSpacing), the data is rebinned onto a common X grid so Plotly's
-    heatmap can render it correctly.
-    """
-    if not MANTID_AVAILABLE or ADS is None:
-        return {'success': False, 'error': 'Mantid not available'}
-    if not ADS.doesExist(ws_name):
-        return {'success': False, 'error': f'Workspace "{ws_name}" not found'}
-    try:
-        import numpy as np
-
-        ws = ADS.retrieve(ws_name)
-        n_hist = ws.getNumberHistograms()
-        n_bins = ws.blocksize()
-        
-        # Axis labels
-        x_unit = ws.getAxis(0).getUnit().caption()
-        x_unit_label = ws.getAxis(0).getUnit().label()
-        y_unit = 'Spectrum Index'
-        
-        # Downsample spectra if needed
-        spec_step = max(1, n_hist // max_spectra)
-        spec_indices = list(range(0, n_hist, spec_step))
-
-        common_bins = ws.isCommonBins()
-
-        if common_bins:
-            # ---- Fast path: all spectra share the same X axis ----
-            bin_step = max(1, n_bins // max_bins)
-            x0 = ws.readX(0)
-            if len(x0) == n_bins + 1:
-                x = [(x0[j] + x0[j+1]) / 2.0 for j in range(0, n_bins, bin_step)]
-            else:
-                x = list(x0[::bin_step])
-
-            z = []
-            for si in spec_indices:
-                row = list(ws.readY(si)[::bin_step])
-                z.append(row)
-        else:
-            # ---- Ragged bins: rebin onto a common X grid ----
-            # 1. Find global X range from sampled spectra
-            x_min = float('inf')
-            x_max = float('-inf')
-            for si in spec_indices:
-                xi = ws.readX(si)
-                lo = float(xi[0])
-                hi = float(xi[-1])
-                if lo < x_min:
-                    x_min = lo
-                if hi > x_max:
-                    x_max = hi
-
-            # 2. Build common bin-centre grid
-            n_common = min(n_bins, max_bins)
-            x = np.linspace(x_min, x_max, n_common).tolist()
-
-            # 3. For each spectrum, interpolate Y onto the common grid.
-            #    Values outside a spectrum's own X range → NaN (gap).
-            z = []
-            for si in spec_indices:
-                xi = np.array(ws.readX(si))
-                yi = np.array(ws.readY(si))
-                # Compute bin centres if histogram
-                if len(xi) == len(yi) + 1:
-                    xi = (xi[:-1] + xi[1:]) / 2.0
-                # Interpolate; out-of-range → NaN (rendered as white gap)
-                row = np.interp(x, xi, yi, left=float('nan'), right=float('nan'))
-                z.append(row.tolist())
-
-        # Compute data_min/data_max from real data (excluding NaN).
-        # Use numpy for speed — the z list can be huge.
-        z_arr = np.array(z, dtype=np.float64)
-        finite_vals = z_arr[np.isfinite(z_arr)]
-        if finite_vals.size > 0:
-            data_min = float(finite_vals.min())
-            data_max = float(finite_vals.max())
-        else:
-            data_min = 0.0
-            data_max = 1.0
-
-        return {
-            'success': True,
-            'name': ws_name,
-            'z': z,
-            'x': x,
-            'y': spec_indices,
-            'x_label': f'{x_unit} ({x_unit_label})' if x_unit_label else x_unit,
-            'y_label': y_unit,
-            'num_spectra': n_hist,
-            'num_bins': n_bins,
-            'common_bins': common_bins,
-            'data_min': data_min,
-            'data_max': data_max,
-        }
-    except Exception as e:
-        return {'success': False, 'error': str(e)}
-
-def extract_table_data(ws_name, start_spec=0, num_spec=20,
-                       start_bin=0, num_bins=50):
-    """Extract a page of X/Y/E data for table view.
-    
-    Returns dict with columns and rows for the requested slice.
-    Supports paging through both spectra (rows) and bins (columns).
-    """
-    if not MANTID_AVAILABLE or ADS is None:
-        return {'success': False, 'error': 'Mantid not available'}
-    if not ADS.doesExist(ws_name):
-        return {'success': False, 'error': f'Workspace "{ws_name}" not found'}
-    try:
-        ws = ADS.retrieve(ws_name)
-        n_hist = ws.getNumberHistograms()
-        n_bins = ws.blocksize()
-        
-        end_spec = min(start_spec + num_spec, n_hist)
-        end_bin = min(start_bin + num_bins, n_bins)
-        
-        rows = []
-        for si in range(start_spec, end_spec):
-            x = ws.readX(si)
-            y = ws.readY(si)
-            e = ws.readE(si)
-            
-            # Bin centres for histograms
-            if len(x) == len(y) + 1:
-                x = [(x[j] + x[j+1]) / 2.0 for j in range(len(y))]
-            else:
-                x = list(x)
-            
-            # Slice to the requested bin window
-            rows.append({
-                'spectrum': si,
-                'x': list(x[start_bin:end_bin]),
-                'y': list(y[start_bin:end_bin]),
-                'e': list(e[start_bin:end_bin]),
-            })
-        
-        return {
-            'success': True,
-            'name': ws_name,
-            'rows': rows,
-            'start_spec': start_spec,
-            'end_spec': end_spec,
-            'num_spectra': n_hist,
-            'num_bins': n_bins,
-            'start_bin': start_bin,
-            'end_bin': end_bin,
-        }
-    except Exception as e:
-        return {'success': False, 'error': str(e)}
-
-def extract_sample_logs(ws_name):
-    """Extract sample log names, types, and values from a workspace."""
-    if not MANTID_AVAILABLE or ADS is None:
-        return {'success': False, 'error': 'Mantid not available'}
-    if not ADS.doesExist(ws_name):
-        return {'success': False, 'error': f'Workspace "{ws_name}" not found'}
-    try:
-        ws = ADS.retrieve(ws_name)
-        run = ws.run()
-        logs = []
-        for prop in run.getProperties():
-            log_info = {
-                'name': prop.name,
-                'type': type(prop).__name__,
-                'units': prop.units if hasattr(prop, 'units') else '',
-            }
-            # Scalar or short string values
-            if hasattr(prop, 'value'):
-                val = prop.value
-                if isinstance(val, (int, float, bool)):
-                    log_info['value'] = val
-                    log_info['is_series'] = False
-                elif isinstance(val, str) and len(val) < 200:
-                    log_info['value'] = val
-                    log_info['is_series'] = False
-                else:
-                    log_info['is_series'] = True
-                    log_info['size'] = len(val) if hasattr(val, '__len__') else 0
-            else:
-                log_info['is_series'] = False
-                log_info['value'] = str(prop)[:200]
-            logs.append(log_info)
-        
-        return {'success': True, 'name': ws_name, 'logs': logs}
-    except Exception as e:
-        return {'success': False, 'error': str(e)}
-
-def extract_log_series(ws_name, log_name):
-    """Extract time-series data for a specific sample log."""
-    if not MANTID_AVAILABLE or ADS is None:
-        return {'success': False, 'error': 'Mantid not available'}
-    if not ADS.doesExist(ws_name):
-        return {'success': False, 'error': f'Workspace "{ws_name}" not found'}
-    try:
-        ws = ADS.retrieve(ws_name)
-        run = ws.run()
-        prop = run.getProperty(log_name)
-        
-        times = prop.times  # numpy array of datetime64
-        values = prop.value  # numpy array of values
-        
-        # Convert to JSON-serialisable lists
-        # times -> ISO strings
-        import numpy as np
-        t_list = []
-        for t in times:
-            # DateAndTime objects -> string
-            t_list.append(str(t))
-        v_list = [float(v) if np.isfinite(v) else None for v in values]
-        
-        return {
-            'success': True,
-            'name': ws_name,
-            'log_name': log_name,
-            'times': t_list,
-            'values': v_list,
-            'units': prop.units if hasattr(prop, 'units') else '',
-        }
-    except Exception as e:
-        return {'success': False, 'error': str(e)}
-
-def save_workspace_nexus(ws_name, filepath):
-    """Save a workspace to a NeXus file."""
-    if not MANTID_AVAILABLE or ADS is None:
-        return {'success': False, 'error': 'Mantid not available'}
-    if not ADS.doesExist(ws_name):
-        return {'success': False, 'error': f'Workspace "{ws_name}" not found'}
-    try:
-        SaveNexus(InputWorkspace=ws_name, Filename=filepath)
-        return {'success': True, 'name': ws_name, 'path': filepath}
-    except Exception as e:
-        return {'success': False, 'error': str(e)}
-
-# Main loop - read JSON commands from stdin, write JSON responses to stdout
-# ALL responses go through _respond() which:
-#   1. Writes to the *real* stdout (not the redirected one)
-#   2. Sanitises NaN/Inf to null for valid JSON
-# ALL mantid-touching operations are wrapped in _suppress_stdout()
-# to prevent stray log messages from corrupting the JSON pipe.
-while True:
-    try:
-        line = sys.stdin.readline()
-        if not line:
-            break
-        
-        cmd = json.loads(line.strip())
-        action = cmd.get('action')
-        
-        if action == 'execute':
-            code = cmd.get('code', '')
-            result = execute_code(code)
-            _respond({'type': 'result', **result})
-        
-        elif action == 'workspaces':
-            with _suppress_stdout():
-                workspaces = get_workspace_info()
-            _respond({'type': 'workspaces', 'workspaces': workspaces})
-        
-        elif action == 'variables':
-            variables = get_namespace_vars()
-            _respond({'type': 'variables', 'variables': variables})
-        
-        elif action == 'memory':
-            with _suppress_stdout():
-                memory_mb = get_mantid_memory_mb()
-            _respond({'type': 'memory', 'mantid_mb': memory_mb})
-        
-        elif action == 'delete_workspace':
-            ws_name = cmd.get('name', '')
-            if MANTID_AVAILABLE and ADS is not None and ws_name:
-                try:
-                    with _suppress_stdout():
-                        exists = ADS.doesExist(ws_name)
-                        if exists:
-                            ADS.remove(ws_name)
-                    if exists:
-                        _respond({'type': 'deleted', 'name': ws_name, 'success': True})
-                    else:
-                        _respond({'type': 'deleted', 'name': ws_name, 'success': False, 'error': 'Workspace not found'})
-                except Exception as e:
-                    _respond({'type': 'deleted', 'name': ws_name, 'success': False, 'error': str(e)})
-            else:
-                _respond({'type': 'deleted', 'name': ws_name, 'success': False, 'error': 'Mantid not available or no name provided'})
-        
-        elif action == 'rename_workspace':
-            with _suppress_stdout():
-                result = rename_workspace(cmd.get('old_name', ''), cmd.get('new_name', ''))
-            _respond({'type': 'renamed', **result})
-        
-        elif action == 'workspace_history':
-            with _suppress_stdout():
-                result = get_algorithm_history(cmd.get('name', ''))
-            _respond({'type': 'history', **result})
-        
-        elif action == 'plot_spectrum':
-            with _suppress_stdout():
-                result = extract_spectrum_data(
-                    cmd.get('name', ''),
-                    cmd.get('spectra', [0]),
-                    cmd.get('max_points', 5000),
-                )
-            _respond({'type': 'plot_spectrum', **result})
-        
-        elif action == 'plot_colorfill':
-            with _suppress_stdout():
-                result = extract_colorfill_data(
-                    cmd.get('name', ''),
-                    cmd.get('max_spectra', 500),
-                    cmd.get('max_bins', 2000),
-                )
-            _respond({'type': 'plot_colorfill', **result})
-        
-        elif action == 'show_data':
-            with _suppress_stdout():
-                result = extract_table_data(
-                    cmd.get('name', ''),
-                    cmd.get('start_spec', 0),
-                    cmd.get('num_spec', 20),
-                    cmd.get('start_bin', 0),
-                    cmd.get('num_bins', 50),
-                )
-            _respond({'type': 'show_data', **result})
-        
-        elif action == 'show_logs':
-            with _suppress_stdout():
-                result = extract_sample_logs(cmd.get('name', ''))
-            _respond({'type': 'show_logs', **result})
-        
-        elif action == 'log_series':
-            with _suppress_stdout():
-                result = extract_log_series(cmd.get('name', ''), cmd.get('log_name', ''))
-            _respond({'type': 'log_series', **result})
-        
-        elif action == 'save_workspace':
-            with _suppress_stdout():
-                result = save_workspace_nexus(cmd.get('name', ''), cmd.get('filepath', ''))
-            _respond({'type': 'saved', **result})
-        
-        elif action == 'ping':
-            _respond({'type': 'pong'})
-        
-        elif action == 'shutdown':
-            _respond({'type': 'shutdown', 'success': True})
-            break
-        
-        else:
-            _respond({'type': 'error', 'error': f'Unknown action: {action}'})
-    
-    except json.JSONDecodeError as e:
-        _respond({'type': 'error', 'error': f'Invalid JSON: {e}'})
-    except Exception as e:
-        _respond({'type': 'error', 'error': str(e)})
-'''
+    def _close_socket(self):
+        """Close the parent end of the kernel socket, if open."""
+        self._stale_replies = 0
+        if self._selector is not None:
+            self._selector.close()
+            self._selector = None
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
 
     def stop(self) -> bool:
         """Stop the kernel process."""
@@ -927,8 +243,10 @@ while True:
             return True
 
         try:
-            # Try graceful shutdown first
-            self._send_command({"action": "shutdown"})
+            # Try graceful shutdown first. Write directly rather than via
+            # _send_command so a kernel stuck in a long execution can still
+            # be stopped without waiting for the socket lock.
+            self._send_frame({"action": "shutdown"})
             self._process.wait(timeout=5)
         except subprocess.TimeoutExpired:
             # Force kill
@@ -937,7 +255,10 @@ while True:
         except Exception:
             pass
 
+        self._close_socket()
         self._process = None
+        self._kernel_psutil = None
+        self._mem_cache = None
         self._state = "dead"
         self._start_time = None
         print("[KernelManager] Kernel stopped")
@@ -954,48 +275,126 @@ while True:
             return False
         return self._process.poll() is None
 
-    def _send_command(self, cmd: dict, timeout: float = 60.0) -> Optional[dict]:
-        """Send a command to the kernel and get response.
+    def _send_frame(self, cmd: dict) -> None:
+        """Write *cmd* to the kernel as one length-prefixed JSON message."""
+        payload = jsonutil.dumpb(cmd)
+        self._sock.sendall(_FRAME_HEADER.pack(len(payload)) + payload)
 
-        Reads lines from the kernel's stdout until a valid JSON line
-        is found.  Any non-JSON lines (e.g. mantid startup banners or
-        stray log messages that slipped past the redirect) are
-        silently skipped.
+    def _recv_exact(self, size: int, deadline: Optional[float]) -> Optional[bytearray]:
+        """Read exactly *size* bytes from the kernel socket.
+
+        Waits on the selector so the read can time out. Returns ``None`` on
+        EOF and raises ``TimeoutError`` once *deadline* (``time.monotonic()``)
+        passes.
         """
-        if not self.is_alive():
+        buf = bytearray(size)
+        view = memoryview(buf)
+        received = 0
+        while received < size:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise TimeoutError
+            if not self._selector.select(remaining):
+                raise TimeoutError
+            n = self._sock.recv_into(view[received:])
+            if not n:
+                return None
+            received += n
+        return buf
+
+    def _recv_frame(self, deadline: Optional[float]) -> Optional[bytearray]:
+        """Read one framed reply payload from the kernel socket.
+
+        Only the wait for the reply to start is bounded by *deadline*
+        (raising ``TimeoutError``); the kernel writes each frame in one go,
+        so once it arrives it is read whole and the stream stays in step.
+        Returns ``None`` on EOF.
+        """
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self._selector.select(remaining):
+                raise TimeoutError
+        header = self._recv_exact(_FRAME_HEADER.size, None)
+        if header is None:
             return None
+        (size,) = _FRAME_HEADER.unpack(header)
+        return self._recv_exact(size, None)
+
+    def _send_command(
+        self,
+        cmd: dict,
+        timeout: Optional[float] = None,
+        raw: bool = False,
+        kill_on_timeout: bool = False,
+    ) -> Optional[dict | bytes]:
+        """Send a command to the kernel and get response.
 
+        Each reply is a single framed JSON message; ``None`` is returned if
+        the kernel closes the socket (it probably died) or the reply cannot
+        be parsed. With *raw* the reply's JSON bytes are returned undecoded.
+
+        If another command (e.g. a long execution) holds the kernel for more
+        than ``BUSY_WAIT`` seconds, ``KernelBusyError`` is raised without
+        sending, so a request thread is not tied up behind a cell. If no
+        response arrives within *timeout* seconds of sending (``None`` waits
+        indefinitely) an error dict is returned. With *kill_on_timeout* the
+        kernel is killed as well (the next execute() starts a fresh one);
+        otherwise it is left running and the late reply is discarded when it
+        arrives.
+        """
+        # execute() already holds the (re-entrant) lock, so this only
+        # waits when some other command is in progress
+        if not self._exec_lock.acquire(timeout=BUSY_WAIT):
+            raise KernelBusyError(f"Kernel is busy; {cmd.get('action')!r} was not sent")
         try:
-            # Send command
-            self._process.stdin.write(json.dumps(cmd) + "\n")
-            self._process.stdin.flush()
-
-            # Read lines until we get a valid JSON response.
-            # We set a generous upper limit to avoid infinite loops if
-            # the kernel dies or floods garbage.
-            max_lines = 200
-            for _ in range(max_lines):
-                response_line = self._process.stdout.readline()
-                if not response_line:
-                    # EOF — kernel probably died
+            if not self.is_alive():
+                return None
+
+            deadline = None if timeout is None else time.monotonic() + timeout
+            try:
+                self._send_frame(cmd)
+                payload = self._recv_frame(deadline)
+                # Replies arrive in order, so any owed to earlier timed-out
+                # queries come first
+                while payload is not None and self._stale_replies:
+                    self._stale_replies -= 1
+                    payload = self._recv_frame(deadline)
+                if payload is None:
                     return None
-                stripped = response_line.strip()
-                if not stripped:
-                    continue
-                # Fast check: valid JSON responses always start with '{'
-                if not stripped.startswith("{"):
-                    continue
-                try:
-                    return json.loads(stripped)
-                except json.JSONDecodeError:
-                    continue
-            return None
-        except Exception as e:
-            print(f"[KernelManager] Command error: {e}")
-            return None
+                if raw:
+                    return bytes(payload)
+                # Plot/colorfill replies can be megabytes of floats
+                return jsonutil.loads(payload)
+            except TimeoutError:
+                if kill_on_timeout:
+                    print(f"[KernelManager] No response after {timeout:g}s, killing kernel")
+                    self._process.kill()
+                    self._process.wait()
+                    self._close_socket()
+                    self._state = "dead"
+                    message = (
+                        f"Kernel timed out after {timeout:g}s and was stopped; "
+                        "workspaces were lost."
+                    )
+                else:
+                    action = cmd.get("action")
+                    print(f"[KernelManager] No response to {action!r} after {timeout:g}s")
+                    self._stale_replies += 1
+                    message = f"Kernel did not answer within {timeout:g}s; try again later."
+                error = {"success": False, "error": message}
+                return jsonutil.dumpb(error) if raw else error
+            except Exception as e:
+                print(f"[KernelManager] Command error: {e}")
+                return None
+        finally:
+            self._exec_lock.release()
+
+    def execute(self, code: str, timeout: Optional[float] = None) -> ExecutionResult:
+        """Execute code in the kernel.
 
-    def execute(self, code: str, timeout: float = 60.0) -> ExecutionResult:
-        """Execute code in the kernel."""
+        Reductions can legitimately run for a long time, so there is no
+        time limit unless *timeout* (seconds) is given.
+        """
         with self._exec_lock:
             if not self.is_alive():
                 if not self.start():
@@ -1009,7 +408,9 @@ while True:
             start_time = time.time()
 
             try:
-                result = self._send_command({"action": "execute", "code": code}, timeout)
+                result = self._send_command(
+                    {"action": "execute", "code": code}, timeout, kill_on_timeout=True
+                )
                 execution_time = time.time() - start_time
 
                 if result is None:
@@ -1036,6 +437,7 @@ while True:
                     output=output,
                     error=error,
                     execution_time=execution_time,
+                    truncated=result.get("truncated", False),
                 )
             except Exception as e:
                 self._state = "idle" if self.is_alive() else "dead"
@@ -1065,10 +467,29 @@ while True:
         if not self.is_alive():
             return []
 
-        result = self._send_command({"action": "workspaces"})
-        if result is None:
+        result = self._send_command(self._workspaces_command(), QUERY_TIMEOUT)
+        if result is None or result.get("success") is False:
             return []
+        return self._take_workspaces(result)
+
+    def _workspaces_command(self) -> dict:
+        """A ``workspaces`` command that lets the kernel answer "unchanged"."""
+        generation = self._workspaces[0]
+        if generation is None:
+            return {"action": "workspaces"}
+        return {"action": "workspaces", "if_generation_ne": generation}
+
+    def _take_workspaces(self, result: dict) -> list[WorkspaceInfo]:
+        """Return the workspaces from a reply, reusing the cached list if unchanged."""
+        if result.get("unchanged"):
+            return self._workspaces[1]
+        workspaces = self._workspace_infos(result)
+        self._workspaces = (result.get("generation"), workspaces)
+        return workspaces
 
+    @staticmethod
+    def _workspace_infos(result: dict) -> list[WorkspaceInfo]:
+        """Build WorkspaceInfo objects from a ``workspaces`` reply."""
         workspaces = []
         for ws_data in result.get("workspaces", []):
             workspaces.append(
@@ -1097,7 +518,7 @@ while True:
         if not self.is_alive():
             return []
 
-        result = self._send_command({"action": "variables"})
+        result = self._send_command({"action": "variables"}, QUERY_TIMEOUT)
         if result is None:
             return []
 
@@ -1139,52 +560,54 @@ while True:
             {"action": "rename_workspace", "old_name": old_name, "new_name": new_name}
         )
 
-    def workspace_history(self, name: str) -> Optional[dict]:
-        """Get algorithm history for a workspace."""
+    def _query(self, cmd: dict, raw: bool) -> Optional[dict | bytes]:
+        """Send a read-only workspace query.
+
+        With *raw* the reply is returned as the kernel's JSON bytes, so a
+        route can pass it to the client without decoding and re-encoding
+        (plot and table replies can be megabytes of floats).
+        """
         if not self.is_alive():
-            return {"success": False, "error": "Kernel is not running"}
-        return self._send_command({"action": "workspace_history", "name": name})
+            error = {"success": False, "error": "Kernel is not running"}
+            return jsonutil.dumpb(error) if raw else error
+        return self._send_command(cmd, QUERY_TIMEOUT, raw=raw)
+
+    def workspace_history(self, name: str, raw: bool = False) -> Optional[dict | bytes]:
+        """Get algorithm history for a workspace."""
+        return self._query({"action": "workspace_history", "name": name}, raw)
 
     def plot_spectrum(
-        self, name: str, spectra: list[int], max_points: int = 5000
-    ) -> Optional[dict]:
+        self, name: str, spectra: list[int], max_points: int = 5000, raw: bool = False
+    ) -> Optional[dict | bytes]:
         """Extract spectrum data for plotting."""
-        if not self.is_alive():
-            return {"success": False, "error": "Kernel is not running"}
-        return self._send_command(
-            {"action": "plot_spectrum", "name": name, "spectra": spectra, "max_points": max_points}
+        return self._query(
+            {"action": "plot_spectrum", "name": name, "spectra": spectra, "max_points": max_points},
+            raw,
         )
 
-    def plot_colorfill(self, name: str) -> Optional[dict]:
+    def plot_colorfill(self, name: str, raw: bool = False) -> Optional[dict | bytes]:
         """Extract 2D data for colorfill plot."""
-        if not self.is_alive():
-            return {"success": False, "error": "Kernel is not running"}
-        return self._send_command({"action": "plot_colorfill", "name": name})
+        return self._query({"action": "plot_colorfill", "name": name}, raw)
 
     def show_data(
         self, name: str, start_spec: int = 0, num_spec: int = 20,
-        start_bin: int = 0, num_bins: int = 50,
-    ) -> Optional[dict]:
+        start_bin: int = 0, num_bins: int = 50, raw: bool = False,
+    ) -> Optional[dict | bytes]:
         """Extract paginated table data."""
-        if not self.is_alive():
-            return {"success": False, "error": "Kernel is not running"}
-        return self._send_command(
+        return self._query(
             {"action": "show_data", "name": name,
              "start_spec": start_spec, "num_spec": num_spec,
-             "start_bin": start_bin, "num_bins": num_bins}
+             "start_bin": start_bin, "num_bins": num_bins},
+            raw,
         )
 
-    def show_logs(self, name: str) -> Optional[dict]:
+    def show_logs(self, name: str, raw: bool = False) -> Optional[dict | bytes]:
         """Get sample logs from a workspace."""
-        if not self.is_alive():
-            return {"success": False, "error": "Kernel is not running"}
-        return self._send_command({"action": "show_logs", "name": name})
+        return self._query({"action": "show_logs", "name": name}, raw)
 
-    def log_series(self, name: str, log_name: str) -> Optional[dict]:
+    def log_series(self, name: str, log_name: str, raw: bool = False) -> Optional[dict | bytes]:
         """Get time-series data for a specific sample log."""
-        if not self.is_alive():
-            return {"success": False, "error": "Kernel is not running"}
-        return self._send_command({"action": "log_series", "name": name, "log_name": log_name})
+        return self._query({"action": "log_series", "name": name, "log_name": log_name}, raw)
 
     def save_workspace(self, name: str, filepath: str) -> Optional[dict]:
         """Save a workspace to NeXus file."""
@@ -1193,20 +616,54 @@ while True:
         return self._send_command({"action": "save_workspace", "name": name, "filepath": filepath})
 
     def get_memory_info(self) -> MemoryInfo:
-        """Get memory usage information."""
-        # System memory from psutil
-        mem = psutil.virtual_memory()
-        system_total_gb = mem.total / (1024**3)
-        system_used_gb = mem.used / (1024**3)
-        system_percent = mem.percent
+        """Get memory usage information.
+
+        Readings are reused for ``MEMORY_INFO_TTL`` seconds, since each one
+        costs a psutil call and a kernel round trip that sums the size of
+        every workspace.
+        """
+        now = time.monotonic()
+        cached = self._mem_cache
+        if cached is not None and now - cached[0] < MEMORY_INFO_TTL:
+            return cached[1]
 
         # Mantid memory from kernel
         mantid_mb = 0.0
         if self.is_alive():
-            result = self._send_command({"action": "memory"})
+            try:
+                result = self._send_command({"action": "memory"}, QUERY_TIMEOUT)
+            except KernelBusyError:
+                # Mid-cell: the last reading is the best there is
+                if cached is not None:
+                    return cached[1]
+                result = None
             if result:
                 mantid_mb = result.get("mantid_mb", 0.0)
 
+        info = self._memory_info(mantid_mb)
+        self._mem_cache = (now, info)
+        return info
+
+    def _memory_info(self, mantid_mb: float) -> MemoryInfo:
+        """Combine system and kernel-process figures from psutil with the
+        kernel's Mantid usage."""
+        kernel_rss_gb = 0.0
+        kernel_cpu_percent = 0.0
+        proc = self._kernel_psutil
+        if proc is not None and self.is_alive():
+            try:
+                # One /proc read for both values
+                with proc.oneshot():
+                    kernel_rss_gb = proc.memory_info().rss / (1024**3)
+                    kernel_cpu_percent = proc.cpu_percent(None)
+            except psutil.Error:
+                pass
+
+        mem = psutil.virtual_memory()
+        system_total_gb = mem.total / (1024**3)
+        system_used_gb = mem.used / (1024**3)
+        system_percent = mem.percent
+
         mantid_gb = mantid_mb / 1024
         mantid_percent = (mantid_gb / system_total_gb * 100) if system_total_gb > 0 else 0
 
@@ -1216,18 +673,70 @@ while True:
             system_percent=system_percent,
             mantid_used_gb=mantid_gb,
             mantid_percent=mantid_percent,
+            kernel_rss_gb=kernel_rss_gb,
+            kernel_cpu_percent=kernel_cpu_percent,
             warning=system_percent > 85,
             critical=system_percent > 95,
         )
 
+    def get_dashboard_snapshot(self) -> dict:
+        """Get workspaces, variables and memory use in one kernel round trip.
+
+        Returns a dict with ``workspaces`` (list of WorkspaceInfo),
+        ``variables`` (list of dicts) and ``memory`` (MemoryInfo). If the
+        kernel is not running the lists are empty and Mantid usage is zero;
+        while it is busy executing, the previous kernel figures are reused.
+        """
+        if not self.is_alive():
+            self._dashboard_replies = ({}, {})
+            self._workspaces = (None, [])
+        elif self._state != "busy":
+            try:
+                result = self._send_command(
+                    {
+                        "action": "batch",
+                        "requests": [
+                            self._workspaces_command(),
+                            {"action": "variables"},
+                            {"action": "memory"},
+                        ],
+                    },
+                    QUERY_TIMEOUT,
+                )
+            except KernelBusyError:
+                result = None
+            if result and len(result.get("results", ())) == 3:
+                workspaces_reply, variables_reply, memory_reply = result["results"]
+                self._take_workspaces(workspaces_reply)
+                self._dashboard_replies = (variables_reply, memory_reply)
+        # While a cell (or another command) is running the kernel cannot
+        # answer, so the panel keeps showing the last snapshot rather than
+        # waiting for it.
+        variables_reply, memory_reply = self._dashboard_replies
+
+        memory = self._memory_info(memory_reply.get("mantid_mb", 0.0))
+        self._mem_cache = (time.monotonic(), memory)
+        return {
+            "workspaces": self._workspaces[1],
+            "variables": variables_reply.get("variables", []),
+            "memory": memory,
+        }
+
 
 # Global kernel manager instance
 _kernel_manager: Optional[KernelManager] = None
+_kernel_manager_lock = threading.Lock()
 
 
 def get_kernel_manager() -> KernelManager:
-    """Get the global kernel manager instance."""
+    """Get the global kernel manager instance, starting it on first use."""
     global _kernel_manager
-    if _kernel_manager is None:
-        _kernel_manager = KernelManager()
-    return _kernel_manager
+    manager = _kernel_manager
+    if manager is None:
+        # Only the first calls take the lock, so two requests racing at
+        # startup cannot each spawn a kernel.
+        with _kernel_manager_lock:
+            if _kernel_manager is None:
+                _kernel_manager = KernelManager()
+            manager = _kernel_manager
+    return manager
@@ -0,0 +1,978 @@
+"""
+Kernel process for code cells (started by ``KernelManager``).
+
+Runs user code in one persistent namespace and answers JSON commands on the
+UNIX socket inherited from the parent. Every message in either direction is
+a JSON payload preceded by its 4-byte big-endian length. Kept as a module,
+rather than a ``-c`` string, so the interpreter loads it from its cached
+bytecode.
+"""
+
+import collections
+import io
+import itertools
+import json
+import linecache
+import math
+import socket
+import struct
+import sys
+import traceback
+from contextlib import contextmanager
+
+# Try to import mantid - it's optional but desired
+try:
+    from mantid.api import AnalysisDataService as ADS
+    from mantid.simpleapi import *  # noqa: F403
+
+    MANTID_AVAILABLE = True
+except ImportError:
+    MANTID_AVAILABLE = False
+    ADS = None
+
+try:
+    import orjson
+
+    HAS_ORJSON = True
+    _ORJSON_OPTS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+except ImportError:
+    HAS_ORJSON = False
+
+# --- Helpers for IPC over the parent's socket ---
+
+_FRAME_HEADER = struct.Struct(">I")
+
+# Socket to the KernelManager, set by serve()
+_sock = None
+
+
+@contextmanager
+def _suppress_stdout():
+    """Redirect sys.stdout and sys.stderr to a black-hole while
+    calling mantid functions that may emit log messages, so the
+    chatter is not formatted and written for nothing."""
+    sink = io.StringIO()
+    old_out, old_err = sys.stdout, sys.stderr
+    sys.stdout = sink
+    sys.stderr = sink
+    try:
+        yield
+    finally:
+        sys.stdout = old_out
+        sys.stderr = old_err
+
+
+def _safe_float(v):
+    """Convert NaN / Inf to None so json.dumps produces valid JSON."""
+    if isinstance(v, float) and not math.isfinite(v):
+        return None
+    return v
+
+
+def _sanitise(obj):
+    """Recursively walk a dict/list and replace non-finite floats
+    with None so that the JSON is valid for browser JSON.parse.
+    Also convert numpy scalar types to native Python types."""
+    if isinstance(obj, dict):
+        return {k: _sanitise(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_sanitise(v) for v in obj]
+    if isinstance(obj, float):
+        return _safe_float(obj)
+    # Handle numpy scalar types that json.dumps can't serialise
+    try:
+        import numpy as _np
+
+        if isinstance(obj, (_np.integer,)):
+            return int(obj)
+        if isinstance(obj, (_np.floating,)):
+            v = float(obj)
+            return v if math.isfinite(v) else None
+        if isinstance(obj, (_np.bool_,)):
+            return bool(obj)
+        if isinstance(obj, _np.ndarray):
+            return _sanitise(obj.tolist())
+    except ImportError:
+        pass
+    return obj
+
+
+def _recv_exact(size):
+    """Read exactly *size* bytes from the socket, or None on EOF."""
+    buf = bytearray(size)
+    view = memoryview(buf)
+    received = 0
+    while received < size:
+        n = _sock.recv_into(view[received:])
+        if not n:
+            return None
+        received += n
+    return buf
+
+
+def _receive():
+    """Read one framed command payload, or None once the parent has gone."""
+    header = _recv_exact(_FRAME_HEADER.size)
+    if header is None:
+        return None
+    (size,) = _FRAME_HEADER.unpack(header)
+    return _recv_exact(size)
+
+
+def _respond(obj):
+    """Serialise *obj* as one framed JSON message on the socket.
+    Non-finite floats are replaced with null."""
+    payload = None
+    if HAS_ORJSON:
+        # orjson encodes numpy values natively and writes NaN/Inf as null
+        try:
+            payload = orjson.dumps(obj, option=_ORJSON_OPTS)
+        except TypeError:
+            pass
+    if payload is None:
+        payload = json.dumps(_sanitise(obj)).encode()
+    # Gather-write header and payload in one call instead of concatenating
+    # (replies can be megabytes); finish off any short write.
+    header = _FRAME_HEADER.pack(len(payload))
+    sent = _sock.sendmsg([header, payload])
+    if sent < len(header):
+        _sock.sendall(header[sent:])
+        sent = len(header)
+    if sent - len(header) < len(payload):
+        _sock.sendall(memoryview(payload)[sent - len(header) :])
+
+
+# Global namespace for user code
+_user_namespace = {"__name__": "__main__"}
+
+# Pre-populate _user_namespace with mantid star-imports so that
+# when a user runs ``from mantid.simpleapi import *`` in a code cell
+# the resulting names are already in the baseline and get filtered
+# out of the variables pane.
+if MANTID_AVAILABLE:
+    try:
+        exec("from mantid.simpleapi import *", _user_namespace)
+    except Exception:
+        pass
+
+# Snapshot of namespace keys *after* the mantid star-import so all
+# algorithm wrappers and constants are excluded from the variables pane.
+_baseline_keys = set(_user_namespace.keys())
+
+# The ADS and the user namespace only change while a command runs, so the
+# workspace and variable listings are cached per "generation", bumped by
+# every command that can modify them. (ADS.retrieve returns a fresh Python
+# proxy each time, so object ids cannot tell whether a workspace was
+# replaced.)
+_MUTATING_ACTIONS = frozenset({"execute", "delete_workspace", "rename_workspace"})
+_state_generation = 0
+_ws_info_cache = (-1, [])
+_ws_memory_cache = (-1, 0.0)
+_vars_cache = (-1, [])
+
+
+def get_workspace_info():
+    """Get info about all workspaces in ADS.
+
+    Returns a list of dicts with fields matching what Mantid Workbench
+    shows when a workspace node is expanded in the workspace tree.
+    Reused until the next command that can change the ADS.
+    """
+    global _ws_info_cache
+    if not MANTID_AVAILABLE or ADS is None:
+        return []
+    if _ws_info_cache[0] == _state_generation:
+        return _ws_info_cache[1]
+
+    workspaces = []
+    try:
+        for name in ADS.getObjectNames():
+            try:
+                ws = ADS.retrieve(name)
+                info = {
+                    "name": name,
+                    "type": type(ws).__name__,
+                    "num_spectra": 0,
+                    "num_bins": 0,
+                    "memory_mb": 0.0,
+                    "x_unit": "",
+                    "x_unit_label": "",
+                    "y_unit": "",
+                    "distribution": False,
+                    "histogram": False,
+                    "common_bins": True,
+                    "instrument": "",
+                    "run_number": "",
+                    "title": "",
+                }
+
+                # Dimensions
+                if hasattr(ws, "getNumberHistograms"):
+                    info["num_spectra"] = ws.getNumberHistograms()
+                if hasattr(ws, "blocksize"):
+                    try:
+                        info["num_bins"] = ws.blocksize()
+                    except Exception:
+                        info["num_bins"] = 0
+                if hasattr(ws, "getMemorySize"):
+                    info["memory_mb"] = ws.getMemorySize() / (1024 * 1024)
+
+                # Axis units
+                try:
+                    ax0 = ws.getAxis(0)
+                    info["x_unit"] = ax0.getUnit().caption()
+                    info["x_unit_label"] = ax0.getUnit().label()
+                except Exception:
+                    pass
+                try:
+                    info["y_unit"] = ws.YUnitLabel() if hasattr(ws, "YUnitLabel") else ""
+                except Exception:
+                    pass
+
+                # Distribution / histogram / common bins flags
+                try:
+                    info["distribution"] = ws.isDistribution()
+                except Exception:
+                    pass
+                try:
+                    if hasattr(ws, "isHistogramData") and info["num_spectra"] > 0:
+                        info["histogram"] = ws.isHistogramData()
+                except Exception:
+                    pass
+                try:
+                    if hasattr(ws, "isCommonBins"):
+                        info["common_bins"] = ws.isCommonBins()
+                except Exception:
+                    pass
+
+                # Run metadata
+                try:
+                    run = ws.getRun()
+                    if run.hasProperty("run_number"):
+                        info["run_number"] = str(run.getProperty("run_number").value)
+                except Exception:
+                    pass
+                try:
+                    info["title"] = ws.getTitle()
+                except Exception:
+                    pass
+                try:
+                    inst = ws.getInstrument()
+                    if inst:
+                        info["instrument"] = inst.getName()
+                except Exception:
+                    pass
+
+                workspaces.append(info)
+            except Exception:
+                pass
+    except Exception:
+        pass
+
+    _ws_info_cache = (_state_generation, workspaces)
+    return workspaces
+
+
+def get_mantid_memory_mb():
+    """Get total memory used by Mantid workspaces (cached like get_workspace_info)."""
+    global _ws_memory_cache
+    if not MANTID_AVAILABLE or ADS is None:
+        return 0.0
+    if _ws_memory_cache[0] == _state_generation:
+        return _ws_memory_cache[1]
+
+    total = 0.0
+    try:
+        for name in ADS.getObjectNames():
+            try:
+                ws = ADS.retrieve(name)
+                if hasattr(ws, "getMemorySize"):
+                    total += ws.getMemorySize() / (1024 * 1024)
+            except Exception:
+                pass
+    except Exception:
+        pass
+
+    _ws_memory_cache = (_state_generation, total)
+    return total
+
+
+def get_namespace_vars():
+    """Get list of user-defined variables in the namespace.
+
+    Filters out:
+      - private names (starting with _)
+      - names that were in the namespace before any user code ran
+      - callable objects originating from mantid (algorithm wrappers
+        injected by ``from mantid.simpleapi import *``)
+      - modules
+
+    Reused until the next command that can change the namespace.
+    """
+    global _vars_cache
+    if _vars_cache[0] == _state_generation:
+        return _vars_cache[1]
+    import types as _types
+
+    vars_list = []
+    for name, val in _user_namespace.items():
+        if name in _baseline_keys or name.startswith("_"):
+            continue
+        # Skip modules
+        if isinstance(val, _types.ModuleType):
+            continue
+        # Skip mantid algorithm wrappers (callable + mantid module origin)
+        if callable(val):
+            mod = getattr(val, "__module__", "") or ""
+            if "mantid" in mod:
+                continue
+        vars_list.append(
+            {
+                "name": name,
+                "type": type(val).__name__,
+            }
+        )
+    _vars_cache = (_state_generation, vars_list)
+    return vars_list
+
+
+# Upper bound on captured output per execution (characters), so a cell
+# that prints in a loop can't exhaust memory here or in the server.
+MAX_OUTPUT_CHARS = 1 << 20
+
+
+class _BoundedOutput(io.TextIOBase):
+    """stdout/stderr sink that keeps the first and last MAX_OUTPUT_CHARS/2
+    characters and counts what it drops in between."""
+
+    def __init__(self, limit=MAX_OUTPUT_CHARS):
+        self._half = limit // 2
+        self._head = []
+        self._head_size = 0
+        self._tail = collections.deque()
+        self._tail_size = 0
+        self.dropped = 0
+
+    def writable(self):
+        return True
+
+    def write(self, s):
+        n = len(s)
+        if self._head_size < self._half:
+            take = s[: self._half - self._head_size]
+            self._head.append(take)
+            self._head_size += len(take)
+            s = s[len(take) :]
+        if s:
+            self._tail.append(s)
+            self._tail_size += len(s)
+            while self._tail_size > self._half:
+                excess = self._tail_size - self._half
+                first = self._tail[0]
+                if len(first) <= excess:
+                    self._tail.popleft()
+                    self._tail_size -= len(first)
+                    self.dropped += len(first)
+                else:
+                    self._tail[0] = first[excess:]
+                    self._tail_size -= excess
+                    self.dropped += excess
+        return n
+
+    def getvalue(self):
+        parts = self._head
+        if self.dropped:
+            parts = parts + [f"\n[... {self.dropped} characters of output truncated ...]\n"]
+        return "".join(parts) + "".join(self._tail)
+
+
+# Compiled cells, most recently used last: source -> code object
+_CELL_CACHE_SIZE = 256
+_cell_cache = collections.OrderedDict()
+_cell_ids = itertools.count(1)
+
+
+def _compile_cell(code):
+    """Compile a cell once; re-running an unchanged cell reuses the code object.
+
+    Each distinct cell gets its own ``<cell N>`` filename whose source is
+    registered with linecache, so tracebacks show the offending lines.
+    """
+    co = _cell_cache.get(code)
+    if co is not None:
+        _cell_cache.move_to_end(code)
+        return co
+    filename = f"<cell {next(_cell_ids)}>"
+    co = compile(code, filename, "exec")
+    # mtime None: linecache.checkcache() leaves the entry alone
+    linecache.cache[filename] = (len(code), None, code.splitlines(True), filename)
+    _cell_cache[code] = co
+    if len(_cell_cache) > _CELL_CACHE_SIZE:
+        _, evicted = _cell_cache.popitem(last=False)
+        linecache.cache.pop(evicted.co_filename, None)
+    return co
+
+
+def execute_code(code):
+    """Execute code and return result."""
+    stdout_capture = _BoundedOutput()
+    old_stdout = sys.stdout
+    old_stderr = sys.stderr
+
+    try:
+        sys.stdout = stdout_capture
+        sys.stderr = stdout_capture
+
+        exec(_compile_cell(code), _user_namespace)
+
+        return {
+            "success": True,
+            "output": stdout_capture.getvalue(),
+            "error": None,
+            "truncated": bool(stdout_capture.dropped),
+        }
+    except Exception:
+        return {
+            "success": False,
+            "output": stdout_capture.getvalue(),
+            "error": traceback.format_exc(),
+            "truncated": bool(stdout_capture.dropped),
+        }
+    finally:
+        sys.stdout = old_stdout
+        sys.stderr = old_stderr
+
+
+# -----------------------------------------------------------------
+# Workspace interactivity helpers
+# -----------------------------------------------------------------
+
+
+def rename_workspace(old_name, new_name):
+    """Rename a workspace in the ADS."""
+    if not MANTID_AVAILABLE or ADS is None:
+        return {"success": False, "error": "Mantid not available"}
+    if not ADS.doesExist(old_name):
+        return {"success": False, "error": f'Workspace "{old_name}" not found'}
+    try:
+        RenameWorkspace(InputWorkspace=old_name, OutputWorkspace=new_name)  # noqa: F405
+        return {"success": True, "old_name": old_name, "new_name": new_name}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def get_algorithm_history(ws_name):
+    """Get the algorithm history of a workspace."""
+    if not MANTID_AVAILABLE or ADS is None:
+        return {"success": False, "error": "Mantid not available"}
+    if not ADS.doesExist(ws_name):
+        return {"success": False, "error": f'Workspace "{ws_name}" not found'}
+    try:
+        ws = ADS.retrieve(ws_name)
+        history = ws.getHistory()
+        items = []
+        for i in range(history.size()):
+            alg_hist = history.getAlgorithmHistory(i)
+            props = []
+            for prop in alg_hist.getProperties():
+                if not prop.isDefault():
+                    props.append({"name": prop.name(), "value": prop.value()})
+            items.append(
+                {
+                    "name": alg_hist.name(),
+                    "version": alg_hist.version(),
+                    "execution_date": str(alg_hist.executionDate()),
+                    "duration": alg_hist.executionDuration(),
+                    "properties": props,
+                }
+            )
+        return {"success": True, "name": ws_name, "history": items}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def extract_spectrum_data(ws_name, spectra, max_points=5000):
+    """Extract X/Y/E data for given spectrum indices.
+
+    spectra: list of int spectrum indices.
+    Returns dict with traces list [{x, y, e, spectrum_index, label}].
+    """
+    if not MANTID_AVAILABLE or ADS is None:
+        return {"success": False, "error": "Mantid not available"}
+    if not ADS.doesExist(ws_name):
+        return {"success": False, "error": f'Workspace "{ws_name}" not found'}
+    try:
+        ws = ADS.retrieve(ws_name)
+        n_hist = ws.getNumberHistograms()
+        n_bins = ws.blocksize()
+
+        # Axis labels
+        x_unit = ws.getAxis(0).getUnit().caption()
+        x_unit_label = ws.getAxis(0).getUnit().label()
+        y_unit = ws.YUnitLabel() if hasattr(ws, "YUnitLabel") else "Counts"
+
+        traces = []
+        for si in spectra:
+            if si < 0 or si >= n_hist:
+                continue
+            x = ws.readX(si)
+            y = ws.readY(si)
+            e = ws.readE(si)
+
+            # Bin-centre X for histograms
+            if len(x) == len(y) + 1:
+                x = [(x[j] + x[j + 1]) / 2.0 for j in range(len(y))]
+            else:
+                x = list(x)
+            y = list(y)
+            e = list(e)
+
+            # Downsample if too large
+            step = max(1, len(y) // max_points)
+            if step > 1:
+                x = x[::step]
+                y = y[::step]
+                e = e[::step]
+
+            # Filter NaN/Inf
+            clean_x, clean_y, clean_e = [], [], []
+            for xi, yi, ei in zip(x, y, e):
+                if math.isfinite(yi):
+                    clean_x.append(xi)
+                    clean_y.append(yi)
+                    clean_e.append(ei)
+
+            traces.append(
+                {
+                    "x": clean_x,
+                    "y": clean_y,
+                    "e": clean_e,
+                    "spectrum_index": si,
+                    "label": f"Spectrum {si}",
+                }
+            )
+
+        return {
+            "success": True,
+            "name": ws_name,
+            "traces": traces,
+            "x_label": f"{x_unit} ({x_unit_label})" if x_unit_label else x_unit,
+            "y_label": y_unit,
+            "num_spectra": n_hist,
+            "num_bins": n_bins,
+        }
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def extract_colorfill_data(ws_name, max_spectra=500, max_bins=2000):
+    """Extract 2D array for colorfill plot.
+
+    Returns dict with z (2D array), x (common bin centres), y (spectrum indices),
+    axis labels, and data_min/data_max for autoscaling.
+
+    Out-of-range values (e.g. d-spacings that don't exist for a given
+    pixel) are represented as NaN so Plotly renders them as gaps (white).
+
+    If the workspace has non-uniform X axes (e.g. after ConvertUnits to
+    dSpacing), the data is rebinned onto a common X grid so Plotly's
+    heatmap can render it correctly.
+    """
+    if not MANTID_AVAILABLE or ADS is None:
+        return {"success": False, "error": "Mantid not available"}
+    if not ADS.doesExist(ws_name):
+        return {"success": False, "error": f'Workspace "{ws_name}" not found'}
+    try:
+        import numpy as np
+
+        ws = ADS.retrieve(ws_name)
+        n_hist = ws.getNumberHistograms()
+        n_bins = ws.blocksize()
+
+        # Axis labels
+        x_unit = ws.getAxis(0).getUnit().caption()
+        x_unit_label = ws.getAxis(0).getUnit().label()
+        y_unit = "Spectrum Index"
+
+        # Downsample spectra if needed
+        spec_step = max(1, n_hist // max_spectra)
+        spec_indices = list(range(0, n_hist, spec_step))
+
+        common_bins = ws.isCommonBins()
+
+        if common_bins:
+            # ---- Fast path: all spectra share the same X axis ----
+            bin_step = max(1, n_bins // max_bins)
+            x0 = ws.readX(0)
+            if len(x0) == n_bins + 1:
+                x = [(x0[j] + x0[j + 1]) / 2.0 for j in range(0, n_bins, bin_step)]
+            else:
+                x = list(x0[::bin_step])
+
+            z = []
+            for si in spec_indices:
+                row = list(ws.readY(si)[::bin_step])
+                z.append(row)
+        else:
+            # ---- Ragged bins: rebin onto a common X grid ----
+            # 1. Find global X range from sampled spectra
+            x_min = float("inf")
+            x_max = float("-inf")
+            for si in spec_indices:
+                xi = ws.readX(si)
+                lo = float(xi[0])
+                hi = float(xi[-1])
+                if lo < x_min:
+                    x_min = lo
+                if hi > x_max:
+                    x_max = hi
+
+            # 2. Build common bin-centre grid
+            n_common = min(n_bins, max_bins)
+            x = np.linspace(x_min, x_max, n_common).tolist()
+
+            # 3. For each spectrum, interpolate Y onto the common grid.
+            #    Values outside a spectrum's own X range → NaN (gap).
+            z = []
+            for si in spec_indices:
+                xi = np.array(ws.readX(si))
+                yi = np.array(ws.readY(si))
+                # Compute bin centres if histogram
+                if len(xi) == len(yi) + 1:
+                    xi = (xi[:-1] + xi[1:]) / 2.0
+                # Interpolate; out-of-range → NaN (rendered as white gap)
+                row = np.interp(x, xi, yi, left=float("nan"), right=float("nan"))
+                z.append(row.tolist())
+
+        # Compute data_min/data_max from real data (excluding NaN).
+        # Use numpy for speed — the z list can be huge.
+        z_arr = np.array(z, dtype=np.float64)
+        finite_vals = z_arr[np.isfinite(z_arr)]
+        if finite_vals.size > 0:
+            data_min = float(finite_vals.min())
+            data_max = float(finite_vals.max())
+        else:
+            data_min = 0.0
+            data_max = 1.0
+
+        return {
+            "success": True,
+            "name": ws_name,
+            "z": z,
+            "x": x,
+            "y": spec_indices,
+            "x_label": f"{x_unit} ({x_unit_label})" if x_unit_label else x_unit,
+            "y_label": y_unit,
+            "num_spectra": n_hist,
+            "num_bins": n_bins,
+            "common_bins": common_bins,
+            "data_min": data_min,
+            "data_max": data_max,
+        }
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def extract_table_data(ws_name, start_spec=0, num_spec=20, start_bin=0, num_bins=50):
+    """Extract a page of X/Y/E data for table view.
+
+    Returns dict with columns and rows for the requested slice.
+    Supports paging through both spectra (rows) and bins (columns).
+    """
+    if not MANTID_AVAILABLE or ADS is None:
+        return {"success": False, "error": "Mantid not available"}
+    if not ADS.doesExist(ws_name):
+        return {"success": False, "error": f'Workspace "{ws_name}" not found'}
+    try:
+        ws = ADS.retrieve(ws_name)
+        n_hist = ws.getNumberHistograms()
+        n_bins = ws.blocksize()
+
+        end_spec = min(start_spec + num_spec, n_hist)
+        end_bin = min(start_bin + num_bins, n_bins)
+
+        rows = []
+        for si in range(start_spec, end_spec):
+            x = ws.readX(si)
+            y = ws.readY(si)
+            e = ws.readE(si)
+
+            # Bin centres for histograms
+            if len(x) == len(y) + 1:
+                x = [(x[j] + x[j + 1]) / 2.0 for j in range(len(y))]
+            else:
+                x = list(x)
+
+            # Slice to the requested bin window
+            rows.append(
+                {
+                    "spectrum": si,
+                    "x": list(x[start_bin:end_bin]),
+                    "y": list(y[start_bin:end_bin]),
+                    "e": list(e[start_bin:end_bin]),
+                }
+            )
+
+        return {
+            "success": True,
+            "name": ws_name,
+            "rows": rows,
+            "start_spec": start_spec,
+            "end_spec": end_spec,
+            "num_spectra": n_hist,
+            "num_bins": n_bins,
+            "start_bin": start_bin,
+            "end_bin": end_bin,
+        }
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def extract_sample_logs(ws_name):
+    """Extract sample log names, types, and values from a workspace."""
+    if not MANTID_AVAILABLE or ADS is None:
+        return {"success": False, "error": "Mantid not available"}
+    if not ADS.doesExist(ws_name):
+        return {"success": False, "error": f'Workspace "{ws_name}" not found'}
+    try:
+        ws = ADS.retrieve(ws_name)
+        run = ws.run()
+        logs = []
+        for prop in run.getProperties():
+            log_info = {
+                "name": prop.name,
+                "type": type(prop).__name__,
+                "units": prop.units if hasattr(prop, "units") else "",
+            }
+            # Scalar or short string values
+            if hasattr(prop, "value"):
+                val = prop.value
+                if isinstance(val, (int, float, bool)):
+                    log_info["value"] = val
+                    log_info["is_series"] = False
+                elif isinstance(val, str) and len(val) < 200:
+                    log_info["value"] = val
+                    log_info["is_series"] = False
+                else:
+                    log_info["is_series"] = True
+                    log_info["size"] = len(val) if hasattr(val, "__len__") else 0
+            else:
+                log_info["is_series"] = False
+                log_info["value"] = str(prop)[:200]
+            logs.append(log_info)
+
+        return {"success": True, "name": ws_name, "logs": logs}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def extract_log_series(ws_name, log_name):
+    """Extract time-series data for a specific sample log."""
+    if not MANTID_AVAILABLE or ADS is None:
+        return {"success": False, "error": "Mantid not available"}
+    if not ADS.doesExist(ws_name):
+        return {"success": False, "error": f'Workspace "{ws_name}" not found'}
+    try:
+        ws = ADS.retrieve(ws_name)
+        run = ws.run()
+        prop = run.getProperty(log_name)
+
+        times = prop.times  # numpy array of datetime64
+        values = prop.value  # numpy array of values
+
+        # Convert to JSON-serialisable lists
+        # times -> ISO strings
+        import numpy as np
+
+        t_list = []
+        for t in times:
+            # DateAndTime objects -> string
+            t_list.append(str(t))
+        v_list = [float(v) if np.isfinite(v) else None for v in values]
+
+        return {
+            "success": True,
+            "name": ws_name,
+            "log_name": log_name,
+            "times": t_list,
+            "values": v_list,
+            "units": prop.units if hasattr(prop, "units") else "",
+        }
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def save_workspace_nexus(ws_name, filepath):
+    """Save a workspace to a NeXus file."""
+    if not MANTID_AVAILABLE or ADS is None:
+        return {"success": False, "error": "Mantid not available"}
+    if not ADS.doesExist(ws_name):
+        return {"success": False, "error": f'Workspace "{ws_name}" not found'}
+    try:
+        SaveNexus(InputWorkspace=ws_name, Filename=filepath)  # noqa: F405
+        return {"success": True, "name": ws_name, "path": filepath}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def _dispatch(cmd):
+    """Run one command and return its reply (not yet sent)."""
+    global _state_generation
+    action = cmd.get("action")
+    if action in _MUTATING_ACTIONS:
+        _state_generation += 1
+
+    if action == "execute":
+        code = cmd.get("code", "")
+        result = execute_code(code)
+        return {"type": "result", **result}
+
+    elif action == "workspaces":
+        # The caller already holds the listing for this generation
+        if cmd.get("if_generation_ne") == _state_generation:
+            return {"type": "workspaces", "unchanged": True, "generation": _state_generation}
+        with _suppress_stdout():
+            workspaces = get_workspace_info()
+        return {"type": "workspaces", "workspaces": workspaces, "generation": _state_generation}
+
+    elif action == "variables":
+        variables = get_namespace_vars()
+        return {"type": "variables", "variables": variables}
+
+    elif action == "memory":
+        with _suppress_stdout():
+            memory_mb = get_mantid_memory_mb()
+        return {"type": "memory", "mantid_mb": memory_mb}
+
+    elif action == "delete_workspace":
+        ws_name = cmd.get("name", "")
+        if MANTID_AVAILABLE and ADS is not None and ws_name:
+            try:
+                with _suppress_stdout():
+                    exists = ADS.doesExist(ws_name)
+                    if exists:
+                        ADS.remove(ws_name)
+                if exists:
+                    return {"type": "deleted", "name": ws_name, "success": True}
+                else:
+                    return {
+                        "type": "deleted",
+                        "name": ws_name,
+                        "success": False,
+                        "error": "Workspace not found",
+                    }
+            except Exception as e:
+                return {"type": "deleted", "name": ws_name, "success": False, "error": str(e)}
+        else:
+            return {
+                "type": "deleted",
+                "name": ws_name,
+                "success": False,
+                "error": "Mantid not available or no name provided",
+            }
+
+    elif action == "rename_workspace":
+        with _suppress_stdout():
+            result = rename_workspace(cmd.get("old_name", ""), cmd.get("new_name", ""))
+        return {"type": "renamed", **result}
+
+    elif action == "workspace_history":
+        with _suppress_stdout():
+            result = get_algorithm_history(cmd.get("name", ""))
+        return {"type": "history", **result}
+
+    elif action == "plot_spectrum":
+        with _suppress_stdout():
+            result = extract_spectrum_data(
+                cmd.get("name", ""),
+                cmd.get("spectra", [0]),
+                cmd.get("max_points", 5000),
+            )
+        return {"type": "plot_spectrum", **result}
+
+    elif action == "plot_colorfill":
+        with _suppress_stdout():
+            result = extract_colorfill_data(
+                cmd.get("name", ""),
+                cmd.get("max_spectra", 500),
+                cmd.get("max_bins", 2000),
+            )
+        return {"type": "plot_colorfill", **result}
+
+    elif action == "show_data":
+        with _suppress_stdout():
+            result = extract_table_data(
+                cmd.get("name", ""),
+                cmd.get("start_spec", 0),
+                cmd.get("num_spec", 20),
+                cmd.get("start_bin", 0),
+                cmd.get("num_bins", 50),
+            )
+        return {"type": "show_data", **result}
+
+    elif action == "show_logs":
+        with _suppress_stdout():
+            result = extract_sample_logs(cmd.get("name", ""))
+        return {"type": "show_logs", **result}
+
+    elif action == "log_series":
+        with _suppress_stdout():
+            result = extract_log_series(cmd.get("name", ""), cmd.get("log_name", ""))
+        return {"type": "log_series", **result}
+
+    elif action == "save_workspace":
+        with _suppress_stdout():
+            result = save_workspace_nexus(cmd.get("name", ""), cmd.get("filepath", ""))
+        return {"type": "saved", **result}
+
+    elif action == "batch":
+        # Several commands answered in one reply; each gets its own result
+        # (or error) so one failure does not lose the others.
+        results = []
+        for sub in cmd.get("requests", []):
+            if sub.get("action") in ("batch", "shutdown"):
+                msg = f"'{sub.get('action')}' cannot be batched"
+                results.append({"type": "error", "error": msg})
+                continue
+            try:
+                results.append(_dispatch(sub))
+            except Exception as e:
+                results.append({"type": "error", "error": str(e)})
+        return {"type": "batch", "results": results}
+
+    elif action == "ping":
+        return {"type": "pong"}
+
+    else:
+        return {"type": "error", "error": f"Unknown action: {action}"}
+
+
+def serve(fd):
+    """Main loop - answer framed JSON commands on the socket *fd*."""
+    # ALL responses go through _respond() which:
+    #   1. Frames each reply with its length on the parent's socket
+    #   2. Sanitises NaN/Inf to null for valid JSON
+    # ALL mantid-touching operations are wrapped in _suppress_stdout()
+    # to keep stray log messages out of the way.
+    global _sock
+    _sock = socket.socket(fileno=fd)
+    while True:
+        try:
+            payload = _receive()
+            if payload is None:
+                break
+
+            cmd = orjson.loads(payload) if HAS_ORJSON else json.loads(payload)
+            if cmd.get("action") == "shutdown":
+                _respond({"type": "shutdown", "success": True})
+                break
+            _respond(_dispatch(cmd))
+
+        except json.JSONDecodeError as e:
+            _respond({"type": "error", "error": f"Invalid JSON: {e}"})
+        except Exception as e:
+            _respond({"type": "error", "error": str(e)})
+
+
+if __name__ == "__main__":
+    serve(int(sys.argv[1]))
@@ -11,11 +11,16 @@ All instrument-specific path logic is delegated to the active
 
 from __future__ import annotations
 
+import os
+import time
 from dataclasses import dataclass, field
 from datetime import datetime
+from functools import cached_property
 from pathlib import Path
 from typing import Any
 
+import numpy as np
+
 # Optional h5py import – gracefully degrade if not available
 try:
     import h5py
@@ -24,10 +29,21 @@ try:
 except ImportError:
     HAS_H5PY = False
 
+# Optional finddata (SNS file-location service) – only consulted as a last resort
+try:
+    from finddata import cli as finddata_cli
+
+    HAS_FINDDATA = True
+except ImportError:
+    HAS_FINDDATA = False
+
 
-@dataclass
+@dataclass(frozen=True)
 class RunMetadata:
-    """Structured metadata for a single neutron run."""
+    """Structured metadata for a single neutron run.
+
+    Frozen, so the display strings are computed once per instance.
+    """
 
     run_number: int
     title: str = ""
@@ -42,7 +58,7 @@ class RunMetadata:
     # Additional fields (can be extended)
     extras: dict[str, Any] = field(default_factory=dict)
 
-    @property
+    @cached_property
     def file_size_display(self) -> str:
         """Human-readable file size."""
         size = self.file_size_bytes
@@ -52,7 +68,7 @@ class RunMetadata:
             size /= 1024
         return f"{size:.2f} PB"
 
-    @property
+    @cached_property
     def duration_display(self) -> str:
         """Human-readable duration."""
         sec = self.duration
@@ -63,7 +79,7 @@ class RunMetadata:
         else:
             return f"{sec / 3600:.1f} hours"
 
-    @property
+    @cached_property
     def count_rate_display(self) -> str:
         """Count rate in ME/s (million events per second)."""
         if self.duration > 0:
@@ -71,12 +87,12 @@ class RunMetadata:
             return f"{rate:.3f} ME/s"
         return "N/A"
 
-    @property
+    @cached_property
     def start_time_formatted(self) -> str:
         """Format start time for display."""
         return self._format_timestamp(self.start_time)
 
-    @property
+    @cached_property
     def end_time_formatted(self) -> str:
         """Format end time for display."""
         return self._format_timestamp(self.end_time)
@@ -90,6 +106,16 @@ class RunMetadata:
             ts = ts.decode("utf-8")
         # Strip timezone suffix if present (e.g., "-05:00:00")
         # Format: "2026-01-30T10:00:00-05:00:00"
+        # Fast path: the fixed-width NeXus layout only needs re-slicing
+        if (
+            len(ts) >= 19
+            and ts[4] == ts[7] == "-"
+            and ts[10] == "T"
+            and ts[13] == ts[16] == ":"
+            and ts[:4].isdigit()
+            and (ts[5:7] + ts[8:10] + ts[11:13] + ts[14:16] + ts[17:19]).isdigit()
+        ):
+            return f"{ts[:10]} {ts[11:19]}"
         try:
             # Try parsing just the date and time portion
             dt_str = ts[:19]  # "YYYY-MM-DDTHH:MM:SS"
@@ -137,6 +163,48 @@ def _get_instrument():
         return get_instrument(os.environ.get("NEUTRONOTE_INSTRUMENT", "SNAP"))
 
 
+# Found NeXus paths are reused for NEXUS_LOOKUP_TTL seconds; misses only for
+# NEXUS_MISS_TTL, so a run that has just been written shows up quickly.
+NEXUS_LOOKUP_TTL = 60  # seconds
+NEXUS_MISS_TTL = 5  # seconds
+NEXUS_LOOKUP_CACHE_SIZE = 4096
+# (instrument name, data root, run number, ipts) -> (expiry, path or None)
+_NEXUS_LOOKUP_CACHE: dict[tuple, tuple[float, Path | None]] = {}
+# data root -> (expiry, IPTS folder paths newest first), for the fallback scan
+_IPTS_DIRS_CACHE: dict[str, tuple[float, list[str]]] = {}
+
+
+def clear_nexus_lookup_cache() -> None:
+    """Forget cached NeXus file locations and IPTS folder listings."""
+    _NEXUS_LOOKUP_CACHE.clear()
+    _IPTS_DIRS_CACHE.clear()
+
+
+def _ipts_dirs(base: Path) -> list[str]:
+    """``IPTS-<n>`` folders under *base*, highest number first.
+
+    Listed at most once per ``NEXUS_LOOKUP_TTL``. Sorted by the numeric
+    suffix, so IPTS-10000 comes before IPTS-9999.
+    """
+    now = time.monotonic()
+    hit = _IPTS_DIRS_CACHE.get(str(base))
+    if hit is not None and hit[0] > now:
+        return hit[1]
+    try:
+        with os.scandir(base) as it:
+            entries = [
+                (int(e.name[5:]), e.path)
+                for e in it
+                if e.name.startswith("IPTS-") and e.name[5:].isdigit() and e.is_dir()
+            ]
+    except OSError:
+        entries = []
+    entries.sort(reverse=True)
+    dirs = [path for _, path in entries]
+    _IPTS_DIRS_CACHE[str(base)] = (now + NEXUS_LOOKUP_TTL, dirs)
+    return dirs
+
+
 def find_nexus_file(run_number: int, ipts: str | None = None) -> Path | None:
     """
     Locate the NeXus file for a given run number.
@@ -152,19 +220,34 @@ def find_nexus_file(run_number: int, ipts: str | None = None) -> Path | None:
     Search order (prefers native files for complete metadata):
     1. Full NeXus: ``<data_root>/<IPTS>/nexus/<INSTR>_<run>.nxs.h5``
     2. Lite NeXus: ``<data_root>/<IPTS>/shared/lite/<INSTR>_<run>.lite.nxs.h5``
+    3. The same two paths in every other IPTS folder, newest first.
+    4. The finddata service, if installed.
 
-    Uses finddata CLI if available, otherwise scans known IPTS folders.
+    Results are cached per instrument (see ``NEXUS_LOOKUP_TTL`` and
+    ``NEXUS_MISS_TTL``); ``clear_nexus_lookup_cache()`` drops them.
     """
+    instrument = _get_instrument()
+    key = (instrument.name, str(instrument.data_root), run_number, ipts)
+    now = time.monotonic()
+    hit = _NEXUS_LOOKUP_CACHE.get(key)
+    if hit is not None and hit[0] > now:
+        return hit[1]
 
-    def _path_exists_safe(p: Path) -> bool:
-        """Check if path exists, returning False on permission errors."""
-        try:
-            return p.exists()
-        except OSError:
-            # PermissionError, etc. – treat as "not accessible"
-            return False
+    path = _find_nexus_file_uncached(instrument, run_number, ipts)
+    ttl = NEXUS_LOOKUP_TTL if path is not None else NEXUS_MISS_TTL
+    if len(_NEXUS_LOOKUP_CACHE) >= NEXUS_LOOKUP_CACHE_SIZE:
+        _NEXUS_LOOKUP_CACHE.clear()
+    _NEXUS_LOOKUP_CACHE[key] = (now + ttl, path)
+    return path
+
+
+def _find_nexus_file_uncached(instrument, run_number: int, ipts: str | None) -> Path | None:
+    """Search the filesystem for a run's NeXus file (see ``find_nexus_file``)."""
+
+    def _path_exists_safe(p) -> bool:
+        """Check if path exists; unreadable locations count as missing."""
+        return os.access(p, os.F_OK)
 
-    instrument = _get_instrument()
     base = instrument.data_root
 
     # If IPTS is specified, check that folder first
@@ -180,32 +263,31 @@ def find_nexus_file(run_number: int, ipts: str | None = None) -> Path | None:
             if _path_exists_safe(lite_path):
                 return lite_path
 
-    # Try using finddata CLI
-    try:
-        from finddata import cli
-
-        facility, instr_name = instrument.finddata_args()
-        record = cli.getFileLoc(facility, instr_name, [run_number])
-        native_path = Path(record["location"])
-        if _path_exists_safe(native_path):
-            return native_path
-    except Exception:
-        pass
-
-    # Fallback: scan common IPTS locations
-    if not _path_exists_safe(base):
-        return None
-
-    # Look through IPTS folders
-    for ipts_dir in sorted(base.glob("IPTS-*"), reverse=True):
-        # Try native first (has complete metadata)
-        native_path = ipts_dir / "nexus" / instrument.nexus_filename(run_number)
-        if _path_exists_safe(native_path):
-            return native_path
-        # Then lite as fallback
-        lite_path = ipts_dir / "shared" / "lite" / instrument.lite_nexus_filename(run_number)
-        if _path_exists_safe(lite_path):
-            return lite_path
+    # Probe the canonical locations in each IPTS folder (newest first);
+    # plain stats are much cheaper than a finddata query
+    if _path_exists_safe(base):
+        native_name = instrument.nexus_filename(run_number)
+        lite_name = instrument.lite_nexus_filename(run_number)
+        for ipts_dir in _ipts_dirs(base):
+            # Try native first (has complete metadata)
+            native_path = os.path.join(ipts_dir, "nexus", native_name)
+            if _path_exists_safe(native_path):
+                return Path(native_path)
+            # Then lite as fallback
+            lite_path = os.path.join(ipts_dir, "shared", "lite", lite_name)
+            if _path_exists_safe(lite_path):
+                return Path(lite_path)
+
+    # Last resort: ask finddata, for files outside the usual layout
+    if HAS_FINDDATA:
+        try:
+            facility, instr_name = instrument.finddata_args()
+            record = finddata_cli.getFileLoc(facility, instr_name, [run_number])
+            native_path = Path(record["location"])
+            if _path_exists_safe(native_path):
+                return native_path
+        except Exception:
+            pass
 
     return None
 
@@ -241,37 +323,37 @@ def get_run_metadata_from_file(file_path: str | Path) -> RunMetadata:
         run_number = parsed
 
     try:
-        with h5py.File(path, "r") as f:
+        # Only a few scalars are read, so skip the raw-data chunk cache
+        with h5py.File(path, "r", rdcc_nbytes=0) as f:
+            # Resolve the entry group once rather than walking the path per field
+            entry = f.get("entry")
+
             # Helper to safely read HDF5 datasets
             # NeXus files store values as 1-element numpy arrays
             def read_value(key: str, default=None):
+                if entry is None:
+                    return default
                 try:
-                    ds = f.get(key)
+                    ds = entry.get(key)
                     if ds is None:
                         return default
-                    # Get the raw value
-                    raw = ds[()]
-                    # Handle numpy arrays (common in NeXus: shape (1,))
-                    if hasattr(raw, "__len__") and len(raw) > 0:
-                        v = raw[0]
-                    else:
-                        v = raw
-                    # Decode bytes to string
+                    v = ds[()]
+                    if isinstance(v, np.ndarray):
+                        if v.size == 0:
+                            return default
+                        v = v.flat[0]
                     if isinstance(v, bytes):
-                        return v.decode("utf-8")
-                    # Convert numpy types to Python types
-                    if hasattr(v, "item"):
-                        return v.item()
-                    return v
+                        return v.decode("utf-8", "replace")
+                    # Convert numpy scalars to Python types
+                    return v.item() if isinstance(v, np.generic) else v
                 except Exception:
-                    pass
-                return default
-
-            title = read_value("entry/title", "")
-            start_time = read_value("entry/start_time", "")
-            end_time = read_value("entry/end_time", "")
-            duration = read_value("entry/duration", 0.0)
-            total_counts = read_value("entry/total_counts", 0)
+                    return default
+
+            title = read_value("title", "")
+            start_time = read_value("start_time", "")
+            end_time = read_value("end_time", "")
+            duration = read_value("duration", 0.0)
+            total_counts = read_value("total_counts", 0)
 
             file_size = path.stat().st_size
 
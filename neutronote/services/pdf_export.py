@@ -6,7 +6,6 @@ Uses fpdf2 for lightweight, pure-Python PDF generation.
 
 from __future__ import annotations
 
-import json
 import logging
 import os
 import re
@@ -16,6 +15,8 @@ from typing import Any
 
 from fpdf import FPDF
 
+from .. import jsonutil
+
 logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
@@ -41,9 +42,13 @@ TYPE_COLOURS = {
 }
 
 
+_HTML_TAG_RE = re.compile(r"<[^>]+>")
+_CONTROL_CHARS_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
 def _strip_html(text: str) -> str:
     """Remove HTML tags from text."""
-    return re.sub(r"<[^>]+>", "", text or "")
+    return _HTML_TAG_RE.sub("", text or "")
 
 
 def _safe_text(text: str) -> str:
@@ -51,7 +56,7 @@ def _safe_text(text: str) -> str:
     if not text:
         return ""
     # fpdf2 handles UTF-8 well, but strip control chars
-    return re.sub(r"[\x00-\x08\x0b\x0c\x0e-\x1f]", "", text)
+    return _CONTROL_CHARS_RE.sub("", text)
 
 
 class NotebookPDF(FPDF):
@@ -153,8 +158,8 @@ class NotebookPDF(FPDF):
     def _render_header_entry(self, entry):
         """Render a run header entry (metadata table)."""
         try:
-            meta = json.loads(entry.body) if entry.body else {}
-        except (json.JSONDecodeError, TypeError):
+            meta = jsonutil.loads(entry.body) if entry.body else {}
+        except (jsonutil.JSONDecodeError, TypeError):
             meta = {}
 
         if meta.get("error"):
@@ -227,8 +232,8 @@ class NotebookPDF(FPDF):
     def _render_data_entry(self, entry, upload_folder: str):
         """Render a data entry – embed snapshot if available, otherwise show run info."""
         try:
-            data = json.loads(entry.body) if entry.body else {}
-        except (json.JSONDecodeError, TypeError):
+            data = jsonutil.loads(entry.body) if entry.body else {}
+        except (jsonutil.JSONDecodeError, TypeError):
             data = {}
 
         # Run badges
@@ -282,8 +287,8 @@ class NotebookPDF(FPDF):
     def _render_code_entry(self, entry):
         """Render a code cell entry."""
         try:
-            code_data = json.loads(entry.body) if entry.body else {}
-        except (json.JSONDecodeError, TypeError):
+            code_data = jsonutil.loads(entry.body) if entry.body else {}
+        except (jsonutil.JSONDecodeError, TypeError):
             code_data = {}
 
         code = code_data.get("code", entry.body or "")
@@ -329,8 +334,8 @@ class NotebookPDF(FPDF):
     def _render_pvlog_entry(self, entry, upload_folder: str):
         """Render a PV log entry – show PV names, date range, and snapshot if available."""
         try:
-            pvdata = json.loads(entry.body) if entry.body else {}
-        except (json.JSONDecodeError, TypeError):
+            pvdata = jsonutil.loads(entry.body) if entry.body else {}
+        except (jsonutil.JSONDecodeError, TypeError):
             pvdata = {}
 
         if pvdata.get("error"):
@@ -0,0 +1,15 @@
+"""
+WSGI entry point for running neutroNote under gunicorn.
+
+    gunicorn -c gunicorn.conf.py neutronote.wsgi:app
+
+The notebook is chosen with the NEUTRONOTE_IPTS / NEUTRONOTE_INSTRUMENT
+environment variables (see create_app). With the gevent worker class,
+gunicorn monkey-patches the standard library before this module is
+imported, so blocking file and socket I/O yields to other requests.
+"""
+
+from .app import _start_background_tasks, create_app
+
+app = create_app()
+_start_background_tasks(app)
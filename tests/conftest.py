@@ -0,0 +1,35 @@
+"""
+Shared pytest configuration for the neutroNote tests.
+"""
+
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--run-slow",
+        action="store_true",
+        default=False,
+        help="also run tests marked slow (facility filesystem lookups)",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip ``slow`` tests unless --run-slow was given."""
+    if config.getoption("--run-slow"):
+        return
+    skip_slow = pytest.mark.skip(reason="slow; use --run-slow to run")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip_slow)
+
+
+@pytest.fixture
+def app_ctx(app):
+    """Run the test inside an application context of the module's ``app``.
+
+    Only for tests that don't make requests: a request made while this
+    context is pushed would reuse its ``g`` and database session.
+    """
+    with app.app_context():
+        yield
@@ -3,7 +3,8 @@ Test optional state ID and configurable reduced data paths.
 """
 
 import os
-import tempfile
+
+from sqlalchemy.pool import StaticPool
 
 from neutronote.app import create_app
 from neutronote.models import NotebookConfig, db
@@ -11,157 +12,504 @@ from neutronote.services.data import discover_state_ids
 import pytest
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def app():
-    """Create application for testing with a temporary database."""
-    db_fd, db_path = tempfile.mkstemp()
+    """Create application for testing with an in-memory database.
+
+    Built once per module; ``clean_db`` empties the tables after each test.
+    """
     app = create_app(
         {
             "TESTING": True,
-            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}",
+            # One shared connection, so every session sees the same database
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "SQLALCHEMY_ENGINE_OPTIONS": {
+                "poolclass": StaticPool,
+                "connect_args": {"check_same_thread": False},
+            },
             "WTF_CSRF_ENABLED": False,
+            # Don't stat template files on every render (a test briefly sets app.debug)
+            "TEMPLATES_AUTO_RELOAD": False,
         },
         instrument_name="SNAP",
     )
 
     yield app
 
-    os.close(db_fd)
-    os.unlink(db_path)
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def clean_db(app):
+    """Delete every row a test wrote, so the shared app starts each test empty."""
+    yield
+    with app.app_context():
+        db.session.rollback()
+        for table in reversed(db.metadata.sorted_tables):
+            db.session.execute(table.delete())
+        db.session.commit()
+        # Bulk deletes skip the ORM events that normally drop this
+        NotebookConfig.clear_cache()
+
+
+STATE_ID = "0123456789abcdef"
+TS = "2024-01-01T120000"
+
+
+@pytest.fixture
+def reduced_root(app, tmp_path):
+    """Configure IPTS-12345 with its reduced data under ``tmp_path``; return the root."""
+    with app.app_context():
+        config = NotebookConfig.get_config()
+        config.ipts = "IPTS-12345"
+        config.reduced_data_path = str(tmp_path)
+        db.session.commit()
+    return tmp_path
+
+
+@pytest.fixture
+def nexus_root(app, tmp_path, monkeypatch):
+    """Make the instrument's raw data root ``tmp_path``; return the root."""
+    instrument = app.config["INSTRUMENT"]
+    monkeypatch.setattr(type(instrument), "data_root", property(lambda self: tmp_path))
+    return tmp_path
+
+
+def add_run(root, state_id, run_number, ts=TS):
+    """Create ``<state>/lite/<run>/<ts>/`` under *root*; return the reduced file path.
+
+    The reduced file itself is left for the caller to create.
+    """
+    ts_dir = root / state_id / "lite" / str(run_number) / ts
+    ts_dir.mkdir(parents=True)
+    return ts_dir / f"reduced_{run_number:06d}_{ts}.nxs"
 
 
 class TestOptionalState:
     """Test that state IDs are optional and reduced data paths are configurable."""
 
-    def test_notebook_config_has_reduced_data_path(self, app):
+    def test_notebook_config_has_reduced_data_path(self, app_ctx):
         """NotebookConfig model should have reduced_data_path column."""
-        with app.app_context():
-            config = NotebookConfig.get_config()
-            # Check the property exists
-            assert hasattr(config, "reduced_data_path")
-            assert hasattr(config, "has_reduced_data_path")
+        config = NotebookConfig.get_config()
+        # Check the property exists
+        assert hasattr(config, "reduced_data_path")
+        assert hasattr(config, "has_reduced_data_path")
 
-            # Initially None
-            assert config.reduced_data_path is None
-            assert not config.has_reduced_data_path
+        # Initially None
+        assert config.reduced_data_path is None
+        assert not config.has_reduced_data_path
 
-            # Can be set
-            config.reduced_data_path = "/custom/path"
-            assert config.has_reduced_data_path
+        # Can be set
+        config.reduced_data_path = "/custom/path"
+        assert config.has_reduced_data_path
 
-    def test_discover_state_ids_returns_dot_for_flat(self, app):
+    def test_discover_state_ids_returns_dot_for_flat(self, app_ctx):
         """discover_state_ids should return ['.'] for non-existent paths (flat structure)."""
-        with app.app_context():
-            # For a non-existent IPTS, should return empty list
-            states = discover_state_ids("IPTS-99999")
-            assert states == []
+        # For a non-existent IPTS, should return empty list
+        states = discover_state_ids("IPTS-99999")
+        assert states == []
 
-    def test_ref_l_reduced_data_root(self, app):
+    def test_ref_l_reduced_data_root(self, app_ctx):
         """REF_L should return autoreduce as reduced data root."""
-        with app.app_context():
-            from neutronote.instruments import get_instrument
+        from neutronote.instruments import get_instrument
 
-            ref_l = get_instrument("REF_L")
-            root = ref_l.reduced_data_root("IPTS-12345")
-            assert root is not None
-            assert "autoreduce" in str(root)
-            assert "REF_L" in str(root)
+        ref_l = get_instrument("REF_L")
+        root = ref_l.reduced_data_root("IPTS-12345")
+        assert root is not None
+        assert "autoreduce" in str(root)
+        assert "REF_L" in str(root)
 
-    def test_snap_reduced_data_root(self, app):
+    def test_snap_reduced_data_root(self, app_ctx):
         """SNAP should return SNAPRed as reduced data root."""
-        with app.app_context():
-            from neutronote.instruments import get_instrument
+        from neutronote.instruments import get_instrument
 
-            snap = get_instrument("SNAP")
-            root = snap.reduced_data_root("IPTS-33219")
-            assert root is not None
-            assert "SNAPRed" in str(root)
-            assert "SNAP" in str(root)
+        snap = get_instrument("SNAP")
+        root = snap.reduced_data_root("IPTS-33219")
+        assert root is not None
+        assert "SNAPRed" in str(root)
+        assert "SNAP" in str(root)
 
-    def test_snap_has_state_id_hook(self, app):
+    def test_snap_has_state_id_hook(self, app_ctx):
         """SNAP should implement get_state_id_for_run."""
-        with app.app_context():
-            from neutronote.instruments import get_instrument
+        from neutronote.instruments import get_instrument
 
-            snap = get_instrument("SNAP")
-            # Should have the method (may return None if snapwrap not available)
-            assert hasattr(snap, "get_state_id_for_run")
-            # Method should be callable
-            result = snap.get_state_id_for_run(12345)
-            # Result may be None (no snapwrap) or a string (state hash)
-            assert result is None or isinstance(result, str)
+        snap = get_instrument("SNAP")
+        # Should have the method (may return None if snapwrap not available)
+        assert hasattr(snap, "get_state_id_for_run")
+        # Method should be callable
+        result = snap.get_state_id_for_run(12345)
+        # Result may be None (no snapwrap) or a string (state hash)
+        assert result is None or isinstance(result, str)
 
-    def test_ref_l_no_state_id_hook(self, app):
+    def test_ref_l_no_state_id_hook(self, app_ctx):
         """REF_L should return None for get_state_id_for_run (no state concept)."""
-        with app.app_context():
-            from neutronote.instruments import get_instrument
+        from neutronote.instruments import get_instrument
 
-            ref_l = get_instrument("REF_L")
-            # Should return None (no state concept for REF_L)
-            result = ref_l.get_state_id_for_run(12345)
-            assert result is None
+        ref_l = get_instrument("REF_L")
+        # Should return None (no state concept for REF_L)
+        result = ref_l.get_state_id_for_run(12345)
+        assert result is None
 
-    def test_env_var_reduced_data_path(self, app, monkeypatch):
+    def test_env_var_reduced_data_path(self, app_ctx, monkeypatch):
         """Environment variable should override instrument default."""
-        with app.app_context():
-            from neutronote.services.data import get_reduced_data_root
+        from neutronote.services.data import get_reduced_data_root
 
-            # Set environment variable with {ipts} placeholder
-            monkeypatch.setenv("NEUTRONOTE_REDUCED_DATA_PATH", "/custom/path/{ipts}/reduced")
+        # Set environment variable with {ipts} placeholder
+        monkeypatch.setenv("NEUTRONOTE_REDUCED_DATA_PATH", "/custom/path/{ipts}/reduced")
 
-            # Should substitute {ipts} with actual value
-            root = get_reduced_data_root("IPTS-99999")
-            assert root is not None
-            assert str(root) == "/custom/path/IPTS-99999/reduced"
+        # Should substitute {ipts} with actual value
+        root = get_reduced_data_root("IPTS-99999")
+        assert root is not None
+        assert str(root) == "/custom/path/IPTS-99999/reduced"
 
-    def test_env_var_priority_over_instrument_default(self, app, monkeypatch):
+    def test_env_var_priority_over_instrument_default(self, app_ctx, monkeypatch):
         """Env var should be used before instrument default, but after user config."""
-        with app.app_context():
-            from neutronote.models import NotebookConfig, db
-            from neutronote.services.data import get_reduced_data_root
+        from neutronote.models import NotebookConfig, db
+        from neutronote.services.data import get_reduced_data_root
+
+        # Set env var
+        monkeypatch.setenv("NEUTRONOTE_REDUCED_DATA_PATH", "/env/path/{ipts}/reduced")
 
-            # Set env var
-            monkeypatch.setenv("NEUTRONOTE_REDUCED_DATA_PATH", "/env/path/{ipts}/reduced")
+        # Without user config, should use env var
+        root = get_reduced_data_root("IPTS-12345")
+        assert "/env/path/IPTS-12345/reduced" in str(root)
 
-            # Without user config, should use env var
-            root = get_reduced_data_root("IPTS-12345")
-            assert "/env/path/IPTS-12345/reduced" in str(root)
+        # With user config, should use user config (highest priority)
+        config = NotebookConfig.get_config()
+        config.reduced_data_path = "/user/custom/path"
+        db.session.commit()
+
+        root = get_reduced_data_root("IPTS-12345")
+        assert str(root) == "/user/custom/path"
+
+    def test_refl_reduced_file_extensions(self, app_ctx):
+        """REF_L should specify .txt files for reduced data."""
+        from neutronote.instruments import get_instrument
 
-            # With user config, should use user config (highest priority)
+        ref_l = get_instrument("REF_L")
+        extensions = ref_l.reduced_file_extensions()
+
+        # Should include .txt for reduced data files
+        assert ".txt" in extensions
+
+    def test_refl_filename_parsing(self, app_ctx):
+        """REF_L should parse both raw (REF_L_*) and reduced (REFL_*) filenames."""
+        from neutronote.instruments import get_instrument
+
+        ref_l = get_instrument("REF_L")
+
+        # Raw NeXus files: REF_L_<run>.nxs.h5
+        assert ref_l.run_number_from_filename("REF_L_12345.nxs.h5") == 12345
+        assert ref_l.run_number_from_filename("REF_L_12345.lite.nxs.h5") == 12345
+
+        # Reduced text files: REFL_<run>_combined_data_auto.txt
+        assert ref_l.run_number_from_filename("REFL_115177_combined_data_auto.txt") == 115177
+        assert ref_l.run_number_from_filename("REFL_115184_combined_data_auto.txt") == 115184
+        assert ref_l.run_number_from_filename("REFL_99999_combined_data_auto.txt") == 99999
+
+        # Should not match invalid patterns
+        assert ref_l.run_number_from_filename("SNAP_12345.nxs") is None
+        assert ref_l.run_number_from_filename("random_file.txt") is None
+
+    def test_run_index_cached_until_refresh(self, app, reduced_root):
+        """Run lookups should reuse the last scan until the cache is refreshed."""
+        add_run(reduced_root, STATE_ID, 100).touch()
+        client = app.test_client()
+
+        response = client.get(f"/entries/api/runs/100/info?state_id={STATE_ID}")
+        assert response.status_code == 200
+        assert response.get_json()["run_number"] == 100
+        response = client.get(f"/entries/api/runs/999/plot-data?state_id={STATE_ID}")
+        assert response.status_code == 404
+        response = client.get(
+            f"/entries/api/runs/multi/plot-data?runs=999&runs=998&state_id={STATE_ID}"
+        )
+        data = response.get_json()
+        assert data["type"] == "multi" and data["state_id"] == STATE_ID
+        assert [r["run_number"] for r in data["runs"]] == [999, 998]
+        assert all("error" in r for r in data["runs"])
+
+        # Unchanged run list answers a conditional request with 304
+        response = client.get(f"/entries/api/states/{STATE_ID}/runs")
+        etag = response.headers["ETag"]
+        response = client.get(
+            f"/entries/api/states/{STATE_ID}/runs", headers={"If-None-Match": etag}
+        )
+        assert response.status_code == 304
+
+        # A new run folder changes the state directory's mtime
+        add_run(reduced_root, STATE_ID, 101).touch()
+        lite_dir = reduced_root / STATE_ID / "lite"
+        os.utime(lite_dir, ns=(0, os.stat(lite_dir).st_mtime_ns + 10**9))
+        response = client.get(f"/entries/api/states/{STATE_ID}/runs")
+        assert [r["run_number"] for r in response.get_json()["runs"]] == [100, 101]
+
+        # Re-reducing an existing run is not visible until the cache is dropped
+        ts = "2024-01-02T120000"
+        add_run(reduced_root, STATE_ID, 100, ts).touch()
+        response = client.get(f"/entries/api/runs/100/info?state_id={STATE_ID}")
+        assert response.get_json()["timestamp"] == TS
+
+        assert client.post("/entries/api/runs/refresh").status_code == 200
+        response = client.get(f"/entries/api/runs/100/info?state_id={STATE_ID}")
+        assert response.get_json()["timestamp"] == ts
+
+    def test_run_index_search(self):
+        """Search should prefer prefix matches and fall back to substrings."""
+        from neutronote.services.data import ReducedRun, RunIndex
+
+        index = RunIndex.from_runs(
+            ReducedRun(run_number=n, state_id="s", timestamp="", reduced_file=None)
+            for n in (9123, 12345, 12399, 22345)
+        )
+        assert [r.run_number for r in index.search("123")] == [12345, 12399]
+        assert [r.run_number for r in index.search("2345")] == [12345, 22345]
+        assert index.search("777") == []
+        assert index.get(9123).run_number == 9123
+
+    def test_run_metadata_batch(self, app, nexus_root):
+        """Batch metadata should read each run's NeXus file via the worker pool."""
+        h5py = pytest.importorskip("h5py")
+
+        instrument = app.config["INSTRUMENT"]
+        nexus_dir = nexus_root / "IPTS-12345" / "nexus"
+        nexus_dir.mkdir(parents=True)
+        for run_number in (100, 101):
+            with h5py.File(nexus_dir / instrument.nexus_filename(run_number), "w") as f:
+                f["entry/title"] = [f"Run {run_number} title".encode()]
+                f["entry/duration"] = [60.0]
+
+        with app.app_context():
             config = NotebookConfig.get_config()
-            config.reduced_data_path = "/user/custom/path"
+            config.ipts = "IPTS-12345"
             db.session.commit()
 
-            root = get_reduced_data_root("IPTS-12345")
-            assert str(root) == "/user/custom/path"
+        response = app.test_client().post(
+            "/entries/api/runs/metadata/batch", json={"run_numbers": [100, "101", 102, "x"]}
+        )
+        metadata = response.get_json()["metadata"]
+        assert list(metadata) == ["100", "101", "102"]
+        assert metadata["101"]["title"] == "Run 101 title"
+        assert metadata["100"]["duration"] == 60.0
+        assert metadata["102"]["title"] == ""
+
+    def test_get_run_metadata_reads_entry(self, app, nexus_root):
+        """get_run_metadata should read the NeXus entry fields of a located run."""
+        h5py = pytest.importorskip("h5py")
+        from neutronote.services.metadata import get_run_metadata
+
+        instrument = app.config["INSTRUMENT"]
+        nexus_dir = nexus_root / "IPTS-12345" / "nexus"
+        nexus_dir.mkdir(parents=True)
+        with h5py.File(nexus_dir / instrument.nexus_filename(101), "w") as f:
+            f["entry/title"] = [b"Run 101 title"]
+            f["entry/total_counts"] = [1010]
 
-    def test_refl_reduced_file_extensions(self, app):
-        """REF_L should specify .txt files for reduced data."""
         with app.app_context():
-            from neutronote.instruments import get_instrument
+            meta = get_run_metadata(101, ipts="IPTS-12345")
+            missing = get_run_metadata(999, ipts="IPTS-12345")
 
-            ref_l = get_instrument("REF_L")
-            extensions = ref_l.reduced_file_extensions()
+        assert meta.title == "Run 101 title"
+        assert meta.total_counts == 1010
+        assert missing.error is not None
 
-            # Should include .txt for reduced data files
-            assert ".txt" in extensions
+    def test_find_nexus_file_prefers_highest_ipts(self, app, nexus_root):
+        """The IPTS fallback scan should order folders numerically, newest first."""
+        from neutronote.services.metadata import find_nexus_file
+
+        instrument = app.config["INSTRUMENT"]
+        for ipts in ("IPTS-9", "IPTS-10", "IPTS-old"):
+            nexus_dir = nexus_root / ipts / "nexus"
+            nexus_dir.mkdir(parents=True)
+            (nexus_dir / instrument.nexus_filename(100)).touch()
 
-    def test_refl_filename_parsing(self, app):
-        """REF_L should parse both raw (REF_L_*) and reduced (REFL_*) filenames."""
         with app.app_context():
-            from neutronote.instruments import get_instrument
+            found = find_nexus_file(100)
+        assert found == nexus_root / "IPTS-10" / "nexus" / instrument.nexus_filename(100)
 
-            ref_l = get_instrument("REF_L")
+    def test_find_nexus_file_cached(self, app, nexus_root, monkeypatch):
+        """Lookups should be cached, with misses expiring after NEXUS_MISS_TTL."""
+        from neutronote.services import metadata
 
-            # Raw NeXus files: REF_L_<run>.nxs.h5
-            assert ref_l.run_number_from_filename("REF_L_12345.nxs.h5") == 12345
-            assert ref_l.run_number_from_filename("REF_L_12345.lite.nxs.h5") == 12345
+        instrument = app.config["INSTRUMENT"]
+        nexus_dir = nexus_root / "IPTS-12345" / "nexus"
+        nexus_dir.mkdir(parents=True)
+        nexus = nexus_dir / instrument.nexus_filename(100)
+        nexus.touch()
 
-            # Reduced text files: REFL_<run>_combined_data_auto.txt
-            assert ref_l.run_number_from_filename("REFL_115177_combined_data_auto.txt") == 115177
-            assert ref_l.run_number_from_filename("REFL_115184_combined_data_auto.txt") == 115184
-            assert ref_l.run_number_from_filename("REFL_99999_combined_data_auto.txt") == 99999
+        with app.app_context():
+            assert metadata.find_nexus_file(100) == nexus
+            nexus.unlink()
+            assert metadata.find_nexus_file(100) == nexus
+
+            metadata.clear_nexus_lookup_cache()
+            assert metadata.find_nexus_file(100) is None
+            nexus.touch()
+            assert metadata.find_nexus_file(100) is None
+
+            monkeypatch.setattr(metadata, "NEXUS_MISS_TTL", 0)
+            metadata.clear_nexus_lookup_cache()
+            nexus.unlink()
+            assert metadata.find_nexus_file(100) is None
+            nexus.touch()
+            assert metadata.find_nexus_file(100) == nexus
+
+    def test_state_ids_follow_root_mtime(self, app, reduced_root):
+        """Cached state listings should refresh when the reduced root changes."""
+        (reduced_root / STATE_ID).mkdir()
+
+        client = app.test_client()
+        response = client.get("/entries/api/states")
+        assert response.get_json()["states"] == [STATE_ID]
+        assert response.cache_control.no_cache
+        etag = response.headers["ETag"]
+        assert client.get("/entries/api/states", headers={"If-None-Match": etag}).status_code == 304
+
+        (reduced_root / "fedcba9876543210").mkdir()
+        os.utime(reduced_root, ns=(0, os.stat(reduced_root).st_mtime_ns + 10**9))
+        response = client.get("/entries/api/states", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.get_json()["count"] == 2
+
+    def test_prewarm_run_indexes(self, app, reduced_root, monkeypatch):
+        """The prewarmer should leave requests a cached scan to read from."""
+        from neutronote.services import data
+        from neutronote.services.data import clear_run_index_cache, prewarm_run_indexes
+
+        monkeypatch.setattr(data, "RUN_INDEX_TTL", 3600)
+
+        reduced = add_run(reduced_root, STATE_ID, 100)
+        reduced.touch()
+
+        clear_run_index_cache()
+        prewarm_run_indexes(app)
+        # Removing the file (not the run folder) leaves directory mtimes alone,
+        # so the request is answered from the prewarmed index.
+        reduced.unlink()
+        response = app.test_client().get(f"/entries/api/states/{STATE_ID}/runs")
+        assert [r["run_number"] for r in response.get_json()["runs"]] == [100]
+
+    def test_run_list_search_and_paging(self, app, reduced_root):
+        """The run list should filter by prefix and page through matches."""
+        for run_number in (9123, 12345, 12399, 12400, 22345):
+            add_run(reduced_root, STATE_ID, run_number).touch()
+
+        client = app.test_client()
+        url = f"/entries/api/states/{STATE_ID}/runs"
+        data = client.get(f"{url}?search=12&limit=2&offset=1").get_json()
+        assert [r["run_number"] for r in data["runs"]] == [12399, 12400]
+        assert (data["count"], data["total"], data["offset"]) == (2, 3, 1)
+
+        data = client.get(f"{url}?offset=3").get_json()
+        assert [r["run_number"] for r in data["runs"]] == [12400, 22345]
+
+        first = client.get(f"{url}?limit=1").headers["ETag"]
+        assert client.get(f"{url}?limit=2").headers["ETag"] != first
+
+    def test_reduced_file_metadata_cached_by_mtime(self, tmp_path):
+        """Reduced-file metadata should be re-read only when the file changes."""
+        h5py = pytest.importorskip("h5py")
+        from neutronote.services.data import get_run_metadata_lazy
+
+        reduced = tmp_path / "reduced_000100_2024-01-01T120000.nxs"
+        with h5py.File(reduced, "w") as f:
+            f["mantid_workspace_1/title"] = [b"First"]
+            f["mantid_workspace_1/logs/duration/value"] = [30.0]
+        first = get_run_metadata_lazy(reduced)
+        assert first == {"title": "First", "duration": 30.0, "start_time": ""}
+        first["title"] = "mutated"
+        assert get_run_metadata_lazy(reduced)["title"] == "First"
+
+        with h5py.File(reduced, "w") as f:
+            f["mantid_workspace_1/title"] = [b"Second"]
+        os.utime(reduced, ns=(0, os.stat(reduced).st_mtime_ns + 10**9))
+        assert get_run_metadata_lazy(reduced)["title"] == "Second"
+        assert get_run_metadata_lazy(tmp_path / "missing.nxs")["title"] == ""
+
+    def test_discover_reduced_runs_with_metadata(self, app, reduced_root):
+        """with_metadata should fill each run from its reduced file."""
+        h5py = pytest.importorskip("h5py")
+        from neutronote.services.data import discover_reduced_runs
+
+        for run_number in (100, 101):
+            with h5py.File(add_run(reduced_root, STATE_ID, run_number), "w") as f:
+                f["mantid_workspace_1/title"] = [f"Run {run_number}".encode()]
+                f["mantid_workspace_1/logs/duration/value"] = [float(run_number)]
+        with app.app_context():
+            runs = discover_reduced_runs("IPTS-12345", STATE_ID, with_metadata=True)
+            assert [(r.title, r.duration) for r in runs] == [("Run 100", 100.0), ("Run 101", 101.0)]
+            assert discover_reduced_runs("IPTS-12345", STATE_ID)[0].title == ""
+
+    def test_discover_all_reduced_data(self, app, reduced_root):
+        """Every state with runs should be listed, in sorted order."""
+        from neutronote.services.data import discover_all_reduced_data
+
+        layout = {STATE_ID: (100, 101), "fedcba9876543210": (200,)}
+        for state_id, run_numbers in layout.items():
+            for run_number in run_numbers:
+                add_run(reduced_root, state_id, run_number).touch()
+        (reduced_root / "00000000empty000").mkdir()
+        with app.app_context():
+            states = discover_all_reduced_data("IPTS-12345")
+        assert [(s.state_id, s.run_numbers) for s in states] == [
+            (STATE_ID, [100, 101]),
+            ("fedcba9876543210", [200]),
+        ]
 
-            # Should not match invalid patterns
-            assert ref_l.run_number_from_filename("SNAP_12345.nxs") is None
-            assert ref_l.run_number_from_filename("random_file.txt") is None
+    def test_state_id_for_run_cached(self, app, monkeypatch):
+        """Known state IDs are remembered; unknown runs are asked again."""
+        from neutronote.services.data import clear_run_index_cache, get_state_id_for_run
+
+        instrument = app.config["INSTRUMENT"]
+        calls = []
+
+        def lookup(self, run_number):
+            calls.append(run_number)
+            return "0123456789abcdef" if run_number == 100 else None
+
+        monkeypatch.setattr(type(instrument), "get_state_id_for_run", lookup)
+        clear_run_index_cache()
+        with app.app_context():
+            assert get_state_id_for_run(100) == get_state_id_for_run(100) == "0123456789abcdef"
+            assert get_state_id_for_run(101) is get_state_id_for_run(101) is None
+        assert calls == [100, 101, 101]
+
+    def test_discover_reduced_runs_file_detection(self, app, reduced_root):
+        """Reduced, record and pixelmask files come from one folder listing."""
+        from neutronote.services.data import discover_reduced_runs
+
+        reduced = add_run(reduced_root, STATE_ID, 100)
+        exact = reduced.parent
+        renamed = add_run(reduced_root, STATE_ID, 101).parent
+        reduced.touch()
+        (exact / "ReductionRecord.json").touch()
+        (exact / f"pixelmask_000100_{TS}.h5").touch()
+        (renamed / "reduced_b.nxs").touch()
+        (renamed / "reduced_a.nxs").touch()
+        with app.app_context():
+            first, second = discover_reduced_runs("IPTS-12345", STATE_ID)
+        assert first.reduced_file == reduced
+        assert first.record_file == exact / "ReductionRecord.json"
+        assert first.pixelmask_file == exact / f"pixelmask_000100_{TS}.h5"
+        assert second.reduced_file == renamed / "reduced_a.nxs"
+        assert second.record_file is None and second.pixelmask_file is None
+
+    def test_reduced_run_time_display(self):
+        """Run timestamps and start times should format without strptime."""
+        from pathlib import Path
+
+        from neutronote.services.data import ReducedRun
+
+        run = ReducedRun(
+            100,
+            "_flat",
+            "2025-05-08T162147",
+            Path("x.nxs"),
+            start_time=b"2025-05-08T16:21:47.5-04:00",
+        )
+        assert run.timestamp_display == "2025-05-08 16:21:47"
+        assert run.start_time_display == "2025-05-08 16:21"
+        soon = ReducedRun(100, "_flat", "", Path("x.nxs"), start_time="soon")
+        assert soon.start_time_display == "soon"
+        assert ReducedRun(100, "_flat", "", Path("x.nxs")).timestamp_datetime is None